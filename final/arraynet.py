@@ -0,0 +1,267 @@
+"""Compile the network into NumPy arrays and execute it in batches.
+
+Used in the Logic Simulator project as an alternative to executing the
+Device objects one at a time. Signal levels, connections, gate kinds and
+D-type memories are held in NumPy arrays, and every gate of the same kind in
+the same level is evaluated with one array operation. NumPy is only needed
+when this engine is used.
+
+Classes
+-------
+ArrayEngine - executes the network as NumPy arrays.
+"""
+import numpy as np
+
+from levelize import LevelizedEngine
+
+
+class ArrayEngine:
+    """Execute the network as NumPy arrays.
+
+    Every output in the network is given an index into the signal array.
+    The logic gates are evaluated in the levelized order of
+    levelize.LevelizedEngine, so the results are identical to
+    Network.sweep_network(), and networks that cannot be levelized fall
+    back to sweep_network.
+
+    The Device objects remain the reference copy of the network state:
+    switch states, D-type memories, clock counters and the outputs of
+    switches, clocks, D-types and RC devices are loaded from them at the
+    start of each cycle, and every output is stored back into them at the
+    end, so the GUI and the monitors keep working.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+
+    Public methods
+    --------------
+    compile_network(self): Builds the arrays from the devices and network.
+
+    load_devices(self): Loads the device state into the arrays.
+
+    store_devices(self): Stores the arrays back into the Device objects.
+
+    execute_network(self): Executes all the devices in the network for one
+                           simulation cycle.
+
+    reload_devices(self): Reloads the state of the devices after it is
+                          changed outside the engine.
+    """
+
+    def __init__(self, names, devices, network):
+        """Initialise the compiled network."""
+        self.names = names
+        self.devices = devices
+        self.network = network
+        self.levelized = False  # False if falling back to sweep_network
+
+    def compile_network(self):
+        """Build the arrays from the devices and network.
+
+        Return True if the network can be levelized, and False if it falls
+        back to sweep_network.
+        """
+        devices = self.devices
+        engine = LevelizedEngine(self.names, devices, self.network)
+        self.levelized = engine.compile_network()
+        if not self.levelized:
+            return False
+
+        # Two extra signals at the end are always LOW and HIGH. They pad the
+        # inputs of gates with fewer inputs than the others in their batch.
+        self.output_keys = []  # (device, output_id) for each signal
+        index = {}
+        for device in devices.devices_list:
+            for output_id in device.outputs:
+                index[(device.device_id, output_id)] = len(self.output_keys)
+                self.output_keys.append((device, output_id))
+        self.LOW_INDEX = len(self.output_keys)
+        self.HIGH_INDEX = self.LOW_INDEX + 1
+        self.signals = np.zeros(self.HIGH_INDEX + 1, dtype=np.int8)
+        self.signals[self.HIGH_INDEX] = devices.HIGH
+
+        def output_index(device):
+            return index[(device.device_id, None)]
+
+        def input_indices(device, input_ids):
+            return np.array([index[device.inputs[input_id]]
+                             for input_id in input_ids], dtype=np.intp)
+
+        self.switch_devices = engine.switch_devices
+        self.switch_index = np.array(
+            [output_index(device) for device in self.switch_devices],
+            dtype=np.intp)
+
+        self.clock_devices = engine.clock_devices
+        self.clock_index = np.array(
+            [output_index(device) for device in self.clock_devices],
+            dtype=np.intp)
+        self.clock_half_period = np.array(
+            [device.clock_half_period for device in self.clock_devices],
+            dtype=np.int64)
+
+        self.rc_devices = engine.rc_devices
+        self.rc_index = np.array(
+            [output_index(device) for device in self.rc_devices],
+            dtype=np.intp)
+        self.rc_fall_time = np.array(
+            [device.fall_time for device in self.rc_devices], dtype=np.int64)
+
+        self.d_type_devices = [d_type[0] for d_type in engine.d_type_devices]
+        self.q_index = np.array(
+            [index[(device.device_id, devices.Q_ID)]
+             for device in self.d_type_devices], dtype=np.intp)
+        self.qbar_index = np.array(
+            [index[(device.device_id, devices.QBAR_ID)]
+             for device in self.d_type_devices], dtype=np.intp)
+        d_type_inputs = np.array(
+            [input_indices(device, [devices.CLK_ID, devices.DATA_ID,
+                                    devices.SET_ID, devices.CLEAR_ID])
+             for device in self.d_type_devices], dtype=np.intp).reshape(-1, 4)
+        [self.clk_index, self.data_index, self.set_index,
+         self.clear_index] = d_type_inputs.T
+
+        self.state_index = np.concatenate(
+            [self.switch_index, self.clock_index, self.rc_index,
+             self.q_index, self.qbar_index])
+        self.state_keys = [self.output_keys[i] for i in self.state_index]
+
+        # Each batch is (output indices, input index matrix, kind), where
+        # every row of the matrix holds the input indices of one gate
+        self.batches = []
+        for level in engine.levels:
+            level_devices = [devices.get_device(device_id)
+                             for device_id in level]
+            for gate_kind in devices.gate_types:
+                gates = [device for device in level_devices
+                         if device.device_kind == gate_kind]
+                if not gates:
+                    continue
+                if gate_kind in [devices.AND, devices.NAND]:
+                    padding = self.HIGH_INDEX
+                else:
+                    padding = self.LOW_INDEX
+                width = max(len(device.inputs) for device in gates)
+                inputs = np.full((len(gates), width), padding, dtype=np.intp)
+                for row, device in enumerate(gates):
+                    inputs[row, :len(device.inputs)] = input_indices(
+                        device, device.inputs)
+                outputs = np.array([output_index(device) for device in gates],
+                                   dtype=np.intp)
+                self.batches.append((outputs, inputs, gate_kind))
+
+        self.signals[:self.LOW_INDEX] = [device.outputs[output_id] for
+                                         device, output_id in self.output_keys]
+        return True
+
+    def load_devices(self):
+        """Load the device state into the arrays.
+
+        Only the devices that hold state are loaded. The gate outputs in the
+        arrays are the ones stored at the end of the previous cycle.
+        """
+        self.switch_state = np.array(
+            [device.switch_state for device in self.switch_devices],
+            dtype=np.int8)
+        self.clock_counter = np.array(
+            [device.clock_counter for device in self.clock_devices],
+            dtype=np.int64)
+        self.dtype_memory = np.array(
+            [device.dtype_memory for device in self.d_type_devices],
+            dtype=np.int8)
+        self.signals[self.state_index] = [
+            device.outputs[output_id]
+            for device, output_id in self.state_keys]
+
+    def reload_devices(self):
+        """Reload the state of the devices after it is changed outside.
+
+        The gate outputs are kept in the arrays between cycles, so every
+        signal is reloaded. The other state is loaded at every cycle.
+        """
+        if self.levelized:
+            self.signals[:self.LOW_INDEX] = [
+                device.outputs[output_id]
+                for device, output_id in self.output_keys]
+
+    def store_devices(self):
+        """Store the arrays back into the Device objects."""
+        signals = self.signals.tolist()
+        for (device, output_id), signal in zip(self.output_keys, signals):
+            device.outputs[output_id] = signal
+        for device, memory in zip(self.d_type_devices,
+                                  self.dtype_memory.tolist()):
+            device.dtype_memory = memory
+        for device, counter in zip(self.clock_devices,
+                                   self.clock_counter.tolist()):
+            device.clock_counter = counter
+
+    def execute_network(self):
+        """Execute all the devices in the network for one simulation cycle.
+
+        Return True if successful and the network does not oscillate.
+        """
+        if not self.levelized:
+            return self.network.sweep_network()
+
+        devices = self.devices
+        signals = self.signals
+        self.load_devices()
+        old_signals = signals.copy()
+
+        # Clocks whose half period is over start RISING or FALLING, as in
+        # Network.update_clocks
+        clock_signal = signals[self.clock_index]
+        toggled = self.clock_counter == self.clock_half_period
+        self.clock_counter[toggled] = 0
+        self.clock_counter += 1
+
+        # Where inputs are RISING, and where they are HIGH, when the D-types
+        # see them in the first sweep of Network.sweep_network
+        switch_signal = signals[self.switch_index]
+        rising = np.zeros(len(signals), dtype=bool)
+        rising[self.switch_index] = (self.switch_state == devices.HIGH) & (
+            switch_signal == devices.LOW)
+        rising[self.clock_index] = toggled & (clock_signal == devices.LOW)
+        high = old_signals == devices.HIGH
+        high[self.switch_index] = (self.switch_state == devices.HIGH) & (
+            switch_signal == devices.HIGH)
+        high[self.clock_index] = ~toggled & (clock_signal == devices.HIGH)
+
+        memory = np.where(rising[self.clk_index],
+                          old_signals[self.data_index], self.dtype_memory)
+        memory[high[self.set_index]] = devices.HIGH
+        memory[high[self.clear_index]] = devices.LOW
+
+        # Settle the sources of the combinational network
+        signals[self.clock_index] = np.where(toggled, 1 - clock_signal,
+                                             clock_signal)
+        signals[self.switch_index] = self.switch_state
+        signals[self.rc_index] = (self.network.global_counter <
+                                  self.rc_fall_time)
+        memory[signals[self.set_index] == devices.HIGH] = devices.HIGH
+        memory[signals[self.clear_index] == devices.HIGH] = devices.LOW
+        self.dtype_memory = memory
+        signals[self.q_index] = memory
+        signals[self.qbar_index] = 1 - memory
+
+        for outputs, inputs, gate_kind in self.batches:
+            gate_inputs = signals[inputs]
+            if gate_kind == devices.AND:
+                signals[outputs] = gate_inputs.min(axis=1)
+            elif gate_kind == devices.OR:
+                signals[outputs] = gate_inputs.max(axis=1)
+            elif gate_kind == devices.NAND:
+                signals[outputs] = 1 - gate_inputs.min(axis=1)
+            elif gate_kind == devices.NOR:
+                signals[outputs] = 1 - gate_inputs.max(axis=1)
+            else:  # XOR
+                signals[outputs] = gate_inputs[:, 0] ^ gate_inputs[:, 1]
+
+        self.store_devices()
+        self.network.global_counter += 1
+        self.network.steady_state = True
+        return True
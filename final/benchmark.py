@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""Measure the performance of the Logic Simulator on large networks.
+
+Used in the Logic Simulator project to time the simulation of generated
+networks that are much larger than the example definition files.
+
+Usage
+-----
+Show help: benchmark.py -h
+Time simulation cycles: benchmark.py [-g <gates>] [-n <cycles>]
+                                     [-e <engine>]
+Use a shift register of D-types instead of gates: benchmark.py -d <d-types>
+Time each stage on a definition file: benchmark.py -f <file path>
+                                      [-n <cycles>] [-e <engine>]
+                                      [-o <JSON file>]
+Time each stage on a generated file: benchmark.py -s <shape> -z <size>
+                                     [-n <cycles>] [-e <engine>]
+                                     [-o <JSON file>]
+"""
+import contextlib
+import getopt
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+import netgen
+from levelize import LevelizedEngine
+from events import EventDrivenEngine
+try:
+    from arraynet import ArrayEngine
+except ImportError:  # NumPy is only needed for the arrays engine
+    ArrayEngine = None
+from codegen import CodeGenEngine
+
+
+def build_gate_network(gate_count, switch_count=64, seed=0):
+    """Build a random acyclic network of two-input NAND gates.
+
+    Each gate is connected to the outputs of two devices made before it, so
+    the gates never form a loop. Return the network.
+    """
+    rng = random.Random(seed)
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    [I1_ID, I2_ID] = names.lookup(["I1", "I2"])
+
+    switch_ids = names.lookup_many("SW" + str(number)
+                                   for number in range(switch_count))
+    for switch_id in switch_ids:
+        devices.make_device(switch_id, devices.SWITCH, rng.randrange(2))
+
+    gate_ids = names.lookup_many("G" + str(number)
+                                 for number in range(gate_count))
+    made_ids = list(switch_ids)
+    for gate_id in gate_ids:
+        devices.make_device(gate_id, devices.NAND, 2)
+        for input_id in [I1_ID, I2_ID]:
+            source_id = made_ids[rng.randrange(len(made_ids))]
+            network.make_connection(source_id, None, gate_id, input_id)
+        made_ids.append(gate_id)
+    return network
+
+
+def build_shift_register(d_type_count, seed=0):
+    """Build a shift register of D-types, each with its own clock.
+
+    All the D-types share one switch for their SET, CLEAR and first DATA
+    inputs. Return the network.
+    """
+    random.seed(seed)  # cold start-up uses the random module
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    [SW_ID] = names.lookup(["SW"])
+    devices.make_device(SW_ID, devices.SWITCH, 0)
+
+    d_type_ids = names.lookup_many("D" + str(number)
+                                   for number in range(d_type_count))
+    clock_ids = names.lookup_many("CLK" + str(number)
+                                  for number in range(d_type_count))
+    source = (SW_ID, None)
+    for d_type_id, clock_id in zip(d_type_ids, clock_ids):
+        devices.make_device(clock_id, devices.CLOCK, 1)
+        devices.make_device(d_type_id, devices.D_TYPE)
+        network.make_connection(clock_id, None, d_type_id, devices.CLK_ID)
+        network.make_connection(*source, d_type_id, devices.DATA_ID)
+        network.make_connection(SW_ID, None, d_type_id, devices.SET_ID)
+        network.make_connection(SW_ID, None, d_type_id, devices.CLEAR_ID)
+        source = (d_type_id, devices.Q_ID)
+    return network
+
+
+def time_cycles(network, cycles):
+    """Return the mean wall clock time in seconds of one simulation cycle.
+
+    The first cycle, which settles the network from its initial state, is
+    not timed.
+    """
+    network.execute_network()
+    start = time.perf_counter()
+    for _ in range(cycles):
+        network.execute_network()
+    return (time.perf_counter() - start) / cycles
+
+
+def time_stages(path, cycles, engine_class=None):
+    """Time scanning, parsing, execution and recording on a definition file.
+
+    Return a dictionary of the results. The times of execute_network and
+    record_signals are means over one cycle, and the first cycle, which
+    settles the network from its initial state, is not timed.
+    """
+    names = Names()
+    scanner = Scanner(path, names)
+    start = time.perf_counter()
+    symbol_count = 1
+    while scanner.get_symbol().type != scanner.EOF:
+        symbol_count += 1
+    scan_time = time.perf_counter() - start
+
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    scanner = Scanner(path, names)
+    parser = Parser(names, devices, network, monitors, scanner)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        parser.parse_network()
+    parse_time = time.perf_counter() - start
+
+    results = {"file": path, "symbols": symbol_count,
+               "errors": parser.error_count,
+               "devices": len(devices.devices_list),
+               "monitors": len(monitors.monitors_dictionary),
+               "cycles": cycles, "scan_seconds": scan_time,
+               "parse_seconds": parse_time}
+    if parser.error_count:
+        return results
+
+    if engine_class is not None:
+        network.set_engine(engine_class(names, devices, network))
+    network.execute_network()
+    execute_time = record_time = 0
+    for _ in range(cycles):
+        start = time.perf_counter()
+        network.execute_network()
+        middle = time.perf_counter()
+        monitors.record_signals()
+        execute_time += middle - start
+        record_time += time.perf_counter() - middle
+    results["execute_seconds"] = execute_time / cycles
+    results["record_seconds"] = record_time / cycles
+    return results
+
+
+def get_commit():
+    """Return the git commit of the working tree, or None if unknown."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+            text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(json_path, results):
+    """Append the results to the list of results in a JSON file.
+
+    Each entry records the commit, Python version and date, so that runs
+    can be compared across commits.
+    """
+    entry = {"commit": get_commit(),
+             "python": platform.python_version(),
+             "date": time.strftime("%Y-%m-%d %H:%M:%S")}
+    entry.update(results)
+    entries = []
+    if os.path.exists(json_path):
+        with open(json_path) as json_file:
+            entries = json.load(json_file)
+    entries.append(entry)
+    with open(json_path, 'w') as json_file:
+        json.dump(entries, json_file, indent=2)
+
+
+def print_stages(results):
+    """Print the results of time_stages()."""
+    if results.get("shape") is not None:
+        print("Circuit:       ", results["shape"], results["size"])
+    else:
+        print("File:          ", results["file"])
+    print("Devices:       ", results["devices"])
+    print("Symbols:       ", results["symbols"])
+    print("Scan time:     ", "%.3f s" % results["scan_seconds"])
+    print("Parse time:    ", "%.3f s" % results["parse_seconds"])
+    if results["errors"]:
+        print("Errors:        ", results["errors"])
+        return
+    print("Execute/cycle: ", "%.3f ms" % (results["execute_seconds"] * 1000))
+    print("Record/cycle:  ", "%.3f ms" % (results["record_seconds"] * 1000))
+
+
+def main(arg_list):
+    """Parse the command line options and print the benchmark results."""
+    usage_message = ("Usage:\n"
+                     "Show help: benchmark.py -h\n"
+                     "Time simulation cycles: "
+                     "benchmark.py [-g <gates>] [-n <cycles>] "
+                     "[-e <engine>]\n"
+                     "Engines: sweep (default), levelized, events, arrays, "
+                     "codegen\n"
+                     "Use a shift register of D-types instead of gates: "
+                     "benchmark.py -d <d-types>\n"
+                     "Time each stage on a definition file: "
+                     "benchmark.py -f <file path> [-n <cycles>] "
+                     "[-e <engine>] [-o <JSON file>]\n"
+                     "Time each stage on a generated file: "
+                     "benchmark.py -s <shape> -z <size> [-n <cycles>] "
+                     "[-e <engine>] [-o <JSON file>]\n"
+                     "Shapes: " + ", ".join(netgen.SHAPES))
+    engines = {"sweep": None, "levelized": LevelizedEngine,
+               "events": EventDrivenEngine, "arrays": ArrayEngine,
+               "codegen": CodeGenEngine}
+    try:
+        options, arguments = getopt.getopt(arg_list, "hg:n:e:d:f:s:z:o:")
+    except getopt.GetoptError:
+        print("Error: invalid command line arguments\n")
+        print(usage_message)
+        sys.exit()
+
+    gate_count = 50000
+    d_type_count = None
+    cycles = 10
+    engine_name = "sweep"
+    engine_class = None
+    path = None
+    shape = None
+    size = 1000
+    json_path = None
+    for option, value in options:
+        if option == "-h":
+            print(usage_message)
+            sys.exit()
+        elif option == "-g":
+            gate_count = int(value)
+        elif option == "-d":
+            d_type_count = int(value)
+        elif option == "-n":
+            if not value.isdigit() or int(value) == 0:
+                print("Error: the number of cycles must be a number of at "
+                      "least 1\n")
+                print(usage_message)
+                sys.exit()
+            cycles = int(value)
+        elif option == "-e":
+            if value == "arrays" and ArrayEngine is None:
+                print("Error: the arrays engine needs NumPy\n")
+                sys.exit()
+            if value not in engines:
+                print("Error: unknown engine", value, "\n")
+                print(usage_message)
+                sys.exit()
+            engine_name = value
+            engine_class = engines[value]
+        elif option == "-f":
+            path = value
+        elif option == "-s":
+            if value not in netgen.SHAPES:
+                print("Error: unknown shape", value, "\n")
+                print(usage_message)
+                sys.exit()
+            shape = value
+        elif option == "-z":
+            size = int(value)
+        elif option == "-o":
+            json_path = value
+
+    if path is not None or shape is not None:
+        if path is None:
+            with tempfile.TemporaryDirectory() as directory:
+                generated_path = os.path.join(directory, shape + ".txt")
+                netgen.write_definition_file(generated_path, shape, size)
+                results = time_stages(generated_path, cycles, engine_class)
+            results.update({"file": None, "shape": shape, "size": size})
+        else:
+            results = time_stages(path, cycles, engine_class)
+        results["engine"] = engine_name
+        print_stages(results)
+        if json_path is not None:
+            save_results(json_path, results)
+        return
+
+    start = time.perf_counter()
+    if d_type_count is None:
+        network = build_gate_network(gate_count)
+    else:
+        network = build_shift_register(d_type_count)
+    if engine_class is not None:
+        network.set_engine(engine_class(network.names, network.devices,
+                                        network))
+    build_time = time.perf_counter() - start
+    cycle_time = time_cycles(network, cycles)
+
+    if d_type_count is None:
+        print("Gates:        ", gate_count)
+    else:
+        print("D-types:      ", d_type_count)
+    print("Build time:   ", "%.3f s" % build_time)
+    print("Time / cycle: ", "%.3f ms" % (cycle_time * 1000))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,303 @@
+"""Simulate many switch configurations at once with bit-parallel signals.
+
+Used in the Logic Simulator project to run the same network against many
+switch configurations, called scenarios. Each signal is stored as a Python
+integer holding one bit per scenario, so each logic gate is evaluated for
+all the scenarios with a single bitwise operation.
+
+Classes
+-------
+BitParallelSimulator - simulates many switch configurations at once.
+"""
+import collections
+
+from levelize import LevelizedEngine
+from monitors import SignalTrace
+
+
+class BitParallelSimulator:
+    """Simulate many switch configurations at once.
+
+    Bit i of every signal is the signal level (LOW or HIGH) in scenario i.
+    The network is evaluated in the levelized order of
+    levelize.LevelizedEngine, which gives the same results as
+    Network.sweep_network(). Networks that cannot be levelized are
+    simulated one scenario at a time with sweep_network instead.
+
+    Every scenario starts from the current state of the devices, so
+    devices.cold_startup() should be called first to start from a random
+    state. The devices themselves are left unchanged.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class, whose monitored
+              signals are recorded.
+
+    Public methods
+    --------------
+    run(self, scenarios, cycles): Simulates every scenario for the specified
+                                  number of cycles and returns True if
+                                  successful.
+
+    get_traces(self, scenario): Returns the signal traces of one scenario.
+
+    unpack_monitors(self, scenario, monitors): Stores the signal traces of
+                                               one scenario in monitors.
+    """
+
+    def __init__(self, names, devices, network, monitors):
+        """Initialise the simulator."""
+        self.names = names
+        self.devices = devices
+        self.network = network
+        self.monitors = monitors
+
+        self.scenario_count = 0
+        self.mask = 0  # one bit set for every scenario
+        # stores {(device_id, output_id): [packed_signal, ...]}
+        self.packed_traces = collections.OrderedDict()
+        # stores {(device_id, output_id): [[signal, ...], ...]} for networks
+        # that are simulated one scenario at a time
+        self.scenario_traces = None
+
+    def run(self, scenarios, cycles):
+        """Simulate every scenario for the specified number of cycles.
+
+        scenarios is a list of {switch_id: switch_state} dictionaries.
+        Switches missing from a scenario keep their current state. Return
+        True if successful, or False if the network oscillates in any
+        scenario.
+        """
+        self.scenario_count = len(scenarios)
+        self.mask = (1 << self.scenario_count) - 1
+        self.packed_traces = collections.OrderedDict()
+        self.scenario_traces = None
+
+        engine = LevelizedEngine(self.names, self.devices, self.network)
+        if not engine.compile_network() or not self.is_settled():
+            return self.run_scenarios(scenarios, cycles)
+        return self.run_packed(engine, scenarios, cycles)
+
+    def is_settled(self):
+        """Return True if every output in the network is LOW or HIGH."""
+        for device in self.devices.devices_list:
+            for signal in device.outputs.values():
+                if signal not in [self.devices.LOW, self.devices.HIGH]:
+                    return False
+        return True
+
+    def pack(self, signal):
+        """Return signal (LOW or HIGH) packed for every scenario."""
+        if signal == self.devices.HIGH:
+            return self.mask
+        return 0
+
+    def run_packed(self, engine, scenarios, cycles):
+        """Simulate all the scenarios at once with packed signals."""
+        devices = self.devices
+        get_device = devices.get_device
+        mask = self.mask
+        HIGH = devices.HIGH
+        RISING = devices.RISING
+        FALLING = devices.FALLING
+
+        # Every output is given an index into the list of packed values
+        index = {}
+        values = []
+        for device in devices.devices_list:
+            for output_id, signal in device.outputs.items():
+                index[(device.device_id, output_id)] = len(values)
+                values.append(self.pack(signal))
+
+        def source(device, input_id):
+            return index[device.inputs[input_id]]
+
+        switches = []  # stores (output index, packed switch states)
+        for device in engine.switch_devices:
+            states = 0
+            for bit, scenario in enumerate(scenarios):
+                if scenario.get(device.device_id,
+                                device.switch_state) == HIGH:
+                    states |= 1 << bit
+            switches.append((index[(device.device_id, None)], states))
+
+        # Clocks and RC devices are the same in every scenario
+        clocks = [[index[(device.device_id, None)], device.outputs[None],
+                   device.clock_counter, device.clock_half_period]
+                  for device in engine.clock_devices]
+        rc_devices = [(index[(device.device_id, None)], device.fall_time)
+                      for device in engine.rc_devices]
+
+        d_types = []  # stores [memory, Q, QBAR, CLK, DATA, SET, CLEAR]
+        for device, clk, data, set_, clear in engine.d_type_devices:
+            d_types.append([self.pack(device.dtype_memory),
+                            index[(device.device_id, devices.Q_ID)],
+                            index[(device.device_id, devices.QBAR_ID)],
+                            source(device, devices.CLK_ID),
+                            source(device, devices.DATA_ID),
+                            source(device, devices.SET_ID),
+                            source(device, devices.CLEAR_ID)])
+
+        # stores (output index, inverted, operator, input indices)
+        gates = []
+        for level in engine.levels:
+            for device_id in level:
+                device = get_device(device_id)
+                inputs = [source(device, input_id)
+                          for input_id in device.inputs]
+                kind = device.device_kind
+                inverted = kind in [devices.NAND, devices.NOR]
+                if kind in [devices.AND, devices.NAND]:
+                    operator = "and"
+                elif kind in [devices.OR, devices.NOR]:
+                    operator = "or"
+                else:
+                    operator = "xor"
+                gates.append((index[(device_id, None)], inverted, operator,
+                              inputs))
+
+        monitored = [(key, index[key]) for key in
+                     self.monitors.monitors_dictionary]
+        for key, _ in monitored:
+            self.packed_traces[key] = []
+
+        global_counter = self.network.global_counter
+        for _ in range(cycles):
+            # Clocks whose half period is over start RISING or FALLING, as in
+            # Network.update_clocks
+            for clock in clocks:
+                if clock[2] == clock[3]:
+                    clock[2] = 0
+                    if clock[1] == HIGH:
+                        clock[1] = FALLING
+                    else:
+                        clock[1] = RISING
+                clock[2] += 1
+
+            # Signals seen by the D-types in the first sweep of the cycle:
+            # the bits of `rising` are set where the CLK input is RISING, and
+            # the bits of `high` where an input is already HIGH.
+            rising = {}
+            high = {}
+            for output_index, states in switches:
+                old = values[output_index]
+                rising[output_index] = states & ~old & mask
+                high[output_index] = states & old
+            for output_index, signal, counter, half_period in clocks:
+                rising[output_index] = mask if signal == RISING else 0
+                high[output_index] = mask if signal == HIGH else 0
+
+            for d_type in d_types:
+                [memory, Q, QBAR, clk, data, set_, clear] = d_type
+                clocked = rising.get(clk, 0)
+                memory = (clocked & values[data]) | (~clocked & memory)
+                memory |= high.get(set_, values[set_])
+                memory &= ~high.get(clear, values[clear])
+                d_type[0] = memory & mask
+
+            # Settle the sources of the combinational network
+            for clock in clocks:
+                if clock[1] == RISING:
+                    clock[1] = HIGH
+                elif clock[1] == FALLING:
+                    clock[1] = devices.LOW
+                values[clock[0]] = self.pack(clock[1])
+            for output_index, states in switches:
+                values[output_index] = states
+            for output_index, fall_time in rc_devices:
+                if global_counter < fall_time:
+                    values[output_index] = mask
+                else:
+                    values[output_index] = 0
+            for d_type in d_types:
+                [memory, Q, QBAR, clk, data, set_, clear] = d_type
+                memory |= values[set_]
+                memory &= ~values[clear]
+                d_type[0] = memory
+                values[Q] = memory
+                values[QBAR] = ~memory & mask
+
+            for output_index, inverted, operator, inputs in gates:
+                result = values[inputs[0]]
+                if operator == "and":
+                    for input_index in inputs[1:]:
+                        result &= values[input_index]
+                elif operator == "or":
+                    for input_index in inputs[1:]:
+                        result |= values[input_index]
+                else:
+                    result ^= values[inputs[1]]
+                if inverted:
+                    result = ~result & mask
+                values[output_index] = result
+
+            global_counter += 1
+            for key, output_index in monitored:
+                self.packed_traces[key].append(values[output_index])
+        return True
+
+    def run_scenarios(self, scenarios, cycles):
+        """Simulate the scenarios one at a time with sweep_network."""
+        devices = self.devices
+        network = self.network
+        saved_state = [(device, dict(device.outputs), device.dtype_memory,
+                        device.clock_counter, device.switch_state)
+                       for device in devices.devices_list]
+        saved_counter = network.global_counter
+
+        self.scenario_traces = collections.OrderedDict(
+            (key, []) for key in self.monitors.monitors_dictionary)
+        success = True
+        for scenario in scenarios:
+            for device_id, switch_state in scenario.items():
+                devices.set_switch(device_id, switch_state)
+            traces = {key: [] for key in self.scenario_traces}
+            for _ in range(cycles):
+                if not network.sweep_network():
+                    success = False
+                    break
+                for (device_id, output_id), trace in traces.items():
+                    trace.append(network.get_output_signal(device_id,
+                                                           output_id))
+            for key, trace in traces.items():
+                self.scenario_traces[key].append(trace)
+
+            # Start the next scenario from the same state
+            for (device, outputs, dtype_memory, clock_counter,
+                 switch_state) in saved_state:
+                device.outputs.update(outputs)
+                device.dtype_memory = dtype_memory
+                device.clock_counter = clock_counter
+                device.switch_state = switch_state
+            network.global_counter = saved_counter
+        return success
+
+    def get_traces(self, scenario):
+        """Return the signal traces of the specified scenario.
+
+        The traces are returned as {(device_id, output_id): [signal, ...]},
+        in the same form as Monitors.monitors_dictionary.
+        """
+        if self.scenario_traces is not None:
+            return collections.OrderedDict(
+                (key, list(traces[scenario]))
+                for key, traces in self.scenario_traces.items())
+        HIGH = self.devices.HIGH
+        LOW = self.devices.LOW
+        return collections.OrderedDict(
+            (key, [HIGH if packed >> scenario & 1 else LOW
+                   for packed in packed_signals])
+            for key, packed_signals in self.packed_traces.items())
+
+    def unpack_monitors(self, scenario, monitors):
+        """Store the signal traces of the specified scenario in monitors.
+
+        Monitored signals of monitors that were not recorded are left
+        unchanged.
+        """
+        for key, trace in self.get_traces(scenario).items():
+            if key in monitors.monitors_dictionary:
+                monitors.monitors_dictionary[key] = SignalTrace(trace)
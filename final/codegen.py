@@ -0,0 +1,308 @@
+"""Generate Python source for the network and execute the compiled function.
+
+Used in the Logic Simulator project for long runs. The network is turned
+into a straight-line Python function that executes one simulation cycle
+with local variables, instead of looking up every input through
+Network.get_input_signal. The compiled code can be cached on disk, keyed by
+a hash of the definition file, so that repeated runs skip code generation.
+Only the most recently used entries are kept in the cache.
+
+Classes
+-------
+CodeGenEngine - executes the network with a generated Python function.
+"""
+import hashlib
+import marshal
+import os
+import sys
+
+from levelize import LevelizedEngine
+
+# Change this whenever the generated code changes, to invalidate the cache
+GENERATOR_VERSION = "1"
+
+# Number of networks whose compiled code is kept in the cache
+CACHE_SIZE = 32
+
+
+class CodeGenEngine:
+    """Execute the network with a generated Python function.
+
+    The generated function follows the levelized order of
+    levelize.LevelizedEngine, so the results are identical to
+    Network.sweep_network(), and networks that cannot be levelized fall
+    back to sweep_network. It reads and writes the Device objects directly,
+    so the GUI and monitors keep working.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+    path: path to the circuit definition file, used as the cache key. No
+          cache is used if path is None.
+    cache_dir: directory for the cached code.
+    cache_size: number of cached networks kept, the least recently used
+                being removed.
+
+    Public methods
+    --------------
+    compile_network(self): Generates and compiles the cycle function, or
+                           loads it from the cache.
+
+    generate_source(self, engine): Returns the Python source of the cycle
+                                   function.
+
+    get_cache_path(self): Returns the path of the cached code.
+
+    write_cache(self, cache_path, code): Writes the compiled code to the
+                                         cache.
+
+    evict_cache(self): Removes all but the most recently used cached code.
+
+    execute_network(self): Executes all the devices in the network for one
+                           simulation cycle.
+
+    reload_devices(self): Reloads the state of the devices after it is
+                          changed outside the engine.
+    """
+
+    def __init__(self, names, devices, network, path=None,
+                 cache_dir=os.path.join(os.path.expanduser("~"), ".cache",
+                                        "logsim"), cache_size=CACHE_SIZE):
+        """Initialise the engine and cache settings."""
+        self.names = names
+        self.devices = devices
+        self.network = network
+        self.path = path
+        self.cache_dir = cache_dir
+        self.cache_size = cache_size
+
+        self.levelized = False  # False if falling back to sweep_network
+        self.loaded_from_cache = False
+        self.source = None
+        self.cycle = None
+
+    def get_cache_path(self):
+        """Return the path of the cached code, or None if there is no cache.
+
+        The cache key covers the definition file, the generator version and
+        the Python version, as marshalled code is specific to it.
+        """
+        if self.path is None:
+            return None
+        key = hashlib.sha256()
+        with open(self.path, 'rb') as definition_file:
+            key.update(definition_file.read())
+        key.update(GENERATOR_VERSION.encode())
+        key.update(sys.version.encode())
+        key.update(str(len(self.devices.devices_list)).encode())
+        return os.path.join(self.cache_dir, key.hexdigest() + ".marshal")
+
+    def compile_network(self):
+        """Generate and compile the cycle function, or load it from cache.
+
+        Return True if the network can be levelized, and False if it falls
+        back to sweep_network.
+        """
+        engine = LevelizedEngine(self.names, self.devices, self.network)
+        self.levelized = engine.compile_network()
+        self.loaded_from_cache = False
+        if not self.levelized:
+            return False
+
+        cache_path = self.get_cache_path()
+        code = None
+        if cache_path is not None:
+            try:
+                with open(cache_path, 'rb') as cache_file:
+                    code = marshal.load(cache_file)
+                self.loaded_from_cache = True
+            except (OSError, EOFError, ValueError, TypeError):
+                code = None
+        if self.loaded_from_cache:
+            try:
+                os.utime(cache_path)  # mark it as recently used
+            except OSError:
+                pass
+        if code is None:
+            self.source = self.generate_source(engine)
+            code = compile(self.source, "<logsim network>", "exec")
+            if cache_path is not None:
+                self.write_cache(cache_path, code)
+
+        namespace = {}
+        exec(code, namespace)
+        self.cycle = namespace["cycle"]
+        self.device_objects = list(self.devices.devices_list)
+        self.device_outputs = [device.outputs for device in
+                               self.device_objects]
+        return True
+
+    def reload_devices(self):
+        """Reload the state of the devices after it is changed outside.
+
+        The generated function reads the devices directly, so there is
+        nothing to do.
+        """
+
+    def write_cache(self, cache_path, code):
+        """Write the compiled code to the cache, ignoring any failure."""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temporary_path = cache_path + ".tmp"
+            with open(temporary_path, 'wb') as cache_file:
+                marshal.dump(code, cache_file)
+            os.replace(temporary_path, cache_path)
+        except OSError:
+            return
+        self.evict_cache()
+
+    def evict_cache(self):
+        """Remove all but the cache_size most recently used cached code.
+
+        Entries are ordered by modification time, which is updated whenever
+        they are loaded. Any failure is ignored, as another process may be
+        using the cache.
+        """
+        entries = []
+        try:
+            with os.scandir(self.cache_dir) as directory:
+                for entry in directory:
+                    if entry.name.endswith(".marshal"):
+                        entries.append((entry.stat().st_mtime, entry.path))
+        except OSError:
+            return
+        entries.sort(reverse=True)
+        for _, entry_path in entries[self.cache_size:]:
+            try:
+                os.remove(entry_path)
+            except OSError:
+                pass
+
+    def generate_source(self, engine):
+        """Return the Python source of the cycle function.
+
+        cycle(t, D, O) executes one simulation cycle at global counter t.
+        D is the devices list and O the list of their outputs dictionaries.
+        The new signal of output n of device D[i] is v<i>_<n>, and the
+        signal before the cycle is p<i>_<n>.
+        """
+        devices = self.devices
+        position = {device.device_id: i
+                    for i, device in enumerate(devices.devices_list)}
+        output_number = {}
+        for device in devices.devices_list:
+            for n, output_id in enumerate(device.outputs):
+                output_number[(device.device_id, output_id)] = n
+
+        def name(prefix, connection):
+            (device_id, output_id) = connection
+            return "%s%d_%d" % (prefix, position[device_id],
+                                output_number[connection])
+
+        def key(device_id, output_id):
+            return "O[%d][%r]" % (position[device_id], output_id)
+
+        body = ["def cycle(t, D, O):"]
+
+        # Old signals seen by the D-types in the first sweep of the cycle
+        old_signals = set()
+        for device, clk, data, set_, clear in engine.d_type_devices:
+            for input_id in [devices.DATA_ID, devices.SET_ID,
+                             devices.CLEAR_ID]:
+                old_signals.add(device.inputs[input_id])
+        for connection in sorted(old_signals, key=lambda c: name("p", c)):
+            body.append("    %s = %s" % (name("p", connection),
+                                         key(*connection)))
+
+        # rising[c] and high[c] are expressions for whether output c is
+        # RISING, or HIGH, when the D-types see it in the first sweep
+        rising = {}
+        high = {}
+        for device in engine.switch_devices:
+            i = position[device.device_id]
+            connection = (device.device_id, None)
+            new, old = name("v", connection), name("p", connection)
+            body.append("    %s = %s" % (old, key(*connection)))
+            body.append("    %s = D[%d].switch_state" % (new, i))
+            rising[connection] = "%s and not %s" % (new, old)
+            high[connection] = "%s and %s" % (new, old)
+        for device in engine.clock_devices:
+            i = position[device.device_id]
+            connection = (device.device_id, None)
+            new, old = name("v", connection), name("p", connection)
+            toggled = "t%d" % i
+            body.append("    %s = %s" % (old, key(*connection)))
+            body.append("    %s = D[%d].clock_counter == %d"
+                        % (toggled, i, device.clock_half_period))
+            body.append("    if %s:" % toggled)
+            body.append("        D[%d].clock_counter = 1" % i)
+            body.append("        %s = 1 - %s" % (new, old))
+            body.append("    else:")
+            body.append("        D[%d].clock_counter += 1" % i)
+            body.append("        %s = %s" % (new, old))
+            rising[connection] = "%s and not %s" % (toggled, old)
+            high[connection] = "not %s and %s" % (toggled, old)
+        for device in engine.rc_devices:
+            connection = (device.device_id, None)
+            body.append("    %s = 1 if t < %d else 0"
+                        % (name("v", connection), device.fall_time))
+
+        for device, clk, data, set_, clear in engine.d_type_devices:
+            i = position[device.device_id]
+            [clk, data, set_, clear] = [
+                device.inputs[input_id] for input_id in
+                [devices.CLK_ID, devices.DATA_ID, devices.SET_ID,
+                 devices.CLEAR_ID]]
+            body.append("    m = D[%d].dtype_memory" % i)
+            body.append("    if %s:" % rising[clk])
+            body.append("        m = %s" % name("p", data))
+            body.append("    if %s:" % high.get(set_, name("p", set_)))
+            body.append("        m = 1")
+            body.append("    if %s:" % high.get(clear, name("p", clear)))
+            body.append("        m = 0")
+            body.append("    if %s:" % name("v", set_))
+            body.append("        m = 1")
+            body.append("    if %s:" % name("v", clear))
+            body.append("        m = 0")
+            body.append("    D[%d].dtype_memory = m" % i)
+            body.append("    %s = m" % name("v", (device.device_id,
+                                                  devices.Q_ID)))
+            body.append("    %s = 1 - m" % name("v", (device.device_id,
+                                                      devices.QBAR_ID)))
+
+        operators = {devices.AND: (" & ", False), devices.OR: (" | ", False),
+                     devices.NAND: (" & ", True), devices.NOR: (" | ", True),
+                     devices.XOR: (" ^ ", False)}
+        for level in engine.levels:
+            for device_id in level:
+                device = devices.get_device(device_id)
+                (operator, inverted) = operators[device.device_kind]
+                expression = operator.join(name("v", connection) for
+                                           connection in
+                                           device.inputs.values())
+                if inverted:
+                    expression = "1 - (%s)" % expression
+                body.append("    %s = %s" % (
+                    name("v", (device_id, None)), expression))
+
+        for connection in output_number:
+            body.append("    %s = %s" % (key(*connection),
+                                         name("v", connection)))
+        if len(body) == 1:  # a network without devices does nothing
+            body.append("    pass")
+        return "\n".join(body) + "\n"
+
+    def execute_network(self):
+        """Execute all the devices in the network for one simulation cycle.
+
+        Return True if successful and the network does not oscillate.
+        """
+        if not self.levelized:
+            return self.network.sweep_network()
+        self.cycle(self.network.global_counter, self.device_objects,
+                   self.device_outputs)
+        self.network.global_counter += 1
+        self.network.steady_state = True
+        return True
@@ -46,7 +46,8 @@ class Devices:
     """Make and store devices.
 
     This class contains many functions for making devices and ports.
-    It stores all the devices in a list.
+    It stores all the devices in a list, indexed by device ID and by device
+    kind so that devices can be looked up in constant time.
 
     Parameters
     ----------
@@ -89,7 +90,11 @@ class Devices:
 
     make_d_type(self, device_id): Makes a D-type device.
 
-    cold_startup(self): Simulates cold start-up of D-types and clocks.
+    cold_start_device(self, device, rng=random): Simulates cold start-up of
+                                                 one device.
+
+    cold_startup(self, rng=random): Simulates cold start-up of D-types and
+                                    clocks.
 
     make_device(self, device_id, device_kind, device_property=None): Creates
                        the specified device and returns errors if unsuccessful.
@@ -100,6 +105,8 @@ class Devices:
         self.names = names
 
         self.devices_list = []
+        self.device_index = {}  # stores {device_id: Device}
+        self.kind_index = {}  # stores {device_kind: [device_id, ...]}
 
         gate_strings = ["AND", "OR", "NAND", "NOR", "XOR"]
         device_strings = ["CLOCK", "SWITCH", "DTYPE"]
@@ -129,10 +136,7 @@ class Devices:
 
     def get_device(self, device_id):
         """Return the Device object corresponding to device_id."""
-        for device in self.devices_list:
-            if device.device_id == device_id:
-                return device
-        return None
+        return self.device_index.get(device_id)
 
     def find_devices(self, device_kind=None):
         """Return a list of device IDs of the specified device_kind.
@@ -140,19 +144,17 @@ class Devices:
         Return a list of all device IDs in the network if no device_kind is
         specified.
         """
-        device_id_list = []
-        for device in self.devices_list:
-            if device_kind is None:
-                device_id_list.append(device.device_id)
-            elif device.device_kind == device_kind:
-                device_id_list.append(device.device_id)
-        return device_id_list
+        if device_kind is None:
+            return list(self.device_index)
+        return list(self.kind_index.get(device_kind, []))
 
     def add_device(self, device_id, device_kind):
         """Add the specified device to the network."""
         new_device = Device(device_id)
         new_device.device_kind = device_kind
         self.devices_list.append(new_device)
+        self.device_index[device_id] = new_device
+        self.kind_index.setdefault(device_kind, []).append(device_id)
 
     def add_input(self, device_id, input_id):
         """Add the specified input to the specified device.
@@ -240,7 +242,8 @@ class Devices:
         self.add_device(device_id, self.CLOCK)
         device = self.get_device(device_id)
         device.clock_half_period = clock_half_period
-        self.cold_startup()  # clock initialised to a random point in its cycle
+        # Clock initialised to a random point in its cycle
+        self.cold_start_device(device)
 
     def make_gate(self, device_id, device_kind, no_of_inputs):
         """Make logic gates with the specified number of inputs."""
@@ -259,7 +262,8 @@ class Devices:
             self.add_input(device_id, input_id)
         for output_id in self.dtype_output_ids:
             self.add_output(device_id, output_id)
-        self.cold_startup()  # D-type initialised to a random state
+        # D-type initialised to a random state
+        self.cold_start_device(self.get_device(device_id))
 
     def make_rc(self, device_id, fall_time):
         """Make a RC device."""
@@ -268,26 +272,35 @@ class Devices:
         device.fall_time = fall_time
         self.add_output(device_id, output_id=None, signal=self.HIGH)
 
-    def cold_startup(self):
+    def cold_start_device(self, device, rng=random):
+        """Simulate cold start-up of a single device.
+
+        Set the memory of a D-type to a random state, make a clock begin from
+        a random point in its cycle, and initialise an RC component to HIGH.
+        Other devices are left unchanged. rng is the random number generator,
+        such as a seeded random.Random() instance.
+        """
+        if device.device_kind == self.D_TYPE:
+            device.dtype_memory = rng.choice([self.LOW, self.HIGH])
+
+        elif device.device_kind == self.CLOCK:
+            clock_signal = rng.choice([self.LOW, self.HIGH])
+            device.outputs[None] = clock_signal
+            # Initialise it to a random point in its cycle.
+            device.clock_counter = rng.randrange(device.clock_half_period)
+        elif device.device_kind == self.RC:
+            device.outputs[None] = self.HIGH
+
+    def cold_startup(self, rng=random):
         """Simulate cold start-up of D-types, clocks and RC components.
 
         Set the memory of the D-types to a random state and make the clocks
         begin from a random point in their cycles.
-        The RC components are initialised to HIGH.
+        The RC components are initialised to HIGH. rng is the random number
+        generator, so a seeded random.Random() instance repeats a start-up.
         """
         for device in self.devices_list:
-            if device.device_kind == self.D_TYPE:
-                device.dtype_memory = random.choice([self.LOW, self.HIGH])
-
-            elif device.device_kind == self.CLOCK:
-                clock_signal = random.choice([self.LOW, self.HIGH])
-                self.add_output(device.device_id, output_id=None,
-                                signal=clock_signal)
-                # Initialise it to a random point in its cycle.
-                device.clock_counter = \
-                    random.randrange(device.clock_half_period)
-            elif device.device_kind == self.RC:
-                device.outputs[None] = self.HIGH
+            self.cold_start_device(device, rng)
 
     def make_device(self, device_id, device_kind, device_property=None):
         """Create the specified device.
@@ -0,0 +1,196 @@
+"""Execute the network by only re-evaluating devices whose inputs changed.
+
+Used in the Logic Simulator project as an alternative to sweeping every
+device until the signals settle. Most logic gates in a large network do not
+change in a given cycle, so only the devices driven by a changed output are
+executed again.
+
+Classes
+-------
+EventDrivenEngine - executes the network driven by signal changes.
+"""
+import heapq
+
+
+class EventDrivenEngine:
+    """Execute the network driven by signal changes.
+
+    Devices are executed with the same Network.execute_* functions and in
+    the same order as Network.sweep_network(), but a logic gate is only
+    executed when one of its inputs, or its own output, has changed since it
+    was last executed. Executing any other gate would leave it unchanged,
+    so the results, the number of sweeps and the RISING and FALLING
+    transitions are identical to sweep_network. Switches, D-types, clocks
+    and RC devices depend on state outside the network, so they are always
+    executed in the first sweep of each cycle. If their outputs were
+    changed between cycles, such as by a cold start-up, every gate is
+    executed.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+
+    Public methods
+    --------------
+    compile_network(self): Finds the order in which the devices are executed.
+
+    get_state_outputs(self): Returns the outputs of the devices executed
+                             every cycle.
+
+    execute_network(self): Executes the devices whose inputs changed for one
+                           simulation cycle.
+
+    reload_devices(self): Executes every gate in the next cycle, after the
+                          state of the devices is changed outside the engine.
+    """
+
+    def __init__(self, names, devices, network):
+        """Initialise the execution order."""
+        self.names = names
+        self.devices = devices
+        self.network = network
+
+        self.order = []  # stores (device_id, execute function) to execute
+        self.rank = {}  # stores {device_id: position in self.order}
+        self.state_ranks = []  # ranks of devices executed every cycle
+        self.gate_ranks = []
+        self.gates_settled = False  # False if all gates must be executed
+        self.state_devices = []  # devices executed every cycle
+        self.state_outputs = None  # their outputs after the last cycle
+
+        self.executed_count = 0  # number of device executions so far
+
+    def compile_network(self):
+        """Find the order in which the devices are executed.
+
+        The order is the one used by Network.sweep_network().
+        """
+        devices = self.devices
+        network = self.network
+        gate_inputs = {devices.AND: (devices.HIGH, devices.HIGH),
+                       devices.OR: (devices.LOW, devices.LOW),
+                       devices.NAND: (devices.HIGH, devices.LOW),
+                       devices.NOR: (devices.LOW, devices.HIGH),
+                       devices.XOR: (None, None)}
+
+        def gate_executor(device_kind):
+            (x, y) = gate_inputs[device_kind]
+            return lambda device_id: network.execute_gate(device_id, x, y)
+
+        executors = [(devices.SWITCH, network.execute_switch),
+                     (devices.D_TYPE, network.execute_d_type),
+                     (devices.CLOCK, network.execute_clock)]
+        executors.extend((gate_kind, gate_executor(gate_kind))
+                         for gate_kind in [devices.AND, devices.OR,
+                                           devices.NAND, devices.NOR,
+                                           devices.XOR])
+        executors.append((devices.RC, network.execute_rc))
+
+        self.order = []
+        self.rank = {}
+        self.state_ranks = []
+        self.gate_ranks = []
+        for device_kind, execute in executors:
+            for device_id in devices.find_devices(device_kind):
+                rank = len(self.order)
+                self.order.append((device_id, execute))
+                self.rank[device_id] = rank
+                if device_kind in devices.gate_types:
+                    self.gate_ranks.append(rank)
+                else:
+                    self.state_ranks.append(rank)
+        self.state_devices = [devices.get_device(self.order[rank][0])
+                              for rank in self.state_ranks]
+        self.gates_settled = False
+
+    def get_state_outputs(self):
+        """Return the outputs of the devices executed every cycle."""
+        return [tuple(device.outputs.values())
+                for device in self.state_devices]
+
+    def reload_devices(self):
+        """Execute every gate in the next cycle.
+
+        The outputs of the gates may have been changed outside the engine,
+        so they can no longer be assumed to be settled.
+        """
+        self.gates_settled = False
+
+    def execute_network(self):
+        """Execute the devices whose inputs changed for one simulation cycle.
+
+        Return True if successful and the network does not oscillate.
+        """
+        network = self.network
+        order = self.order
+        rank_of = self.rank
+        fan_out = network.fan_out
+
+        scheduled = set(self.state_ranks)
+        # Outputs changed outside the engine may drive any of the gates
+        if (not self.gates_settled or
+                self.get_state_outputs() != self.state_outputs):
+            scheduled.update(self.gate_ranks)
+
+        network.update_clocks()
+        # Gates are only left settled if this cycle completes successfully
+        self.gates_settled = False
+
+        # Number of sweeps to wait for the signals to settle before declaring
+        # the network unstable, as in sweep_network
+        iteration_limit = network.get_iteration_limit() - 1
+        network.oscillating_devices = []
+        # Sweep number after which each signal state was seen, by its hash,
+        # as in sweep_network
+        seen_states = {}
+        period = None  # number of sweeps after which the state repeats
+
+        iterations = 0
+        while iterations < iteration_limit:
+            iterations += 1
+            changed = False
+            next_scheduled = set()
+            heap = sorted(scheduled)  # a sorted list is a valid heap
+            while heap:
+                rank = heapq.heappop(heap)
+                (device_id, execute) = order[rank]
+                network.steady_state = True
+                if not execute(device_id):
+                    return False
+                self.executed_count += 1
+                if network.steady_state:  # outputs did not change
+                    continue
+                changed = True
+                next_scheduled.add(rank)  # it may still be RISING or FALLING
+                for target_id in fan_out.get(device_id, []):
+                    target_rank = rank_of[target_id]
+                    if target_rank <= rank:  # already executed this sweep
+                        next_scheduled.add(target_rank)
+                    elif target_rank not in scheduled:
+                        scheduled.add(target_rank)
+                        heapq.heappush(heap, target_rank)
+            if not changed:
+                break
+            scheduled = next_scheduled
+            if iterations <= network.GRACE_SWEEPS:
+                continue
+            state = hash(network.get_signal_state())
+            if state in seen_states:  # the signals go round a loop
+                period = iterations - seen_states[state]
+                break
+            seen_states[state] = iterations
+
+        network.steady_state = not changed
+        if changed:  # find the oscillating devices as sweep_network does
+            sweep_order = network.get_sweep_order()
+            if period is None:  # the last sweep allowed shows them
+                network.steady_state = True
+                period = 1
+            network.oscillating_devices = network.find_oscillating_devices(
+                sweep_order, period)
+        self.gates_settled = network.steady_state
+        self.state_outputs = self.get_state_outputs()
+        network.global_counter += 1
+        return network.steady_state
@@ -0,0 +1,397 @@
+"""Grade test vectors against stuck-at faults with bit-parallel simulation.
+
+Used in the Logic Simulator project to find which manufacturing faults a
+sequence of switch settings, called test vectors, detects at the monitored
+outputs. Each device output and input can be stuck at LOW or HIGH. Signals
+are packed into Python integers as in bitparallel, with bit 0 holding the
+fault-free network and every other bit a network with one fault, so each
+logic gate is evaluated for many faults with a single bitwise operation.
+
+Classes
+-------
+FaultSimulator - simulates the stuck-at faults of a network.
+"""
+import collections
+
+from levelize import LevelizedEngine
+
+
+class FaultSimulator:
+    """Simulate the stuck-at faults of a network.
+
+    A fault is given by (device_id, port_id, stuck_at), where port_id is an
+    output ID or an input ID of the device, and stuck_at is LOW or HIGH.
+    Faults that always give the same signals as another fault are collapsed
+    into one class, which is simulated once:
+
+    - an input of a logic gate stuck at its controlling value, such as LOW
+      for AND and NAND gates, fixes the output of the gate, and the input
+      of a gate with a single input fixes the output at either value.
+    - an output driving a single input, and not monitored, sends the
+      same signal as that input stuck at the same value.
+
+    The faults are simulated in groups, each with group_size bits, in the
+    levelized order of levelize.LevelizedEngine, so only networks that can
+    be fully levelized are fault simulated: there are no loops of logic
+    gates, every D-type CLK input is driven by a clock or switch, and every
+    SET and CLEAR input by a clock, switch or RC device. Every fault starts
+    from the current state of the devices, which is left unchanged.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class, whose monitored
+              signals detect the faults.
+
+    Public methods
+    --------------
+    get_faults(self): Returns every stuck-at fault of the network.
+
+    collapse_faults(self, faults): Returns the classes of equivalent faults.
+
+    get_fault_name(self, fault): Returns the name string of a fault.
+
+    run(self, vectors, faults=None, group_size=4096): Simulates the faults
+                                                      for the test vectors
+                                                      and returns True if
+                                                      successful.
+
+    get_undetected_faults(self): Returns the faults no monitor detected.
+    """
+
+    def __init__(self, names, devices, network, monitors):
+        """Initialise the simulator."""
+        self.names = names
+        self.devices = devices
+        self.network = network
+        self.monitors = monitors
+
+        # stores {representative fault: [fault, ...]} of the last run
+        self.fault_classes = collections.OrderedDict()
+        # stores {(device_id, output_id): [representative fault, ...]} of
+        # the faults each monitor detected in the last run
+        self.detected = collections.OrderedDict()
+
+    def get_faults(self):
+        """Return a list of every stuck-at fault of the network.
+
+        The faults of each device are its outputs, then its inputs, each
+        stuck at LOW then HIGH.
+        """
+        devices = self.devices
+        faults = []
+        for device in devices.devices_list:
+            for port_id in list(device.outputs) + list(device.inputs):
+                for stuck_at in [devices.LOW, devices.HIGH]:
+                    faults.append((device.device_id, port_id, stuck_at))
+        return faults
+
+    def collapse_faults(self, faults):
+        """Return the classes of equivalent faults among faults.
+
+        The classes are returned as {representative fault: [fault, ...]},
+        where the representative is the first fault of the class in faults.
+        """
+        devices = self.devices
+        parent = {fault: fault for fault in faults}
+
+        def find(fault):
+            while parent[fault] != fault:
+                parent[fault] = parent[parent[fault]]
+                fault = parent[fault]
+            return fault
+
+        def union(fault, other_fault):
+            if fault in parent and other_fault in parent:
+                parent[find(fault)] = find(other_fault)
+
+        # (controlling input, output it gives) of each gate kind
+        controls = {devices.AND: (devices.LOW, devices.LOW),
+                    devices.NAND: (devices.LOW, devices.HIGH),
+                    devices.OR: (devices.HIGH, devices.HIGH),
+                    devices.NOR: (devices.HIGH, devices.LOW)}
+        inverting = [devices.NAND, devices.NOR]
+        consumers = collections.defaultdict(list)
+        for device in devices.devices_list:
+            device_id = device.device_id
+            for input_id, source in device.inputs.items():
+                consumers[source].append((device_id, input_id))
+            if device.device_kind not in controls:
+                continue
+            (control, result) = controls[device.device_kind]
+            for input_id in device.inputs:
+                if len(device.inputs) == 1:
+                    for stuck_at in [devices.LOW, devices.HIGH]:
+                        output = stuck_at
+                        if device.device_kind in inverting:
+                            output = devices.HIGH - stuck_at
+                        union((device_id, input_id, stuck_at),
+                              (device_id, None, output))
+                else:
+                    union((device_id, input_id, control),
+                          (device_id, None, result))
+
+        for (device_id, output_id), inputs in consumers.items():
+            if len(inputs) == 1 and (device_id, output_id) not in \
+                    self.monitors.monitors_dictionary:
+                [(consumer_id, input_id)] = inputs
+                for stuck_at in [devices.LOW, devices.HIGH]:
+                    union((consumer_id, input_id, stuck_at),
+                          (device_id, output_id, stuck_at))
+
+        classes = collections.OrderedDict()
+        representatives = {}
+        for fault in faults:
+            root = find(fault)
+            if root not in representatives:
+                representatives[root] = fault
+                classes[fault] = []
+            classes[representatives[root]].append(fault)
+        return classes
+
+    def get_fault_name(self, fault):
+        """Return the name string of fault, such as "G1.I1 stuck-at-0"."""
+        (device_id, port_id, stuck_at) = fault
+        return "".join([self.devices.get_signal_name(device_id, port_id),
+                        " stuck-at-", str(stuck_at)])
+
+    def run(self, vectors, faults=None, group_size=4096):
+        """Simulate the faults for the test vectors.
+
+        vectors is a list of {switch_id: switch_state} dictionaries, one for
+        each simulation cycle. Switches missing from a vector keep their
+        state. faults is a list of faults, by default every fault of the
+        network, which are collapsed before they are simulated. Return True
+        if successful, or False if the network cannot be fully levelized.
+        """
+        if faults is None:
+            faults = self.get_faults()
+        self.fault_classes = self.collapse_faults(faults)
+        self.detected = collections.OrderedDict(
+            (key, []) for key in self.monitors.monitors_dictionary)
+
+        engine = LevelizedEngine(self.names, self.devices, self.network)
+        if not engine.compile_network() or not self.is_settled():
+            return False
+
+        representatives = list(self.fault_classes)
+        group_faults = group_size - 1  # bit 0 is the fault-free network
+        for start in range(0, len(representatives), group_faults):
+            group = representatives[start:start + group_faults]
+            detected = self.run_group(engine, vectors, group)
+            for key, bits in detected.items():
+                self.detected[key].extend(
+                    fault for bit, fault in enumerate(group, 1)
+                    if bits >> bit & 1)
+        return True
+
+    def get_undetected_faults(self):
+        """Return the representative faults no monitor detected last run."""
+        detected = set()
+        for faults in self.detected.values():
+            detected.update(faults)
+        return [fault for fault in self.fault_classes
+                if fault not in detected]
+
+    def is_settled(self):
+        """Return True if every output in the network is LOW or HIGH."""
+        for device in self.devices.devices_list:
+            for signal in device.outputs.values():
+                if signal not in [self.devices.LOW, self.devices.HIGH]:
+                    return False
+        return True
+
+    def run_group(self, engine, vectors, faults):
+        """Simulate a group of faults at once with packed signals.
+
+        Bit 0 of every signal is the fault-free network, and bit i the
+        network with faults[i - 1]. Return {(device_id, output_id): bits}
+        with the bits set for the faults each monitor detected.
+        """
+        devices = self.devices
+        get_device = devices.get_device
+        mask = (1 << (len(faults) + 1)) - 1
+        HIGH = devices.HIGH
+        RISING = devices.RISING
+        FALLING = devices.FALLING
+
+        # Every faulted port is given (bits kept, bits stuck HIGH)
+        stuck = {}
+        for bit, (device_id, port_id, stuck_at) in enumerate(faults, 1):
+            (keep, high) = stuck.get((device_id, port_id), (mask, 0))
+            keep &= ~(1 << bit)
+            if stuck_at == HIGH:
+                high |= 1 << bit
+            stuck[(device_id, port_id)] = (keep, high)
+
+        def pack(signal):
+            return mask if signal == HIGH else 0
+
+        # Every output is given an index into the list of packed values
+        index = {}
+        values = []
+        for device in devices.devices_list:
+            for output_id, signal in device.outputs.items():
+                key = (device.device_id, output_id)
+                (keep, high) = stuck.get(key, (mask, 0))
+                index[key] = len(values)
+                values.append(pack(signal) & keep | high)
+
+        def source(device, input_id):
+            """Return (output index, bits kept, bits stuck HIGH)."""
+            return ((index[device.inputs[input_id]],) +
+                    stuck.get((device.device_id, input_id), (mask, 0)))
+
+        # stores [output index, switch state, bits kept, bits stuck HIGH]
+        switches = collections.OrderedDict()
+        for device in engine.switch_devices:
+            key = (device.device_id, None)
+            switches[device.device_id] = [index[key], device.switch_state]
+            switches[device.device_id].extend(stuck.get(key, (mask, 0)))
+        clocks = []
+        for device in engine.clock_devices:
+            key = (device.device_id, None)
+            clocks.append([index[key], device.outputs[None],
+                           device.clock_counter, device.clock_half_period] +
+                          list(stuck.get(key, (mask, 0))))
+        rc_devices = [(index[(device.device_id, None)], device.fall_time) +
+                      stuck.get((device.device_id, None), (mask, 0))
+                      for device in engine.rc_devices]
+
+        # stores [memory, Q, QBAR, CLK, DATA, SET, CLEAR], with each output
+        # and input given as (index, bits kept, bits stuck HIGH)
+        d_types = []
+        for device, clk, data, set_, clear in engine.d_type_devices:
+            d_types.append([pack(device.dtype_memory)] + [
+                (index[(device.device_id, output_id)],) +
+                stuck.get((device.device_id, output_id), (mask, 0))
+                for output_id in [devices.Q_ID, devices.QBAR_ID]] + [
+                source(device, input_id) for input_id in
+                [devices.CLK_ID, devices.DATA_ID, devices.SET_ID,
+                 devices.CLEAR_ID]])
+
+        # stores (output index, inverted, operator, input indices, bits
+        # kept, bits stuck HIGH, faulted inputs), where each faulted input
+        # is copied into its own value by (index, source, kept, stuck HIGH)
+        gates = []
+        for level in engine.levels:
+            for device_id in level:
+                device = get_device(device_id)
+                inputs = []
+                faulted_inputs = []
+                for input_id in device.inputs:
+                    (input_index, keep, high) = source(device, input_id)
+                    if keep != mask:
+                        faulted_inputs.append((len(values), input_index,
+                                               keep, high))
+                        input_index = len(values)
+                        values.append(0)
+                    inputs.append(input_index)
+                kind = device.device_kind
+                inverted = kind in [devices.NAND, devices.NOR]
+                if kind in [devices.AND, devices.NAND]:
+                    operator = "and"
+                elif kind in [devices.OR, devices.NOR]:
+                    operator = "or"
+                else:
+                    operator = "xor"
+                gates.append((index[(device_id, None)], inverted, operator,
+                              inputs) + stuck.get((device_id, None),
+                                                  (mask, 0)) +
+                             (faulted_inputs,))
+
+        monitored = [(key, index[key]) for key in
+                     self.monitors.monitors_dictionary]
+        detected = {key: 0 for key, _ in monitored}
+
+        global_counter = self.network.global_counter
+        for vector in vectors:
+            for device_id, switch_state in vector.items():
+                switches[device_id][1] = switch_state
+
+            # Clocks whose half period is over start RISING or FALLING, as in
+            # Network.update_clocks
+            for clock in clocks:
+                if clock[2] == clock[3]:
+                    clock[2] = 0
+                    if clock[1] == HIGH:
+                        clock[1] = FALLING
+                    else:
+                        clock[1] = RISING
+                clock[2] += 1
+
+            # Signals seen by the D-types in the first sweep of the cycle, as
+            # in BitParallelSimulator.run_packed. Stuck outputs never rise.
+            rising = {}
+            high = {}
+            for output_index, state, keep, stuck_high in switches.values():
+                old = values[output_index]
+                states = pack(state) & keep | stuck_high
+                rising[output_index] = states & ~old & mask
+                high[output_index] = states & old
+            for output_index, signal, counter, half_period, keep, \
+                    stuck_high in clocks:
+                rising[output_index] = mask & keep if signal == RISING else 0
+                high[output_index] = (mask if signal == HIGH else 0) & \
+                    keep | stuck_high
+
+            for d_type in d_types:
+                [memory, Q, QBAR, clk, data, set_, clear] = d_type
+                clocked = rising.get(clk[0], 0) & clk[1]
+                data_value = values[data[0]] & data[1] | data[2]
+                memory = (clocked & data_value) | (~clocked & memory)
+                memory |= high.get(set_[0], values[set_[0]]) & set_[1] | \
+                    set_[2]
+                memory &= ~(high.get(clear[0], values[clear[0]]) &
+                            clear[1] | clear[2])
+                d_type[0] = memory & mask
+
+            # Settle the sources of the combinational network
+            for clock in clocks:
+                if clock[1] == RISING:
+                    clock[1] = HIGH
+                elif clock[1] == FALLING:
+                    clock[1] = devices.LOW
+                values[clock[0]] = pack(clock[1]) & clock[4] | clock[5]
+            for output_index, state, keep, stuck_high in switches.values():
+                values[output_index] = pack(state) & keep | stuck_high
+            for output_index, fall_time, keep, stuck_high in rc_devices:
+                if global_counter < fall_time:
+                    values[output_index] = keep | stuck_high
+                else:
+                    values[output_index] = stuck_high
+            for d_type in d_types:
+                [memory, Q, QBAR, clk, data, set_, clear] = d_type
+                memory |= values[set_[0]] & set_[1] | set_[2]
+                memory &= ~(values[clear[0]] & clear[1] | clear[2])
+                d_type[0] = memory
+                values[Q[0]] = memory & Q[1] | Q[2]
+                values[QBAR[0]] = ~memory & QBAR[1] | QBAR[2]
+
+            for output_index, inverted, operator, inputs, keep, stuck_high, \
+                    faulted_inputs in gates:
+                for input_index, source_index, input_keep, input_high in \
+                        faulted_inputs:
+                    values[input_index] = values[source_index] & \
+                        input_keep | input_high
+                result = values[inputs[0]]
+                if operator == "and":
+                    for input_index in inputs[1:]:
+                        result &= values[input_index]
+                elif operator == "or":
+                    for input_index in inputs[1:]:
+                        result |= values[input_index]
+                else:
+                    result ^= values[inputs[1]]
+                if inverted:
+                    result = ~result & mask
+                values[output_index] = result & keep | stuck_high
+
+            global_counter += 1
+            # A fault is detected where its bit differs from bit 0
+            for key, output_index in monitored:
+                value = values[output_index]
+                detected[key] |= value ^ (mask if value & 1 else 0)
+        return detected
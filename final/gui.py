@@ -18,6 +18,7 @@ from network import Network
 from monitors import Monitors
 from scanner import Scanner
 from parse import Parser
+from simulate import Checkpoints, run_network
 import argparse
 import subprocess
 import builtins
@@ -324,7 +325,11 @@ class Gui(wx.Frame):
     zap_command(self, signal): Remove the specified monitor.
 
     on_slider_change(self, event, index): Event handler for when the user
-                                            changes the slider value.
+                                            changes the slider value, which
+                                            re-simulates the run.
+
+    report_oscillation(self): Prints the devices that keep changing in an
+                              oscillating network.
     """
 
     QuitID = 999
@@ -360,6 +365,9 @@ class Gui(wx.Frame):
         self.monitors = monitors
         # number of simulation cycles completed
         self.cycles_completed = cycles_completed
+        # Network states kept to re-simulate the run when a switch is set
+        self.checkpoints = Checkpoints(network, monitors)
+        self.checkpoints.reset(cycles_completed)
 
         # Configure the file menu
         fileMenu = wx.Menu()
@@ -579,6 +587,7 @@ class Gui(wx.Frame):
             self.monitors.reset_monitors()
             print("".join(["Running for ", str(cycles), " cycles"]))
             self.devices.cold_startup()
+            self.checkpoints.reset()
             if self.run_simulation(cycles):
                 self.cycles_completed += cycles
 
@@ -595,12 +604,10 @@ class Gui(wx.Frame):
 
     def run_simulation(self, cycles):
         """Run the simulation for a specific number of cycles."""
-        for _ in range(cycles):
-            if self.network.execute_network():
-                self.monitors.record_signals()
-            else:
-                print("Error! Network oscillating.")
-                return False
+        if not run_network(self.network, self.monitors, cycles,
+                           checkpoints=self.checkpoints):
+            self.report_oscillation()
+            return False
         self.canvas.display_signals_gui()
         print("Completed simulation.")
         return True
@@ -663,6 +670,20 @@ class Gui(wx.Frame):
         slider = event.GetEventObject()
         value = slider.GetValue()
         self.devices.set_switch(index, value)
+        first_cycle = self.checkpoints.get_first_cycle()
+        if first_cycle < self.cycles_completed:
+            # Re-simulate the run as if the switch was set from the start
+            if self.checkpoints.set_switch(index, value, first_cycle):
+                self.canvas.display_signals_gui()
+            else:
+                self.report_oscillation()
+
+    def report_oscillation(self):
+        """Print the devices that keep changing in an oscillating network."""
+        print("Error! Network oscillating.")
+        print("Oscillating devices:", ", ".join(
+            self.names.get_name_string(device_id)
+            for device_id in self.network.oscillating_devices))
 
     def on_close_window(self, event):
         """Handle the event when the user closes the window."""
@@ -20,6 +20,7 @@ from network import Network
 from monitors import Monitors
 from scanner import Scanner
 from parse import Parser
+from simulate import Checkpoints, run_network
 import argparse
 
 
@@ -390,6 +391,9 @@ class Gui(wx.Frame):
         self.network = network
         self.monitors = monitors
         self.cycles_completed = cycles_completed
+        # Network states kept to re-simulate the run when a switch is set
+        self.checkpoints = Checkpoints(network, monitors)
+        self.checkpoints.reset(cycles_completed)
 
         # Configure the file menu
         fileMenu = wx.Menu()
@@ -612,6 +616,7 @@ class Gui(wx.Frame):
             self.monitors.reset_monitors()
             print("".join(["Running for ", str(cycles), " cycles"]))
             self.devices.cold_startup()
+            self.checkpoints.reset()
             if self.run_simulation(cycles):
                 self.cycles_completed += cycles
 
@@ -628,12 +633,10 @@ class Gui(wx.Frame):
 
     def run_simulation(self, cycles):
         """Run the simulation for a specific number of cycles."""
-        for _ in range(cycles):
-            if self.network.execute_network():
-                self.monitors.record_signals()
-            else:
-                print("Error! Network oscillating.")
-                return False
+        if not run_network(self.network, self.monitors, cycles,
+                           checkpoints=self.checkpoints):
+            self.report_oscillation()
+            return False
         self.canvas.render()
         print("Completed simulation.")
         return True
@@ -696,6 +699,20 @@ class Gui(wx.Frame):
         slider = event.GetEventObject()
         value = slider.GetValue()
         self.devices.set_switch(index, value)
+        first_cycle = self.checkpoints.get_first_cycle()
+        if first_cycle < self.cycles_completed:
+            # Re-simulate the run as if the switch was set from the start
+            if self.checkpoints.set_switch(index, value, first_cycle):
+                self.canvas.render()
+            else:
+                self.report_oscillation()
+
+    def report_oscillation(self):
+        """Print the devices that keep changing in an oscillating network."""
+        print("Error! Network oscillating.")
+        print("Oscillating devices:", ", ".join(
+            self.names.get_name_string(device_id)
+            for device_id in self.network.oscillating_devices))
 
     def on_close_window(self, event):
         """Handle the event when the user closes the window."""
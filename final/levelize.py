@@ -0,0 +1,380 @@
+"""Compile the network into a levelized evaluation order.
+
+Used in the Logic Simulator project as an alternative to sweeping every
+device until the signals settle. The logic gates are sorted topologically
+once, so that each gate is evaluated exactly once per simulation cycle, and
+only the parts of the network that cannot be sorted are swept.
+
+Classes
+-------
+LevelizedEngine - executes the network in levelized order.
+"""
+
+
+class LevelizedEngine:
+    """Execute the network in levelized order.
+
+    The outputs of switches, clocks, D-types and RC devices are the sources
+    of the combinational part of the network, which breaks any loop passing
+    through a D-type. The logic gates are sorted into levels so that every
+    gate is evaluated after all the gates driving its inputs.
+
+    Loops made only of logic gates, and D-types whose CLK input is not
+    driven by a clock or switch, or whose SET or CLEAR input is not driven
+    by a clock, switch or RC device, cannot be levelized. Their signals
+    depend on the order in which Network.sweep_network() visits the
+    devices, so only sweeping reproduces them. These devices, and every
+    device that can affect them, are relaxed: they are swept first in each
+    cycle, in the order of sweep_network, until they settle. The rest of
+    the network is then levelized as usual.
+
+    The results are identical to Network.sweep_network(). If the relaxed
+    devices do not settle, the cycle is swept again from its start with
+    sweep_network, which reports the oscillating devices. The engine falls
+    back to sweep_network if the network has unconnected inputs.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+
+    Public methods
+    --------------
+    compile_network(self): Sorts the logic gates into levels and finds the
+                           devices that cannot be levelized.
+
+    execute_network(self): Executes all the devices in the network for one
+                           simulation cycle.
+
+    reload_devices(self): Reloads the state of the devices after it is
+                          changed outside the engine.
+    """
+
+    def __init__(self, names, devices, network):
+        """Initialise the compiled network."""
+        self.names = names
+        self.devices = devices
+        self.network = network
+
+        self.levelized = False  # True if no devices are relaxed
+        self.levels = []  # lists of gate IDs, sorted by level
+        # IDs of the devices that are swept, or None if falling back to
+        # sweep_network for every device
+        self.relaxed_devices = None
+        self.relaxed_order = None  # sweep order of the relaxed devices
+        self.saved_devices = set()  # devices restored to sweep a cycle again
+        self.settle_sweeps = 0
+
+        self.switch_devices = []
+        self.clock_devices = []
+        self.rc_devices = []
+        # stores (device, clk, data, set, clear) where each input is given
+        # by (connected output dictionary, connected output ID)
+        self.d_type_devices = []
+        # stores (device, x, y, inputs) sorted by level, see execute_gate
+        self.gates = []
+
+    def compile_network(self):
+        """Sort the logic gates into levels and find the devices to relax.
+
+        Gates in loops, and D-types whose CLK input is not driven by a clock
+        or switch, or whose SET or CLEAR input is not driven by a clock,
+        switch or RC device, are relaxed, along with every device that can
+        affect them. The rest of the network is levelized.
+
+        Return True if the whole network is levelized, and False if any of
+        it is relaxed or it falls back to sweep_network.
+        """
+        self.levelized = False
+        self.levels = []
+        self.gates = []
+        self.relaxed_devices = None
+        self.relaxed_order = None
+        if not self.network.check_network():
+            return False
+
+        devices = self.devices
+        get_device = devices.get_device
+        d_type_ids = devices.find_devices(devices.D_TYPE)
+        relaxed = set(self.find_loop_gates())
+        for device_id in d_type_ids:
+            device = get_device(device_id)
+            for input_id in [devices.CLK_ID, devices.SET_ID,
+                             devices.CLEAR_ID]:
+                source_id = device.inputs[input_id][0]
+                source_kind = get_device(source_id).device_kind
+                if source_kind not in [devices.CLOCK, devices.SWITCH,
+                                       devices.RC] or (
+                        input_id == devices.CLK_ID and
+                        source_kind == devices.RC):
+                    relaxed.add(device_id)
+        relaxed = self.network.get_fan_in_cone(relaxed)
+
+        # D-types driven by a relaxed clock or switch would see it settle
+        # before their first sweep, so they are relaxed too
+        while True:
+            added = [device_id for device_id in d_type_ids
+                     if device_id not in relaxed and any(
+                         get_device(device_id).inputs[input_id][0] in relaxed
+                         for input_id in [devices.CLK_ID, devices.SET_ID,
+                                          devices.CLEAR_ID])]
+            if not added:
+                break
+            relaxed.update(self.network.get_fan_in_cone(added))
+
+        def levelized_devices(device_kind):
+            return [get_device(device_id) for device_id
+                    in devices.find_devices(device_kind)
+                    if device_id not in relaxed]
+
+        self.switch_devices = levelized_devices(devices.SWITCH)
+        self.clock_devices = levelized_devices(devices.CLOCK)
+        self.rc_devices = levelized_devices(devices.RC)
+        self.d_type_devices = [
+            (device, self.get_source(device, devices.CLK_ID),
+             self.get_source(device, devices.DATA_ID),
+             self.get_source(device, devices.SET_ID),
+             self.get_source(device, devices.CLEAR_ID))
+            for device in levelized_devices(devices.D_TYPE)]
+
+        gate_ids = []
+        for gate_kind in devices.gate_types:
+            gate_ids.extend(device_id for device_id
+                            in devices.find_devices(gate_kind)
+                            if device_id not in relaxed)
+        levels = self.sort_gates(gate_ids)
+
+        gate_rules = {devices.AND: (devices.HIGH, devices.HIGH),
+                      devices.OR: (devices.LOW, devices.LOW),
+                      devices.NAND: (devices.HIGH, devices.LOW),
+                      devices.NOR: (devices.LOW, devices.HIGH),
+                      devices.XOR: (None, None)}
+        for level in levels:
+            for device_id in level:
+                device = get_device(device_id)
+                (x, y) = gate_rules[device.device_kind]
+                inputs = [self.get_source(device, input_id)
+                          for input_id in device.inputs]
+                self.gates.append((device, x, y, inputs))
+        self.levels = levels
+
+        self.relaxed_devices = relaxed
+        if relaxed:
+            self.relaxed_order = self.network.get_sweep_order(relaxed)
+            # Clocks are saved too, as update_clocks changes all of them
+            self.saved_devices = relaxed.union(
+                devices.find_devices(devices.CLOCK))
+            # Sweeps the levelized devices may take to settle after the
+            # relaxed devices have, when they are swept together
+            self.settle_sweeps = 2 * len(levels) + 6
+        self.levelized = not relaxed
+        return self.levelized
+
+    def reload_devices(self):
+        """Reload the state of the devices after it is changed outside.
+
+        The engine reads the devices directly, so there is nothing to do.
+        """
+
+    def get_source(self, device, input_id):
+        """Return the output dictionary and output ID connected to input_id."""
+        (source_id, output_id) = device.inputs[input_id]
+        return (self.devices.get_device(source_id).outputs, output_id)
+
+    def find_loop_gates(self):
+        """Return the IDs of the logic gates in or between gate loops.
+
+        These are the gates that can neither be sorted from the inputs of
+        the network nor from its outputs.
+        """
+        devices = self.devices
+        gate_ids = []
+        for gate_kind in devices.gate_types:
+            gate_ids.extend(devices.find_devices(gate_kind))
+        levels = self.sort_gates(gate_ids, partial=True)
+        unsorted = set(gate_ids).difference(*levels)
+
+        # Gates that only drive sorted gates are not between loops
+        fan_out_count = dict.fromkeys(unsorted, 0)
+        for gate_id in unsorted:
+            for (source_id, output_id) in devices.get_device(
+                    gate_id).inputs.values():
+                if source_id in fan_out_count:
+                    fan_out_count[source_id] += 1
+        stack = [gate_id for gate_id in unsorted
+                 if fan_out_count[gate_id] == 0]
+        while stack:
+            gate_id = stack.pop()
+            unsorted.discard(gate_id)
+            for (source_id, output_id) in devices.get_device(
+                    gate_id).inputs.values():
+                if source_id in unsorted:
+                    fan_out_count[source_id] -= 1
+                    if fan_out_count[source_id] == 0:
+                        stack.append(source_id)
+        return [gate_id for gate_id in gate_ids if gate_id in unsorted]
+
+    def sort_gates(self, gate_ids=None, partial=False):
+        """Return the logic gate IDs sorted into levels.
+
+        gate_ids are the gates to sort, by default every logic gate. Level 0
+        gates are only driven by other devices. Return None if the gates
+        form a loop, or the levels of the gates that could be sorted if
+        partial is True.
+        """
+        devices = self.devices
+        if gate_ids is None:
+            gate_ids = []
+            for gate_kind in devices.gate_types:
+                gate_ids.extend(devices.find_devices(gate_kind))
+
+        # number of inputs of each gate that are driven by other gates
+        gate_fan_in = dict.fromkeys(gate_ids, 0)
+        fan_out = {gate_id: [] for gate_id in gate_ids}
+        for gate_id in gate_ids:
+            device = devices.get_device(gate_id)
+            for (source_id, output_id) in device.inputs.values():
+                if source_id in gate_fan_in:
+                    gate_fan_in[gate_id] += 1
+                    fan_out[source_id].append(gate_id)
+
+        levels = []
+        level = [gate_id for gate_id in gate_ids if gate_fan_in[gate_id] == 0]
+        sorted_count = 0
+        while level:
+            levels.append(level)
+            sorted_count += len(level)
+            next_level = []
+            for gate_id in level:
+                for target_id in fan_out[gate_id]:
+                    gate_fan_in[target_id] -= 1
+                    if gate_fan_in[target_id] == 0:
+                        next_level.append(target_id)
+            level = next_level
+
+        if sorted_count != len(gate_ids) and not partial:  # gates in a loop
+            return None
+        return levels
+
+    def relax(self):
+        """Sweep the relaxed devices until they settle.
+
+        Return True if they settle early enough for the whole network to
+        settle within the iteration limit of sweep_network.
+        """
+        network = self.network
+        for _ in range(network.get_iteration_limit() - 1 -
+                       self.settle_sweeps):
+            network.steady_state = True
+            if not network.sweep_devices(self.relaxed_order):
+                return False
+            if network.steady_state:
+                return True
+        return False
+
+    def execute_network(self):
+        """Execute all the devices in the network for one simulation cycle.
+
+        Return True if successful and the network does not oscillate.
+        """
+        if self.relaxed_devices is None:
+            return self.network.sweep_network()
+
+        network = self.network
+        LOW = self.devices.LOW
+        HIGH = self.devices.HIGH
+        RISING = self.devices.RISING
+        FALLING = self.devices.FALLING
+
+        if self.relaxed_order is not None:
+            saved_state = network.save_state(self.saved_devices)
+        network.update_clocks()
+        # D-types see their DATA input as it was before the cycle
+        data_signals = [data[0][data[1]]
+                        for device, clk, data, set_, clear
+                        in self.d_type_devices]
+
+        # The relaxed devices do not depend on the levelized ones, so they
+        # are swept first. If they do not settle, the whole cycle is swept
+        # again to report the oscillating devices as sweep_network does.
+        if self.relaxed_order is not None and not self.relax():
+            network.restore_state(saved_state)
+            return network.sweep_network()
+
+        # Switches take their first step towards their state before the
+        # D-types see them, exactly as in the first sweep of sweep_network.
+        for device in self.switch_devices:
+            outputs = device.outputs
+            signal = outputs[None]
+            if device.switch_state == LOW:
+                if signal in [HIGH, RISING]:
+                    outputs[None] = FALLING
+                else:
+                    outputs[None] = LOW
+            elif signal in [LOW, FALLING]:
+                outputs[None] = RISING
+            else:
+                outputs[None] = HIGH
+
+        # D-types see the clocks, switches and their other inputs as they
+        # were before any other device is executed in this cycle
+        for (device, clk, data, set_, clear), data_signal in zip(
+                self.d_type_devices, data_signals):
+            memory = device.dtype_memory
+            if clk[0][clk[1]] == RISING:
+                if data_signal in [HIGH, FALLING]:
+                    memory = HIGH
+                elif data_signal in [LOW, RISING]:
+                    memory = LOW
+            if set_[0][set_[1]] == HIGH:
+                memory = HIGH
+            if clear[0][clear[1]] == HIGH:
+                memory = LOW
+            device.dtype_memory = memory
+
+        # Settle all the sources of the combinational network
+        for device in self.clock_devices:
+            outputs = device.outputs
+            if outputs[None] == RISING:
+                outputs[None] = HIGH
+            elif outputs[None] == FALLING:
+                outputs[None] = LOW
+        for device in self.switch_devices:
+            device.outputs[None] = device.switch_state
+        for device in self.rc_devices:
+            if network.global_counter < device.fall_time:
+                device.outputs[None] = HIGH
+            else:
+                device.outputs[None] = LOW
+
+        Q_ID = self.devices.Q_ID
+        QBAR_ID = self.devices.QBAR_ID
+        for device, clk, data, set_, clear in self.d_type_devices:
+            if set_[0][set_[1]] == HIGH:
+                device.dtype_memory = HIGH
+            if clear[0][clear[1]] == HIGH:
+                device.dtype_memory = LOW
+            device.outputs[Q_ID] = device.dtype_memory
+            device.outputs[QBAR_ID] = HIGH - device.dtype_memory
+
+        # Every input of a gate has settled by the time it is evaluated
+        for device, x, y, inputs in self.gates:
+            if x is None:  # XOR
+                [first, second] = inputs
+                if first[0][first[1]] == second[0][second[1]]:
+                    device.outputs[None] = LOW
+                else:
+                    device.outputs[None] = HIGH
+            else:
+                output_signal = y
+                for outputs, output_id in inputs:
+                    if outputs[output_id] != x:
+                        output_signal = HIGH - y
+                        break
+                device.outputs[None] = output_signal
+
+        network.global_counter += 1
+        network.steady_state = True
+        network.oscillating_devices = []
+        return True
@@ -2,19 +2,36 @@
 """Parse command line options and arguments for the Logic Simulator.
 
 This script parses options and arguments specified on the command line, and
-runs either the command line user interface or the graphical user interface.
+runs either the command line user interface, the graphical user interface,
+or a batch simulation. wx and NumPy are only imported when they are needed,
+so the command line and batch modes start quickly and run without wxPython.
 
 Usage
 -----
 Show help: logsim.py -h
 Command line user interface: logsim.py -c <file path>
 Graphical user interface: logsim.py <file path>
+Choose the simulation engine: logsim.py -e <engine> [-c] <file path>
+Write monitored signals to a VCD file: logsim.py -v <VCD file> [-c] <file path>
+Batch simulation: logsim.py -n <cycles> [-s <switch>=<state>]... <file path>
+Run a file of user interface commands: logsim.py -f <command file> <file path>
+Reuse the cached network of an unchanged file: logsim.py -p [-c] <file path>
+Extrapolate periodic networks in long runs: logsim.py -x [-c] <file path>
+Continue from a snapshot: logsim.py -l <snapshot> [-c] <file path>
+Save a batch run to a snapshot: logsim.py -n <cycles> -w <snapshot> <file path>
+Table of every setting of switches: logsim.py [-n <cycles>] [-j <processes>]
+                                    -t <switch>,<switch>... <file path>
+Seed the random cold start-up: logsim.py -r <seed> [-c] <file path>
+Probability of HIGH over cold start-ups: logsim.py -n <cycles> -m <samples>
+                                         [-r <seed>] [-j <processes>]
+                                         <file path>
+Faults detected by test vectors: logsim.py -g <vector file> <file path>
 """
 import getopt
+import importlib
+import random
 import sys
 
-import wx
-
 from names import Names
 from devices import Devices
 from network import Network
@@ -22,11 +39,143 @@ from monitors import Monitors
 from scanner import Scanner
 from parse import Parser
 from userint import UserInterface
-from gui import Gui
+from vcd import VcdWriter
 import builtins
 import os
 
 
+def set_engine(network, engine_class, path):
+    """Compile the network with the chosen simulation engine.
+
+    Do nothing if engine_class is None, which sweeps all the devices.
+    """
+    if engine_class is None:
+        return
+    from codegen import CodeGenEngine  # imported here as hashlib is slow
+    if engine_class is CodeGenEngine:  # generated code is cached by file
+        engine = engine_class(network.names, network.devices, network, path)
+    else:
+        engine = engine_class(network.names, network.devices, network)
+    network.set_engine(engine)
+
+
+def set_switches(names, devices, switch_settings):
+    """Set the switches given as "<switch>=<state>" strings.
+
+    Return True if successful.
+    """
+    for setting in switch_settings:
+        switch_name, _, state = setting.partition("=")
+        switch_id = names.query(switch_name)
+        if state not in ["0", "1"] or switch_id is None:
+            print("Error: invalid switch setting", setting)
+            return False
+        if not devices.set_switch(switch_id, int(state)):
+            print("Error:", switch_name, "is not a switch")
+            return False
+    return True
+
+
+def print_switch_table(names, devices, network, monitors, switch_names,
+                       cycles, processes):
+    """Print the monitored traces for every setting of the switches.
+
+    Return True if successful.
+    """
+    from switchsweep import format_table, sweep_switches
+    switch_ids = []
+    for switch_name in switch_names:
+        switch_id = names.query(switch_name)
+        device = devices.get_device(switch_id)
+        if device is None or device.device_kind != devices.SWITCH:
+            print("Error:", switch_name, "is not a switch")
+            return False
+        switch_ids.append(switch_id)
+    rows = sweep_switches(network, monitors, switch_ids, cycles, processes)
+    if rows is None:
+        print("Error: the network oscillates")
+        return False
+    print("\n".join(format_table(devices, monitors, switch_ids, rows)))
+    return True
+
+
+def print_monte_carlo(network, monitors, cycles, samples, seed, processes):
+    """Print the probability of each monitored signal being HIGH per cycle.
+
+    Return True if successful.
+    """
+    from montecarlo import format_statistics, run_monte_carlo
+    completed, statistics = run_monte_carlo(network, monitors, cycles,
+                                            samples, seed, processes)
+    if not completed:
+        print("Error: the network oscillates")
+        return False
+    if completed < samples:
+        print("Warning: the network oscillates in",
+              samples - completed, "of", samples, "samples")
+    print("\n".join(format_statistics(network.devices, statistics)))
+    return True
+
+
+def read_vectors(names, devices, vector_path):
+    """Return the test vectors in a file, or None if they are invalid.
+
+    Each line of the file is a vector of "<switch>=<state>" settings,
+    applied for one simulation cycle.
+    """
+    vectors = []
+    try:
+        with open(vector_path) as vector_file:
+            lines = vector_file.read().splitlines()
+    except OSError:
+        print("Error: could not read", vector_path)
+        return None
+    for line in lines:
+        vector = {}
+        for setting in line.split():
+            switch_name, _, state = setting.partition("=")
+            switch_id = names.query(switch_name)
+            device = devices.get_device(switch_id)
+            if state not in ["0", "1"] or device is None or \
+                    device.device_kind != devices.SWITCH:
+                print("Error: invalid switch setting", setting)
+                return None
+            vector[switch_id] = int(state)
+        vectors.append(vector)
+    return vectors
+
+
+def print_faults(names, devices, network, monitors, vectors):
+    """Print the stuck-at faults each monitor detects for the vectors.
+
+    Return True if successful.
+    """
+    from faultsim import FaultSimulator
+    simulator = FaultSimulator(names, devices, network, monitors)
+    if not simulator.run(vectors):
+        print("Error: only networks without loops of logic gates, whose "
+              "D-type CLK inputs are driven by clocks or switches and SET "
+              "and CLEAR inputs by clocks, switches or RC devices, can be "
+              "fault simulated")
+        return False
+    fault_count = sum(len(faults) for faults
+                      in simulator.fault_classes.values())
+    undetected = simulator.get_undetected_faults()
+    for (device_id, output_id), faults in simulator.detected.items():
+        print(devices.get_signal_name(device_id, output_id), "detects",
+              len(faults), "faults:")
+        for fault in faults:
+            print("   ", simulator.get_fault_name(fault))
+    print("Undetected faults:")
+    for fault in undetected:
+        print("   ", simulator.get_fault_name(fault))
+    detected_count = fault_count - sum(len(simulator.fault_classes[fault])
+                                       for fault in undetected)
+    print("Detected", detected_count, "of", fault_count, "faults (" +
+          str(len(simulator.fault_classes)), "after collapsing)")
+    return True
+
+
 def main(arg_list):
     """Parse the command line options and arguments specified in arg_list.
 
@@ -36,19 +185,135 @@ def main(arg_list):
     usage_message = ("Usage:\n"
                      "Show help: logsim.py -h\n"
                      "Command line user interface: logsim.py -c <file path>\n"
-                     "Graphical user interface: logsim.py <file path>")
+                     "Graphical user interface: logsim.py <file path>\n"
+                     "Choose the simulation engine: "
+                     "logsim.py -e <engine> [-c] <file path>\n"
+                     "Engines: sweep (default), levelized, events, arrays, "
+                     "codegen\n"
+                     "Write monitored signals to a VCD file: "
+                     "logsim.py -v <VCD file> [-c] <file path>\n"
+                     "Batch simulation: logsim.py -n <cycles> "
+                     "[-s <switch>=<state>]... <file path>\n"
+                     "Run a file of user interface commands: "
+                     "logsim.py -f <command file> <file path>\n"
+                     "Reuse the cached network of an unchanged file: "
+                     "logsim.py -p [-c] <file path>\n"
+                     "Extrapolate periodic networks in long runs: "
+                     "logsim.py -x [-c] <file path>\n"
+                     "Continue from a snapshot: "
+                     "logsim.py -l <snapshot> [-c] <file path>\n"
+                     "Save a batch run to a snapshot: "
+                     "logsim.py -n <cycles> -w <snapshot> <file path>\n"
+                     "Table of every setting of switches: "
+                     "logsim.py [-n <cycles>] [-j <processes>]\n"
+                     "                                    "
+                     "-t <switch>,<switch>... <file path>\n"
+                     "Seed the random cold start-up: "
+                     "logsim.py -r <seed> [-c] <file path>\n"
+                     "Probability of HIGH over cold start-ups: "
+                     "logsim.py -n <cycles> -m <samples>\n"
+                     "                                         "
+                     "[-r <seed>] [-j <processes>] <file path>\n"
+                     "Faults detected by test vectors: "
+                     "logsim.py -g <vector file> <file path>")
+    # Simulation engines as (module, class), imported only when chosen.
+    # None sweeps all the devices until they settle.
+    engines = {"sweep": None, "levelized": ("levelize", "LevelizedEngine"),
+               "events": ("events", "EventDrivenEngine"),
+               "arrays": ("arraynet", "ArrayEngine"),
+               "codegen": ("codegen", "CodeGenEngine")}
     try:
-        options, arguments = getopt.getopt(arg_list, "hc:")
+        options, arguments = getopt.getopt(arg_list,
+                                           "hc:e:v:n:s:f:pxl:w:t:j:r:m:g:")
     except getopt.GetoptError:
         print("Error: invalid command line arguments\n")
         print(usage_message)
         sys.exit()
 
+    engine_class = None
+    vcd_path = None
+    batch_cycles = None
+    command_path = None
+    cache = None
+    extrapolate = False
+    load_path = None  # snapshot to continue
+    save_path = None  # snapshot to save after a batch run
+    table_switches = None  # switches to tabulate every setting of
+    processes = None  # worker processes, one per CPU if None
+    seed = None  # seed of the cold start-ups, random if None
+    samples = None  # cold start-ups to sample
+    vector_path = None  # test vectors to fault simulate
+    switch_settings = []
+    for option, value in options:
+        if option == "-e":
+            if value not in engines:
+                print("Error: unknown engine", value, "\n")
+                print(usage_message)
+                sys.exit()
+            if engines[value] is not None:
+                (module_name, class_name) = engines[value]
+                try:
+                    engine_class = getattr(
+                        importlib.import_module(module_name), class_name)
+                except ImportError:  # NumPy is only needed for arrays
+                    print("Error: the", value, "engine needs NumPy\n")
+                    sys.exit()
+        elif option == "-v":
+            vcd_path = value
+        elif option == "-n":
+            if not value.isdigit():
+                print("Error: the number of cycles must be a number\n")
+                print(usage_message)
+                sys.exit()
+            batch_cycles = int(value)
+        elif option == "-s":
+            switch_settings.append(value)
+        elif option == "-f":
+            command_path = value
+        elif option == "-p":
+            from netcache import NetlistCache  # hashlib is slow to import
+            cache = NetlistCache()
+        elif option == "-x":
+            extrapolate = True
+        elif option == "-l":
+            load_path = value
+        elif option == "-w":
+            save_path = value
+        elif option == "-t":
+            table_switches = value.split(",")
+        elif option == "-j":
+            if not value.isdigit() or int(value) == 0:
+                print("Error: the number of processes must be a number\n")
+                print(usage_message)
+                sys.exit()
+            processes = int(value)
+        elif option == "-g":
+            vector_path = value
+        elif option == "-r":
+            if not value.isdigit():
+                print("Error: the seed must be a number\n")
+                print(usage_message)
+                sys.exit()
+            seed = int(value)
+        elif option == "-m":
+            if not value.isdigit() or int(value) == 0:
+                print("Error: the number of samples must be a number of at "
+                      "least 1\n")
+                print(usage_message)
+                sys.exit()
+            samples = int(value)
+    options = [(option, value) for option, value in options
+               if option not in ["-e", "-v", "-n", "-s", "-f", "-p",
+                                 "-x", "-l", "-w", "-t", "-j", "-r", "-m",
+                                 "-g"]]
+
     # Initialise instances of the four inner simulator classes
     names = Names()
     devices = Devices(names)
     network = Network(names, devices)
     monitors = Monitors(names, devices, network)
+    # Random number generator of the cold start-ups
+    rng = random if seed is None else random.Random(seed)
 
     for option, path in options:
         if option == "-h":  # print the usage message
@@ -56,13 +321,21 @@ def main(arg_list):
             sys.exit()
         elif option == "-c":  # use the command line user interface
             scanner = Scanner(path, names)
-            parser = Parser(names, devices, network, monitors, scanner)
+            parser = Parser(names, devices, network, monitors, scanner,
+                            cache)
             if parser.parse_network():
+                set_engine(network, engine_class, path)
+                if vcd_path is not None:
+                    monitors.set_vcd_writer(VcdWriter(names, devices,
+                                                      monitors, vcd_path))
                 # Initialise an instance of the userint.UserInterface() class
                 userint = UserInterface(names, devices, network, monitors)
-                userint.command_interface()
+                userint.extrapolate = extrapolate
+                userint.rng = rng
+                if load_path is None or userint.load_run(load_path):
+                    userint.command_interface()
 
-    if not options:  # no option given, use the graphical user interface
+    if not options:  # no option given, run a batch simulation or the GUI
 
         if len(arguments) != 1:  # wrong number of arguments
             print("Error: one file path required\n")
@@ -71,8 +344,78 @@ def main(arg_list):
 
         [path] = arguments
         scanner = Scanner(path, names)
-        parser = Parser(names, devices, network, monitors, scanner)
-        if parser.parse_network():
+        parser = Parser(names, devices, network, monitors, scanner, cache)
+        if not parser.parse_network():
+            sys.exit()
+        set_engine(network, engine_class, path)
+        if vcd_path is not None:
+            monitors.set_vcd_writer(VcdWriter(names, devices, monitors,
+                                              vcd_path))
+
+        if vector_path is not None:
+            # Fault simulate the test vectors from a cold start
+            devices.cold_startup(rng)
+            if set_switches(names, devices, switch_settings):
+                vectors = read_vectors(names, devices, vector_path)
+                if vectors is not None:
+                    print_faults(names, devices, network, monitors, vectors)
+        elif samples is not None:
+            # Simulate samples cold start-ups, each with its own seed
+            if set_switches(names, devices, switch_settings):
+                print_monte_carlo(network, monitors, batch_cycles or 1,
+                                  samples, seed or 0, processes)
+        elif table_switches is not None:
+            # Simulate every setting of the switches from a cold start, or
+            # from a snapshot
+            if load_path is None:
+                devices.cold_startup(rng)
+            elif not UserInterface(names, devices, network,
+                                   monitors).load_run(load_path):
+                sys.exit()
+            if set_switches(names, devices, switch_settings):
+                print_switch_table(names, devices, network, monitors,
+                                   table_switches, batch_cycles or 1,
+                                   processes)
+        elif batch_cycles is not None:
+            # Run from a cold start and print the traces, as the r command,
+            # or continue from a snapshot
+            userint = UserInterface(names, devices, network, monitors)
+            userint.extrapolate = extrapolate
+            userint.rng = rng
+            if load_path is None:
+                devices.cold_startup(rng)
+            elif not userint.load_run(load_path):
+                sys.exit()
+            if set_switches(names, devices, switch_settings) and \
+                    userint.run_network(batch_cycles):
+                userint.cycles_completed += batch_cycles
+                if save_path is not None:
+                    userint.save_run(save_path)
+        elif command_path is not None:
+            userint = UserInterface(names, devices, network, monitors)
+            userint.extrapolate = extrapolate
+            userint.rng = rng
+            if load_path is not None and not userint.load_run(load_path):
+                sys.exit()
+            try:
+                with open(command_path) as command_file:
+                    lines = command_file.readlines()
+            except OSError:
+                print("Error: could not read", command_path)
+            else:
+                userint.run_script(lines)
+        else:
+            cycles_completed = 0
+            if load_path is not None:
+                from snapshot import load_snapshot
+                cycles_completed = load_snapshot(load_path, network, monitors)
+                if cycles_completed is None:
+                    print("Error: could not load a snapshot of this network")
+                    sys.exit()
+
+            import wx  # only the graphical user interface needs wx
+            from gui import Gui
+
             # Initialise an instance of the gui.Gui() class
             app = wx.App()
 
@@ -84,10 +427,13 @@ def main(arg_list):
             locale.AddCatalog('logsim')
 
             gui = Gui("Logic Simulator", path, names, devices, network,
-                      monitors, 0)
+                      monitors, cycles_completed)
             gui.Show(True)
             app.MainLoop()
 
+    if monitors.vcd_writer is not None:
+        monitors.vcd_writer.close()
+
 
 if __name__ == "__main__":
     main(sys.argv[1:])
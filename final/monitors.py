@@ -6,9 +6,146 @@ signals.
 Classes
 -------
 Monitors - records and displays specified output signals.
+SignalTrace - stores a signal trace as runs of the same signal level.
 
 """
+import array
+import bisect
 import collections
+import itertools
+
+
+class SignalTrace:
+    """Store a signal trace as runs of the same signal level.
+
+    The trace behaves like a list of signal levels, one per simulation cycle,
+    but only stores the level and end of each run, so memory grows with the
+    number of transitions rather than the number of cycles.
+
+    Parameters
+    ----------
+    signals: signal levels to initialise the trace with.
+
+    Public methods
+    --------------
+    append(self, signal, count=1): Adds count cycles of signal to the end of
+                                   the trace.
+
+    repeat(self, period, count): Adds count cycles that repeat the last
+                                 period cycles of the trace.
+
+    truncate(self, length): Removes the cycles after the first length
+                            cycles of the trace.
+
+    get_runs(self): Returns a list of (signal, length) runs.
+    """
+
+    def __init__(self, signals=()):
+        """Initialise the runs."""
+        self.levels = array.array('b')  # signal level of each run
+        self.ends = array.array('q')  # trace length at the end of each run
+        for signal in signals:
+            self.append(signal)
+
+    def append(self, signal, count=1):
+        """Add count cycles of signal to the end of the trace."""
+        if count <= 0:
+            return
+        if self.levels and self.levels[-1] == signal:
+            self.ends[-1] += count
+        else:
+            self.levels.append(signal)
+            self.ends.append(len(self) + count)
+
+    def repeat(self, period, count):
+        """Add count cycles that repeat the last period cycles of the trace."""
+        if count <= 0:
+            return
+        # Runs of the last period cycles
+        start = len(self) - period
+        runs = []
+        for run in range(bisect.bisect_right(self.ends, start),
+                         len(self.levels)):
+            runs.append((self.levels[run], self.ends[run] - start))
+            start = self.ends[run]
+        if len(runs) == 1:
+            self.append(runs[0][0], count)
+            return
+
+        # Add the first run, then repeat the period from the second run, so
+        # that no run of the repeated unit joins the run before it
+        self.append(runs[0][0], min(runs[0][1], count))
+        count -= runs[0][1]
+        if count <= 0:
+            return
+        if runs[-1][0] == runs[0][0]:
+            unit = runs[1:-1] + [(runs[0][0], runs[-1][1] + runs[0][1])]
+        else:
+            unit = runs[1:] + [runs[0]]
+        (repeats, count) = divmod(count, period)
+        self.levels.extend(array.array('b', [level for level, _ in unit]) *
+                           repeats)
+        self.ends.extend(itertools.islice(itertools.accumulate(
+            itertools.chain.from_iterable(
+                itertools.repeat([length for _, length in unit], repeats)),
+            initial=len(self)), 1, None))
+        for level, length in unit:
+            if count <= 0:
+                break
+            self.append(level, min(length, count))
+            count -= length
+
+    def truncate(self, length):
+        """Remove the cycles after the first length cycles of the trace."""
+        if length >= len(self):
+            return
+        # Number of runs kept, the last of which is shortened
+        kept = bisect.bisect_right(self.ends, length - 1) + 1 if length else 0
+        del self.levels[kept:]
+        del self.ends[kept:]
+        if kept:
+            self.ends[-1] = length
+
+    def get_runs(self):
+        """Return a list of (signal, length) runs in the trace."""
+        starts = itertools.chain([0], self.ends)
+        return [(signal, end - start) for signal, start, end in
+                zip(self.levels, starts, self.ends)]
+
+    def __len__(self):
+        """Return the number of cycles in the trace."""
+        if self.ends:
+            return self.ends[-1]
+        return 0
+
+    def __iter__(self):
+        """Iterate over the signal level of every cycle."""
+        for signal, length in self.get_runs():
+            yield from itertools.repeat(signal, length)
+
+    def __getitem__(self, index):
+        """Return the signal level at index, or a list for a slice."""
+        if isinstance(index, slice):
+            return list(self)[index]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("trace index out of range")
+        return self.levels[bisect.bisect_right(self.ends, index)]
+
+    def __eq__(self, other):
+        """Return True if other holds the same signal levels."""
+        if isinstance(other, SignalTrace):
+            return self.levels == other.levels and self.ends == other.ends
+        if isinstance(other, (list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        """Return the trace as a list of signal levels."""
+        return "SignalTrace(%r)" % list(self)
 
 
 class Monitors:
@@ -34,7 +171,14 @@ class Monitors:
     get_monitor_signal(self, device_id, output_id): Returns the signal level of
                                                     the specified monitor.
 
-    record_signals(self): Records the current signal level of all monitors.
+    record_signals(self, count=1): Records the current signal level of all
+                                   monitors.
+
+    repeat_signals(self, period, count): Records count cycles that repeat
+                                         the last period cycles.
+
+    set_vcd_writer(self, vcd_writer): Streams the recorded signals to a VCD
+                                      file.
 
     get_signal_names(self): Returns two lists of signal names: monitored and
                             not monitored.
@@ -53,8 +197,9 @@ class Monitors:
         self.devices = devices
 
         # monitors_dictionary stores
-        # {(device_id, output_id): [signal_list]}
+        # {(device_id, output_id): SignalTrace}
         self.monitors_dictionary = collections.OrderedDict()
+        self.vcd_writer = None  # vcd.VcdWriter() to stream signals to
 
         [self.NO_ERROR, self.NOT_OUTPUT,
          self.MONITOR_PRESENT] = self.names.unique_error_codes(3)
@@ -73,11 +218,11 @@ class Monitors:
             return self.MONITOR_PRESENT
         else:
             # If n simulation cycles have been completed before making this
-            # monitor, then initialise the signal trace with an n-length list
-            # of BLANK signals. Otherwise, initialise the trace with an empty
-            # list.
-            self.monitors_dictionary[(device_id, output_id)] = [
-                self.devices.BLANK] * cycles_completed
+            # monitor, then initialise the signal trace with n BLANK signals.
+            # Otherwise, initialise the trace as empty.
+            trace = SignalTrace()
+            trace.append(self.devices.BLANK, cycles_completed)
+            self.monitors_dictionary[(device_id, output_id)] = trace
             return self.NO_ERROR
 
     def remove_monitor(self, device_id, output_id):
@@ -101,15 +246,54 @@ class Monitors:
         else:
             return None
 
-    def record_signals(self):
+    def record_signals(self, count=1):
         """Record the current signal level for every monitor.
 
-        This function is called at every simulation cycle.
+        This function is called at every simulation cycle. count is the
+        number of cycles to record the current signals for, which is more
+        than one when cycles in which nothing changes are skipped.
         """
         for device_id, output_id in self.monitors_dictionary:
             signal_level = self.get_monitor_signal(device_id, output_id)
             self.monitors_dictionary[(device_id,
-                                      output_id)].append(signal_level)
+                                      output_id)].append(signal_level, count)
+        if self.vcd_writer is not None:
+            self.vcd_writer.write_signals(count)
+
+    def repeat_signals(self, period, count):
+        """Record count cycles that repeat the last period cycles.
+
+        This is used when the network is periodic, so that the cycles do not
+        need to be simulated.
+        """
+        if count <= 0:
+            return
+        if self.vcd_writer is not None:
+            # Signals of every monitor in each cycle of the period
+            keys = list(self.monitors_dictionary)
+            traces = list(self.monitors_dictionary.values())
+            cycles = [tuple(trace[len(trace) - period + cycle]
+                            for trace in traces) for cycle in range(period)]
+            cycle = 0
+            while cycle < count:
+                signals = cycles[cycle % period]
+                length = 1
+                while (cycle + length < count and
+                       cycles[(cycle + length) % period] == signals):
+                    length += 1
+                self.vcd_writer.write_signals(length, dict(zip(keys,
+                                                               signals)))
+                cycle += length
+        for trace in self.monitors_dictionary.values():
+            trace.repeat(period, count)
+
+    def set_vcd_writer(self, vcd_writer):
+        """Stream the signals to vcd_writer every time they are recorded.
+
+        vcd_writer is an instance of the vcd.VcdWriter() class, or None to
+        stop streaming.
+        """
+        self.vcd_writer = vcd_writer
 
     def get_signal_names(self):
         """Return two signal name lists: monitored and not monitored."""
@@ -132,10 +316,10 @@ class Monitors:
     def reset_monitors(self):
         """Clear the memory of all the monitors.
 
-        The list of stored signal levels for each monitor is deleted.
+        The stored signal levels for each monitor are deleted.
         """
         for device_id, output_id in self.monitors_dictionary:
-            self.monitors_dictionary[(device_id, output_id)] = []
+            self.monitors_dictionary[(device_id, output_id)] = SignalTrace()
 
     def get_margin(self):
         """Return the length of the longest monitor's name.
@@ -160,17 +344,17 @@ class Monitors:
         for device_id, output_id in self.monitors_dictionary:
             monitor_name = self.devices.get_signal_name(device_id, output_id)
             name_length = len(monitor_name)
-            signal_list = self.monitors_dictionary[(device_id, output_id)]
+            signal_trace = self.monitors_dictionary[(device_id, output_id)]
             print(monitor_name + (margin - name_length) * " ", end=": ")
-            for signal in signal_list:
+            for signal, length in signal_trace.get_runs():
                 if signal == self.devices.HIGH:
-                    print("-", end="")
+                    print("-" * length, end="")
                 if signal == self.devices.LOW:
-                    print("_", end="")
+                    print("_" * length, end="")
                 if signal == self.devices.RISING:
-                    print("/", end="")
+                    print("/" * length, end="")
                 if signal == self.devices.FALLING:
-                    print("\\", end="")
+                    print("\\" * length, end="")
                 if signal == self.devices.BLANK:
-                    print(" ", end="")
+                    print(" " * length, end="")
             print("\n", end="")
@@ -0,0 +1,115 @@
+"""Run many random cold start-ups of a network in parallel processes.
+
+Used in the Logic Simulator project to characterise networks whose
+behaviour depends on the random start-up state of their D-types and clocks.
+Each sample is a run from a cold start-up with its own seeded random number
+generator, so the results only depend on the seed. The samples are split
+into chunks, which are shared by a pool of worker processes with
+workerpool.
+
+Functions
+---------
+get_sample_rng - returns the random number generator of a sample.
+load_worker - sets up a worker process to simulate samples.
+run_samples - simulates a chunk of samples in a worker process.
+run_monte_carlo - simulates many samples and returns their statistics.
+format_statistics - returns the lines of a table of the statistics.
+"""
+import array
+import itertools
+import random
+
+from simulate import run_network
+from workerpool import get_chunks, run_chunks, worker
+
+
+def get_sample_rng(seed, sample):
+    """Return the random number generator of the sample of a seed."""
+    return random.Random("%d:%d" % (seed, sample))
+
+
+def load_worker(network, monitors, cycles, seed):
+    """Set up a worker process to simulate cold start-ups."""
+    worker["state"] = (network.save_state(), network.global_counter)
+    worker["cycles"] = cycles
+    worker["seed"] = seed
+
+
+def run_samples(start, stop):
+    """Simulate the samples from start up to stop in a worker process.
+
+    Return the number of samples that did not oscillate, and for each
+    monitor an array of the change in the number of HIGH samples at every
+    cycle, which is summed to give the count in each cycle.
+    """
+    network = worker["network"]
+    monitors = worker["monitors"]
+    devices = network.devices
+    cycles = worker["cycles"]
+    (state, global_counter) = worker["state"]
+    changes = [array.array('q', bytes(8 * (cycles + 1)))
+               for _ in monitors.monitors_dictionary]
+    completed = 0
+    for sample in range(start, stop):
+        network.restore_state(state)
+        network.global_counter = global_counter
+        monitors.reset_monitors()
+        devices.cold_startup(get_sample_rng(worker["seed"], sample))
+        if not run_network(network, monitors, cycles):
+            continue  # oscillating samples are left out
+        completed += 1
+        for trace, change in zip(monitors.monitors_dictionary.values(),
+                                 changes):
+            cycle = 0
+            for signal, length in trace.get_runs():
+                if signal == devices.HIGH:
+                    change[cycle] += 1
+                    change[cycle + length] -= 1
+                cycle += length
+    return completed, changes
+
+
+def run_monte_carlo(network, monitors, cycles, samples, seed=0,
+                    processes=None, chunk_size=None):
+    """Simulate samples cold start-ups of the network for cycles.
+
+    Every sample starts from the current state of the devices, which is
+    left unchanged, apart from the random start-up state. processes is the
+    number of worker processes, by default one for each CPU. With one
+    process, the samples are simulated without starting a pool.
+
+    Return the number of samples that did not oscillate, and a dictionary of
+    {(device_id, output_id): [probability, ...]} of the probability of each
+    monitored signal being HIGH in each cycle of those samples.
+    """
+    (processes, chunks) = get_chunks(samples, processes, chunk_size)
+    results = run_chunks(run_samples, chunks, network, monitors, load_worker,
+                         (cycles, seed), processes)
+
+    completed = sum(result[0] for result in results)
+    statistics = {}
+    for number, key in enumerate(monitors.monitors_dictionary):
+        changes = [sum(result[1][number][cycle] for result in results)
+                   for cycle in range(cycles)]
+        statistics[key] = [count / completed if completed else 0.0
+                           for count in itertools.accumulate(changes)]
+    return completed, statistics
+
+
+def format_statistics(devices, statistics):
+    """Return the lines of a table of the statistics of run_monte_carlo.
+
+    Each row is a cycle, with the probability of each monitored signal
+    being HIGH in that cycle.
+    """
+    signal_names = [devices.get_signal_name(device_id, output_id)
+                    for device_id, output_id in statistics]
+    widths = [max(len(name), 4) for name in ["Cycle"] + signal_names]
+    lines = [" ".join(name.ljust(width) for name, width
+                      in zip(["Cycle"] + signal_names, widths)).rstrip()]
+    for cycle, probabilities in enumerate(zip(*statistics.values())):
+        cells = [str(cycle)] + ["%.2f" % probability
+                                for probability in probabilities]
+        lines.append(" ".join(cell.ljust(width) for cell, width
+                              in zip(cells, widths)).rstrip())
+    return lines
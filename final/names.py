@@ -35,15 +35,23 @@ class Names:
         Returns a list of name IDs for each name string.
         Adds a name if not already present.
 
+    lookup_many(self, name_strings):
+        Returns a list of name IDs for an iterable of name strings, only
+        validating names that are not already present.
+
+    add_name(self, name_string):
+        Validates a new name string, adds it and returns its name ID.
+
     get_name_string(self, name_id):
         Returns the corresponding name string for the name ID.
         Returns None if the ID is not present.
     """
 
     def __init__(self):
-        """Initialise names list."""
+        """Initialise names list and the name string to name ID index."""
         self.error_code_count = 0  # how many error codes have been declared
         self.names = []
+        self.name_ids = {}  # stores {name_string: name_id}
 
     def unique_error_codes(self, num_error_codes):
         """Return a list of unique integer error codes."""
@@ -58,34 +66,48 @@ class Names:
 
         If the name string is not present in the names list, return None.
         """
-        if name_string in self.names:
-            return self.names.index(name_string)
-        else:
-            return None
+        return self.name_ids.get(name_string)
 
     def lookup(self, name_string_list):
         """Return a list of name IDs for each name string in name_string_list.
 
         If the name string is not present in the names list, add it.
         """
-        name_ids = []
         if not isinstance(name_string_list, list):
             raise TypeError("Must enter a list of strings to look up")
-        for name_string in name_string_list:
-            if not name_string[0].isalpha():
-                raise TypeError("Name must start with a letter.")
-            else:
-                for name in name_string:
-                    # allow underscore in names for now (used in device.py)
-                    if not name.isalnum() and name != '_':
-                        raise TypeError("Name must be alphanumeric")
-            if name_string in self.names:
-                name_ids.append(self.names.index(name_string))
-            else:
-                self.names.append(name_string)
-                name_ids.append(len(self.names) - 1)
+        return self.lookup_many(name_string_list)
+
+    def lookup_many(self, name_strings):
+        """Return a list of name IDs for each name string in name_strings.
+
+        name_strings can be any iterable of strings. Names already in the
+        names list are resolved through the index without being validated
+        again; new names are validated and added.
+        """
+        name_ids = []
+        index = self.name_ids
+        for name_string in name_strings:
+            name_id = index.get(name_string)
+            if name_id is None:
+                name_id = self.add_name(name_string)
+            name_ids.append(name_id)
         return name_ids
 
+    def add_name(self, name_string):
+        """Validate name_string, add it to the names list and return its ID."""
+        if not isinstance(name_string, str) or not name_string:
+            raise TypeError("Name must be a non-empty string.")
+        if not name_string[0].isalpha():
+            raise TypeError("Name must start with a letter.")
+        for character in name_string:
+            # allow underscore in names for now (used in device.py)
+            if not character.isalnum() and character != '_':
+                raise TypeError("Name must be alphanumeric")
+        name_id = len(self.names)
+        self.names.append(name_string)
+        self.name_ids[name_string] = name_id
+        return name_id
+
     def get_name_string(self, name_id):
         """Return the corresponding name string for name_id.
 
@@ -0,0 +1,165 @@
+"""Cache parsed networks on disk, keyed by the definition file contents.
+
+Used in the Logic Simulator project so that large definition files that
+have not changed are not scanned and parsed again. The state of the names,
+devices, network and monitors built by the parser is pickled, compressed
+and stored in a cache directory, which is kept within size limits by
+evicting the least recently used entries.
+
+Classes
+-------
+NetlistCache - stores and loads parsed networks.
+"""
+import gc
+import hashlib
+import io
+import os
+import pickle
+import sys
+import zlib
+
+from parse import PARSER_VERSION
+
+
+class NetlistCache:
+    """Store and load parsed networks.
+
+    Each entry holds the instance dictionaries of the Names, Devices,
+    Network and Monitors objects. References between them are stored by
+    role rather than by value, so loading an entry restores its state into
+    the objects the caller already has, and the scanner's name IDs remain
+    valid.
+
+    Parameters
+    ----------
+    cache_dir: directory for the cached networks.
+    max_entries: maximum number of cached networks.
+    max_bytes: maximum total size of the cached networks in bytes.
+
+    Public methods
+    --------------
+    get_cache_path(self, path): Returns the path of the cached network of the
+                                definition file.
+
+    load(self, path, names, devices, network, monitors): Restores the cached
+                        network of the definition file into the objects.
+
+    store(self, path, names, devices, network, monitors): Stores the network
+                        built from the definition file.
+
+    evict(self): Removes the least recently used entries until the cache is
+                 within its limits.
+    """
+
+    def __init__(self, cache_dir=os.path.join(os.path.expanduser("~"),
+                                              ".cache", "logsim", "netlists"),
+                 max_entries=32, max_bytes=1 << 28):
+        """Initialise the cache settings."""
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+    def get_cache_path(self, path):
+        """Return the path of the cached network of the definition file.
+
+        The cache key covers the contents of the file, the parser version
+        and the Python version.
+        """
+        key = hashlib.sha256()
+        with open(path, 'rb') as definition_file:
+            for block in iter(lambda: definition_file.read(1 << 20), b""):
+                key.update(block)
+        key.update(PARSER_VERSION.encode())
+        key.update(sys.version.encode())
+        return os.path.join(self.cache_dir, key.hexdigest() + ".pickle")
+
+    def load(self, path, names, devices, network, monitors):
+        """Restore the cached network of the definition file.
+
+        Return True if the network was found in the cache, and False if the
+        file must be parsed.
+        """
+        cache_path = self.get_cache_path(path)
+        objects = {"names": names, "devices": devices, "network": network,
+                   "monitors": monitors}
+        try:
+            with open(cache_path, 'rb') as cache_file:
+                data = zlib.decompress(cache_file.read())
+            unpickler = pickle.Unpickler(io.BytesIO(data))
+            unpickler.persistent_load = objects.__getitem__
+            states = self.without_gc(unpickler.load)
+        except Exception:  # unpickling a corrupt entry can raise anything
+            return False
+        if not isinstance(states, dict) or not set(states) <= set(objects):
+            return False
+
+        for role, state in states.items():
+            objects[role].__dict__.clear()
+            objects[role].__dict__.update(state)
+        try:
+            os.utime(cache_path)  # mark the entry as recently used
+        except OSError:
+            pass
+        return True
+
+    def store(self, path, names, devices, network, monitors):
+        """Store the network built from the definition file.
+
+        Any failure to write the cache is ignored.
+        """
+        objects = {"names": names, "devices": devices, "network": network,
+                   "monitors": monitors}
+        roles = {id(instance): role for role, instance in objects.items()}
+        states = {role: instance.__dict__
+                  for role, instance in objects.items()}
+        pickled = io.BytesIO()
+        pickler = pickle.Pickler(pickled, pickle.HIGHEST_PROTOCOL)
+        pickler.persistent_id = lambda value: roles.get(id(value))
+        self.without_gc(pickler.dump, states)
+        try:
+            cache_path = self.get_cache_path(path)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temporary_path = cache_path + ".tmp"
+            with open(temporary_path, 'wb') as cache_file:
+                cache_file.write(zlib.compress(pickled.getvalue(), 1))
+            os.replace(temporary_path, cache_path)
+        except OSError:
+            return
+        self.evict()
+
+    def without_gc(self, function, *args):
+        """Call the function with the garbage collector disabled.
+
+        Pickling creates or visits an object for every device, which would
+        otherwise trigger many full collections.
+        """
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return function(*args)
+        finally:
+            if enabled:
+                gc.enable()
+
+    def evict(self):
+        """Remove the least recently used entries beyond the cache limits."""
+        entries = []
+        try:
+            for entry in os.scandir(self.cache_dir):
+                if entry.name.endswith(".pickle"):
+                    status = entry.stat()
+                    entries.append((status.st_mtime, status.st_size,
+                                    entry.path))
+        except OSError:
+            return
+
+        entries.sort(reverse=True)  # most recently used first
+        total_bytes = 0
+        for number, (_, size, entry_path) in enumerate(entries):
+            total_bytes += size
+            if number >= self.max_entries or (
+                    number > 0 and total_bytes > self.max_bytes):
+                try:
+                    os.remove(entry_path)
+                except OSError:
+                    pass
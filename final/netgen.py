@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""Generate circuit definition files of any size for benchmarks.
+
+Used in the Logic Simulator project to measure how the scanner, parser and
+simulator scale, as the example definition files are very small. Every
+generated file is a valid definition file with monitors on its outputs.
+
+Usage
+-----
+Show help: netgen.py -h
+Write a definition file: netgen.py [-r <seed>] <shape> <size> <file path>
+Shapes: tree, adder, shift, dag, latches
+
+Functions
+---------
+generate_tree - a tree of NAND gates reducing many switches to one output.
+generate_adder - a ripple carry adder.
+generate_shift - a shift register of D-types.
+generate_dag - a random acyclic network of logic gates.
+generate_latches - cross-coupled NAND latches, which are feedback loops.
+write_definition_file - writes a generated circuit to a file.
+"""
+import getopt
+import random
+import sys
+
+
+def generate_tree(size, seed=0):
+    """Return the lines of a tree of NAND gates with size input switches."""
+    rng = random.Random(seed)
+    lines = []
+    level = []
+    for number in range(max(size, 1)):
+        lines.append("DEF S%d = SWITCH %d ;" % (number, rng.randrange(2)))
+        level.append("S%d" % number)
+
+    connections = []
+    gate_count = 0
+    while len(level) > 1:
+        next_level = []
+        for first, second in zip(level[::2], level[1::2]):
+            gate = "G%d" % gate_count
+            gate_count += 1
+            lines.append("DEF %s = NAND 2 ;" % gate)
+            connections.append("CON %s -> %s.I1 ;" % (first, gate))
+            connections.append("CON %s -> %s.I2 ;" % (second, gate))
+            next_level.append(gate)
+        if len(level) % 2:  # the odd one out joins the next level
+            next_level.append(level[-1])
+        level = next_level
+    return lines + connections + ["MONITOR %s ;" % level[0]]
+
+
+def generate_adder(size, seed=0):
+    """Return the lines of a ripple carry adder of size bits."""
+    rng = random.Random(seed)
+    lines = ["DEF C0 = SWITCH %d ;" % rng.randrange(2)]
+    connections = []
+    monitors = []
+    for bit in range(max(size, 1)):
+        lines.append("DEF A%d = SWITCH %d ;" % (bit, rng.randrange(2)))
+        lines.append("DEF B%d = SWITCH %d ;" % (bit, rng.randrange(2)))
+        lines.append("DEF H%d = XOR ;" % bit)  # half sum
+        lines.append("DEF S%d = XOR ;" % bit)  # sum
+        lines.append("DEF G%d = AND 2 ;" % bit)  # carry generate
+        lines.append("DEF P%d = AND 2 ;" % bit)  # carry propagate
+        lines.append("DEF C%d = OR 2 ;" % (bit + 1))  # carry out
+        connections.extend([
+            "CON A%d -> H%d.I1 ;" % (bit, bit),
+            "CON B%d -> H%d.I2 ;" % (bit, bit),
+            "CON H%d -> S%d.I1 ;" % (bit, bit),
+            "CON C%d -> S%d.I2 ;" % (bit, bit),
+            "CON A%d -> G%d.I1 ;" % (bit, bit),
+            "CON B%d -> G%d.I2 ;" % (bit, bit),
+            "CON H%d -> P%d.I1 ;" % (bit, bit),
+            "CON C%d -> P%d.I2 ;" % (bit, bit),
+            "CON G%d -> C%d.I1 ;" % (bit, bit + 1),
+            "CON P%d -> C%d.I2 ;" % (bit, bit + 1)])
+        monitors.append("MONITOR S%d ;" % bit)
+    monitors.append("MONITOR C%d ;" % max(size, 1))
+    return lines + connections + monitors
+
+
+def generate_shift(size, seed=0):
+    """Return the lines of a shift register of size D-types.
+
+    The data input is a switch, and the D-types share one clock. SET and
+    CLEAR are held LOW by another switch.
+    """
+    rng = random.Random(seed)
+    lines = ["DEF DIN = SWITCH %d ;" % rng.randrange(2),
+             "DEF ZERO = SWITCH 0 ;",
+             "DEF CK = CLOCK %d ;" % rng.randrange(1, 4)]
+    connections = []
+    source = "DIN"
+    for number in range(max(size, 1)):
+        d_type = "D%d" % number
+        lines.append("DEF %s = DTYPE ;" % d_type)
+        connections.extend(["CON CK -> %s.CLK ;" % d_type,
+                            "CON %s -> %s.DATA ;" % (source, d_type),
+                            "CON ZERO -> %s.SET ;" % d_type,
+                            "CON ZERO -> %s.CLEAR ;" % d_type])
+        source = d_type + ".Q"
+    return lines + connections + ["MONITOR %s ;" % source]
+
+
+def generate_dag(size, seed=0):
+    """Return the lines of a random acyclic network of size logic gates.
+
+    Each gate takes its inputs from switches or gates defined before it.
+    The last eight gates are monitored.
+    """
+    rng = random.Random(seed)
+    lines = []
+    connections = []
+    outputs = []
+    for number in range(max(size // 16, 2)):
+        lines.append("DEF S%d = SWITCH %d ;" % (number, rng.randrange(2)))
+        outputs.append("S%d" % number)
+
+    gates = []
+    for number in range(size):
+        gate = "G%d" % number
+        kind = rng.choice(["AND", "OR", "NAND", "NOR", "XOR"])
+        if kind == "XOR":
+            lines.append("DEF %s = XOR ;" % gate)
+            input_count = 2
+        else:
+            input_count = rng.randrange(2, 5)
+            lines.append("DEF %s = %s %d ;" % (gate, kind, input_count))
+        for input_number in range(1, input_count + 1):
+            source = rng.choice(outputs)
+            connections.append("CON %s -> %s.I%d ;"
+                               % (source, gate, input_number))
+        outputs.append(gate)
+        gates.append(gate)
+    monitors = ["MONITOR %s ;" % gate for gate in gates[-8:]]
+    return lines + connections + monitors
+
+
+def generate_latches(size, seed=0):
+    """Return the lines of size cross-coupled NAND latches.
+
+    Each latch is a feedback loop of two gates. Its active-low set and reset
+    switches are chosen so that it is either set or reset, which keeps it
+    stable from any starting state.
+    """
+    rng = random.Random(seed)
+    lines = []
+    connections = []
+    monitors = []
+    for number in range(max(size, 1)):
+        set_state = rng.randrange(2)
+        lines.extend(["DEF SB%d = SWITCH %d ;" % (number, set_state),
+                      "DEF RB%d = SWITCH %d ;" % (number, 1 - set_state),
+                      "DEF Q%d = NAND 2 ;" % number,
+                      "DEF QB%d = NAND 2 ;" % number])
+        connections.extend(["CON SB%d -> Q%d.I1 ;" % (number, number),
+                            "CON QB%d -> Q%d.I2 ;" % (number, number),
+                            "CON RB%d -> QB%d.I1 ;" % (number, number),
+                            "CON Q%d -> QB%d.I2 ;" % (number, number)])
+        monitors.append("MONITOR Q%d ;" % number)
+    return lines + connections + monitors[:8]
+
+
+# Generator of each shape, called with (size, seed)
+SHAPES = {"tree": generate_tree, "adder": generate_adder,
+          "shift": generate_shift, "dag": generate_dag,
+          "latches": generate_latches}
+
+
+def write_definition_file(path, shape, size, seed=0):
+    """Write the generated circuit of the specified shape and size to path."""
+    lines = SHAPES[shape](size, seed)
+    with open(path, 'w') as definition_file:
+        definition_file.write("# %s %d, generated by netgen.py\n"
+                              % (shape, size))
+        definition_file.write("\n".join(lines) + "\n")
+
+
+def main(arg_list):
+    """Parse the command line options and write the definition file."""
+    usage_message = ("Usage:\n"
+                     "Show help: netgen.py -h\n"
+                     "Write a definition file: "
+                     "netgen.py [-r <seed>] <shape> <size> <file path>\n"
+                     "Shapes: " + ", ".join(SHAPES))
+    try:
+        options, arguments = getopt.getopt(arg_list, "hr:")
+    except getopt.GetoptError:
+        print("Error: invalid command line arguments\n")
+        print(usage_message)
+        sys.exit()
+
+    seed = 0
+    for option, value in options:
+        if option == "-h":
+            print(usage_message)
+            sys.exit()
+        elif option == "-r":
+            seed = int(value)
+
+    if (len(arguments) != 3 or arguments[0] not in SHAPES or
+            not arguments[1].isdigit()):
+        print("Error: a shape, size and file path are required\n")
+        print(usage_message)
+        sys.exit()
+    [shape, size, path] = arguments
+    write_definition_file(path, shape, int(size), seed)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
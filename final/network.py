@@ -6,6 +6,7 @@ Classes
 --------
 Network - builds and executes the network.
 """
+import math
 
 
 class Network:
@@ -30,6 +31,9 @@ class Network:
     get_output_signal(self, device_id, output_id): Returns the signal level at
                                                    the given output.
 
+    get_fan_out(self, device_id): Returns the IDs of the devices with an input
+                                  connected to an output of the given device.
+
     make_connection(self, first_device_id, first_port_id, second_device_id,
                     second_port_id): Connects the first device to the second
                                      device.
@@ -56,6 +60,52 @@ class Network:
     update_clocks(self): If it is time to do so, sets clock signals to RISING
                          or FALLING.
 
+    set_engine(self, engine): Compiles the network with the given evaluation
+                              engine and uses it to execute the network.
+
+    get_depth(self): Returns the number of devices on the longest path
+                     through the network.
+
+    get_iteration_limit(self): Returns the number of sweeps allowed for the
+                               signals to settle.
+
+    get_signal_state(self): Returns a tuple of every output signal and
+                            D-type memory.
+
+    sweep_devices(self, sweep_order): Executes every device once.
+
+    find_oscillating_devices(self, sweep_order, period): Returns the devices
+                                            that change over period sweeps.
+
+    get_quiet_cycles(self): Returns the number of coming cycles in which no
+                            signal changes.
+
+    fast_forward(self, max_cycles): Skips coming cycles in which no signal
+                                    changes.
+
+    get_period(self): Returns the lowest common multiple of the clock
+                      periods.
+
+    get_cycle_state(self): Returns the state that decides every coming
+                           cycle.
+
+    get_fan_out_cone(self, device_id): Returns the IDs of the devices that
+                                       the given device can affect.
+
+    get_fan_in_cone(self, device_ids): Returns the IDs of the devices that
+                                       can affect the given devices.
+
+    save_state(self, device_ids=None): Returns the state of the devices.
+
+    restore_state(self, state): Restores a state of the devices.
+
+    get_sweep_order(self, device_ids=None): Returns the order in which
+                                            sweep_network executes the
+                                            devices.
+
+    sweep_network(self, device_ids=None): Executes the devices kind-by-kind
+                                          until the signals settle.
+
     execute_network(self): Executes all the devices in the network for one
                            simulation cycle.
     """
@@ -70,6 +120,16 @@ class Network:
          self.INPUT_CONNECTED, self.PORT_ABSENT,
          self.DEVICE_ABSENT] = self.names.unique_error_codes(6)
         self.steady_state = True  # for checking if signals have settled
+        self.engine = None  # None executes the network by sweeping devices
+        self.iteration_limit = None  # see get_iteration_limit
+        self.iteration_limit_devices = 0
+        self.oscillating_devices = []  # set when the network oscillates
+        # Sweeps in each cycle before the signal states are hashed to detect
+        # oscillation, as most cycles settle within them
+        self.GRACE_SWEEPS = 4
+
+        # fan_out stores {output_device_id: [connected_input_device_id, ...]}
+        self.fan_out = {}
 
     def get_connected_output(self, device_id, input_id):
         """Return the output connected to the given input.
@@ -108,6 +168,13 @@ class Network:
                 return device.outputs[output_id]
         return None
 
+    def get_fan_out(self, device_id):
+        """Return the IDs of the devices connected to outputs of device_id.
+
+        A device is listed once for every input connected to the device.
+        """
+        return self.fan_out.get(device_id, [])
+
     def make_connection(self, first_device_id, first_port_id, second_device_id,
                         second_port_id):
         """Connect the first device to the second device.
@@ -131,6 +198,9 @@ class Network:
                 # Make connection
                 first_device.inputs[first_port_id] = (second_device_id,
                                                       second_port_id)
+                self.fan_out.setdefault(second_device_id,
+                                        []).append(first_device_id)
+                self.iteration_limit = None
                 error_type = self.NO_ERROR
             else:  # second_port_id is not a valid input or output port
                 error_type = self.PORT_ABSENT
@@ -146,6 +216,9 @@ class Network:
                 else:
                     second_device.inputs[second_port_id] = (first_device_id,
                                                             first_port_id)
+                    self.fan_out.setdefault(first_device_id,
+                                            []).append(second_device_id)
+                    self.iteration_limit = None
                     error_type = self.NO_ERROR
             else:
                 error_type = self.PORT_ABSENT
@@ -366,68 +439,314 @@ class Network:
                     device.outputs[None] = self.devices.RISING
             device.clock_counter += 1
 
+    def set_engine(self, engine):
+        """Compile the network with engine and use it to execute the network.
+
+        engine must provide compile_network(), execute_network() and
+        reload_devices() methods.
+        Pass None to go back to sweeping all the devices. The engine must be
+        set again if devices or connections are added afterwards.
+        """
+        self.engine = engine
+        if engine is not None:
+            engine.compile_network()
+
     def execute_network(self):
         """Execute all the devices in the network for one simulation cycle.
 
         Return True if successful and the network does not oscillate.
         """
-        clock_devices = self.devices.find_devices(self.devices.CLOCK)
-        switch_devices = self.devices.find_devices(self.devices.SWITCH)
-        d_type_devices = self.devices.find_devices(self.devices.D_TYPE)
-        and_devices = self.devices.find_devices(self.devices.AND)
-        or_devices = self.devices.find_devices(self.devices.OR)
-        nand_devices = self.devices.find_devices(self.devices.NAND)
-        nor_devices = self.devices.find_devices(self.devices.NOR)
-        xor_devices = self.devices.find_devices(self.devices.XOR)
-        rc_devices = self.devices.find_devices(self.devices.RC)
+        if self.engine is not None:
+            return self.engine.execute_network()
+        return self.sweep_network()
 
-        # This sets clock signals to RISING or FALLING, where necessary
-        self.update_clocks()
+    def get_depth(self):
+        """Return the depth of the network.
 
-        # Number of iterations to wait for the signals to settle before
-        # declaring the network unstable
-        iteration_limit = 20
+        This is the number of devices on the longest path through the
+        connections. Every device in a loop adds one to the depth, so the
+        depth is an upper bound for networks with loops.
+        """
+        devices_list = self.devices.devices_list
+        fan_in_count = {device.device_id: 0 for device in devices_list}
+        for device in devices_list:
+            for connection in device.inputs.values():
+                if connection is not None:
+                    fan_in_count[device.device_id] += 1
+
+        level = [device.device_id for device in devices_list
+                 if fan_in_count[device.device_id] == 0]
+        depth = 0
+        sorted_count = 0
+        while level:
+            depth += 1
+            sorted_count += len(level)
+            next_level = []
+            for device_id in level:
+                for target_id in self.fan_out.get(device_id, []):
+                    fan_in_count[target_id] -= 1
+                    if fan_in_count[target_id] == 0:
+                        next_level.append(target_id)
+            level = next_level
+        return depth + len(devices_list) - sorted_count
+
+    def get_iteration_limit(self):
+        """Return the number of sweeps allowed for the signals to settle.
+
+        Each sweep moves a signal one step towards its target, through
+        RISING or FALLING, so signals take up to two sweeps to pass through
+        each level of the network. The limit is cached until devices or
+        connections are added.
+        """
+        device_count = len(self.devices.devices_list)
+        if self.iteration_limit is None or \
+                self.iteration_limit_devices != device_count:
+            self.iteration_limit = max(20, 2 * self.get_depth() + 2)
+            self.iteration_limit_devices = device_count
+        return self.iteration_limit
+
+    def get_signal_state(self):
+        """Return a tuple of every output signal and D-type memory.
+
+        Sweeps are deterministic, so the network oscillates if this state
+        repeats during a simulation cycle.
+        """
+        state = []
+        for device in self.devices.devices_list:
+            state.extend(device.outputs.values())
+            state.append(device.dtype_memory)
+        return tuple(state)
 
-        iterations = 0
-        while iterations < iteration_limit:
-            iterations += 1
-            self.steady_state = True
+    def sweep_devices(self, sweep_order):
+        """Execute every device once, kind-by-kind.
 
-            for device_id in switch_devices:  # execute switch devices
-                if not self.execute_switch(device_id):
-                    return False
-            # Execute D-type devices before clocks to catch the rising edge of
-            # the clock
-            for device_id in d_type_devices:  # execute DTYPE devices
-                if not self.execute_d_type(device_id):
-                    return False
-            for device_id in clock_devices:  # complete clock executions
-                if not self.execute_clock(device_id):
-                    return False
-            for device_id in and_devices:  # execute AND gate devices
-                if not self.execute_gate(device_id, self.devices.HIGH,
-                                         self.devices.HIGH):
-                    return False
-            for device_id in or_devices:  # execute OR gate devices
-                if not self.execute_gate(device_id, self.devices.LOW,
-                                         self.devices.LOW):
-                    return False
-            for device_id in nand_devices:  # execute NAND gate devices
-                if not self.execute_gate(device_id, self.devices.HIGH,
-                                         self.devices.LOW):
-                    return False
-            for device_id in nor_devices:  # execute NOR gate devices
-                if not self.execute_gate(device_id, self.devices.LOW,
-                                         self.devices.HIGH):
-                    return False
-            for device_id in xor_devices:  # execute XOR devices
-                if not self.execute_gate(device_id, None, None):
+        sweep_order is a list of (device_ids, execute function, arguments)
+        for each device kind. Return True if successful.
+        """
+        for device_ids, execute, arguments in sweep_order:
+            for device_id in device_ids:
+                if not execute(device_id, *arguments):
                     return False
+        return True
 
-            for device_id in rc_devices:
-                if not self.execute_rc(device_id):  # TODO finished here
-                    return False
+    def find_oscillating_devices(self, sweep_order, period):
+        """Return the IDs of the devices that change over period sweeps.
+
+        This is called once the signal state has repeated, so the sweeps
+        return the network to the same state, or for the last sweep allowed.
+        steady_state is False if any device changes.
+        """
+        devices_list = self.devices.devices_list
+        start_state = [(list(device.outputs.values()), device.dtype_memory)
+                       for device in devices_list]
+        changed = set()
+        for _ in range(period):
+            if not self.sweep_devices(sweep_order):
+                break
+            for device, state in zip(devices_list, start_state):
+                if (list(device.outputs.values()),
+                        device.dtype_memory) != state:
+                    changed.add(device.device_id)
+        return [device.device_id for device in devices_list
+                if device.device_id in changed]
+
+    def get_quiet_cycles(self):
+        """Return the number of coming cycles in which no signal changes.
+
+        This is only valid just after execute_network() succeeds, when the
+        signals are settled. They stay the same until a clock toggles, an RC
+        device falls or a switch is set. Return None if they stay the same
+        for ever.
+        """
+        devices = self.devices
+        if not self.steady_state:
+            return 0
+        quiet_cycles = None
+        for device_id in devices.find_devices(devices.SWITCH):
+            device = devices.get_device(device_id)
+            if device.outputs[None] != device.switch_state:
+                return 0
+        for device_id in devices.find_devices(devices.CLOCK):
+            # The clock toggles when its counter reaches the half period
+            device = devices.get_device(device_id)
+            cycles = device.clock_half_period - device.clock_counter
+            if cycles >= 0 and (quiet_cycles is None or
+                                cycles < quiet_cycles):
+                quiet_cycles = cycles
+        for device_id in devices.find_devices(devices.RC):
+            # The output falls when the global counter reaches the fall time
+            device = devices.get_device(device_id)
+            cycles = device.fall_time - self.global_counter
+            if device.outputs[None] == devices.HIGH and (
+                    quiet_cycles is None or cycles < quiet_cycles):
+                quiet_cycles = max(cycles, 0)
+        return quiet_cycles
+
+    def fast_forward(self, max_cycles):
+        """Skip up to max_cycles coming cycles in which no signal changes.
+
+        Only the clock counters and the global counter move on in these
+        cycles. Return the number of cycles skipped, for which the monitors
+        must record the current signals.
+        """
+        quiet_cycles = self.get_quiet_cycles()
+        if quiet_cycles is None or quiet_cycles > max_cycles:
+            quiet_cycles = max_cycles
+        if quiet_cycles <= 0:
+            return 0
+        for device_id in self.devices.find_devices(self.devices.CLOCK):
+            self.devices.get_device(device_id).clock_counter += quiet_cycles
+        self.global_counter += quiet_cycles
+        return quiet_cycles
+
+    def get_period(self):
+        """Return the lowest common multiple of the clock periods."""
+        period = 1
+        for device_id in self.devices.find_devices(self.devices.CLOCK):
+            device = self.devices.get_device(device_id)
+            period = math.lcm(period, 2 * device.clock_half_period)
+        return period
+
+    def get_cycle_state(self):
+        """Return the state that decides every coming cycle.
+
+        This is the signal state and the clock counters, as the switches do
+        not change during a run. Return None while an RC device has not
+        fallen, as it depends on the global counter.
+        """
+        devices = self.devices
+        for device_id in devices.find_devices(devices.RC):
+            if self.global_counter < devices.get_device(device_id).fall_time:
+                return None
+        clock_counters = tuple(
+            devices.get_device(device_id).clock_counter
+            for device_id in devices.find_devices(devices.CLOCK))
+        return (self.get_signal_state(), clock_counters)
+
+    def get_fan_out_cone(self, device_id):
+        """Return the set of IDs of the devices that device_id can affect.
+
+        These are the device itself and every device reached from it through
+        the connections.
+        """
+        cone = {device_id}
+        stack = [device_id]
+        while stack:
+            for target_id in self.fan_out.get(stack.pop(), []):
+                if target_id not in cone:
+                    cone.add(target_id)
+                    stack.append(target_id)
+        return cone
+
+    def get_fan_in_cone(self, device_ids):
+        """Return the set of IDs of the devices that can affect device_ids.
+
+        These are the devices themselves and every device that reaches them
+        through the connections.
+        """
+        cone = set(device_ids)
+        stack = list(cone)
+        while stack:
+            device = self.devices.get_device(stack.pop())
+            for connection in device.inputs.values():
+                if connection is not None and connection[0] not in cone:
+                    cone.add(connection[0])
+                    stack.append(connection[0])
+        return cone
+
+    def save_state(self, device_ids=None):
+        """Return the state of the devices in device_ids, or of all devices.
+
+        The state is a dictionary of {device_id: (outputs, dtype_memory,
+        clock_counter, switch_state)}.
+        """
+        devices_list = self.devices.devices_list
+        if device_ids is not None:
+            devices_list = [device for device in devices_list
+                            if device.device_id in device_ids]
+        return {device.device_id: (dict(device.outputs), device.dtype_memory,
+                                   device.clock_counter, device.switch_state)
+                for device in devices_list}
+
+    def restore_state(self, state):
+        """Restore a state of the devices returned by save_state."""
+        for device_id, (outputs, dtype_memory, clock_counter,
+                        switch_state) in state.items():
+            device = self.devices.get_device(device_id)
+            device.outputs.update(outputs)
+            device.dtype_memory = dtype_memory
+            device.clock_counter = clock_counter
+            device.switch_state = switch_state
+        if self.engine is not None:  # engines may keep copies of the state
+            self.engine.reload_devices()
+
+    def get_sweep_order(self, device_ids=None):
+        """Return the order in which sweep_network executes the devices.
+
+        The order is a list of (device_ids, execute function, arguments) for
+        each device kind, as taken by sweep_devices. If device_ids is given,
+        only those devices are included.
+        """
+        devices = self.devices
+        sweep_order = [
+            (devices.find_devices(devices.SWITCH), self.execute_switch, ()),
+            # Execute D-type devices before clocks to catch the rising edge
+            # of the clock
+            (devices.find_devices(devices.D_TYPE), self.execute_d_type, ()),
+            (devices.find_devices(devices.CLOCK), self.execute_clock, ()),
+            (devices.find_devices(devices.AND), self.execute_gate,
+             (devices.HIGH, devices.HIGH)),
+            (devices.find_devices(devices.OR), self.execute_gate,
+             (devices.LOW, devices.LOW)),
+            (devices.find_devices(devices.NAND), self.execute_gate,
+             (devices.HIGH, devices.LOW)),
+            (devices.find_devices(devices.NOR), self.execute_gate,
+             (devices.LOW, devices.HIGH)),
+            (devices.find_devices(devices.XOR), self.execute_gate,
+             (None, None)),
+            (devices.find_devices(devices.RC), self.execute_rc, ())]
+        if device_ids is not None:
+            sweep_order = [([device_id for device_id in kind_ids
+                             if device_id in device_ids], execute, arguments)
+                           for kind_ids, execute, arguments in sweep_order]
+        return sweep_order
+
+    def sweep_network(self, device_ids=None):
+        """Execute the devices kind-by-kind until the signals settle.
+
+        If device_ids is given, only those devices are executed. It must
+        include every device that can affect them, so their signals are the
+        same as if all the devices were executed.
+
+        Return True if successful and the network does not oscillate. If the
+        network oscillates, oscillating_devices lists the devices whose
+        signals keep changing.
+        """
+        sweep_order = self.get_sweep_order(device_ids)
+
+        # This sets clock signals to RISING or FALLING, where necessary
+        self.update_clocks()
+        self.oscillating_devices = []
+
+        # Sweep number after which each signal state was seen, by its hash
+        seen_states = {}
+        for iteration in range(self.get_iteration_limit() - 1):
+            self.steady_state = True
+            if not self.sweep_devices(sweep_order):
+                return False
             if self.steady_state:
                 break
+            if iteration < self.GRACE_SWEEPS:
+                continue
+            state = hash(self.get_signal_state())
+            if state in seen_states:  # the signals go round a loop
+                self.oscillating_devices = self.find_oscillating_devices(
+                    sweep_order, iteration - seen_states[state])
+                break
+            seen_states[state] = iteration
+        else:  # the last sweep shows which devices are still changing
+            self.steady_state = True
+            self.oscillating_devices = self.find_oscillating_devices(
+                sweep_order, 1)
         self.global_counter += 1
         return self.steady_state
@@ -9,10 +9,9 @@ Classes
 Parser - parses the definition file and builds the logic network.
 """
 
-import builtins
-import wx
-
-builtins._ = wx.GetTranslation
+# Change this whenever the network built by the parser changes, to
+# invalidate cached networks
+PARSER_VERSION = "2"
 
 
 class Parser:
@@ -31,19 +30,50 @@ class Parser:
     network: instance of the network.Network() class.
     monitors: instance of the monitors.Monitors() class.
     scanner: instance of the scanner.Scanner() class.
+    cache: instance of the netcache.NetlistCache() class, or None to parse
+           the file every time.
 
     Public methods
     --------------
     parse_network(self): Parses the circuit definition file.
     """
 
-    def __init__(self, names, devices, network, monitors, scanner):
+    def __init__(self, names, devices, network, monitors, scanner,
+                 cache=None):
         """Initialise constants."""
         self.names = names
         self.devices = devices
         self.network = network
         self.monitors = monitors
         self.scanner = scanner
+        self.cache = cache
+
+        # Parser of each statement, keyed by its keyword ID
+        self.statement_parsers = {scanner.DEF_ID: self.parse_def,
+                                  scanner.CONNECT_ID: self.parse_con,
+                                  scanner.MONITOR_ID: self.parse_monitor}
+
+        # Syntax of each device type, keyed by its name ID, as
+        # (device kind, minimum, maximum, message) where the device property
+        # is a number from minimum to maximum (None for no limit), and the
+        # message is the error for an invalid property. The message is None
+        # for device types without a property.
+        gate_inputs = (1, devices.max_gate_inputs,
+                       'Expected number of input pins 1-16')
+        self.device_syntax = {
+            scanner.AND_ID: (devices.AND,) + gate_inputs,
+            scanner.OR_ID: (devices.OR,) + gate_inputs,
+            scanner.NAND_ID: (devices.NAND,) + gate_inputs,
+            scanner.NOR_ID: (devices.NOR,) + gate_inputs,
+            scanner.XOR_ID: (devices.XOR, None, None, None),
+            scanner.DTYPE_ID: (devices.D_TYPE, None, None, None),
+            scanner.CLOCK_ID: (devices.CLOCK, 1, None,
+                               'Expected half period of type INT'),
+            scanner.SWITCH_ID: (devices.SWITCH, 0, 1,
+                                'Expected state 0 or 1'),
+            scanner.RC_ID: (devices.RC, 0, None,
+                            'Expected fall time of type INT')}
+        self.loaded_from_cache = False
         [self.SYNTAX_ERROR] = self.names.unique_error_codes(1)
         self.error_count = 0
         self.error_list = []
@@ -53,33 +83,23 @@ class Parser:
         # For now just return True, so that userint and gui can run in the
         # skeleton code. When complete, should return False when there are
         # errors in the circuit definition file.
+        self.loaded_from_cache = self.cache is not None and self.cache.load(
+            self.scanner.path, self.names, self.devices, self.network,
+            self.monitors)
+        if self.loaded_from_cache:
+            print('\n Network loaded from cache. Number of errors '
+                  'identified: ', self.error_count, '\n')
+            return True
+
         symbol = self.scanner.get_symbol()
 
         # get the first symbol fo the expression
         while symbol.type != self.scanner.EOF:
             if symbol.type == self.scanner.KEYWORD:
-                if self.names.get_name_string(
-                        symbol.id) in self.scanner.keywords_list:
-                    if symbol.id == self.names.query('DEF'):
-                        self.parse_def()
-                    elif symbol.id == self.names.query('CON'):
-                        if self.error_count == 0:
-                            self.parse_con()
-                        else:
-                            self.skip_statement()
-                    elif symbol.id == self.names.query('MONITOR'):
-                        self.parse_monitor()
-                    else:
-                        self.error(
-                            err=self.SYNTAX_ERROR,
-                            msg='Expected keyword DEF, CON or MONITOR. \
-                                IF you see this message, you are in trouble.',
-                            symbol=symbol)
+                if symbol.id == self.scanner.CONNECT_ID and self.error_count:
+                    self.skip_statement()
                 else:
-                    self.error(
-                        err=self.SYNTAX_ERROR,
-                        msg='Expected keyword DEF, CON or MONITOR.',
-                        symbol=symbol)
+                    self.statement_parsers[symbol.id]()
             else:
                 self.error(
                     err=self.SYNTAX_ERROR,
@@ -91,6 +111,9 @@ class Parser:
             '\n Parsing complete. Number of errors identified: ',
             self.error_count,
             '\n')
+        if self.cache is not None and self.error_count == 0:
+            self.cache.store(self.scanner.path, self.names, self.devices,
+                             self.network, self.monitors)
         return True
 
     def parse_def(self):
@@ -135,16 +158,10 @@ class Parser:
 
         # expected devicetype
         symbol = self.scanner.get_symbol()
-        if symbol.type == self.scanner.DEVICE:
-            if self.names.get_name_string(
-                    symbol.id) in self.scanner.devices_list:
-                device_kind_id = symbol.id  # expect "AND"
-            else:
-                self.error(
-                    err=self.SYNTAX_ERROR,
-                    msg='Expected device type.',
-                    symbol=symbol)
-                return False
+        if symbol.type == self.scanner.DEVICE and \
+                symbol.id in self.device_syntax:
+            (device_kind, minimum, maximum,
+             message) = self.device_syntax[symbol.id]
         else:
             self.error(
                 err=self.SYNTAX_ERROR,
@@ -152,29 +169,30 @@ class Parser:
                 symbol=symbol)
             return False
 
-        if self.names.get_name_string(device_kind_id) == 'AND':
-            self.parse_and(device_id, self.devices.AND)
-        elif self.names.get_name_string(device_kind_id) == 'OR':
-            self.parse_or(device_id, self.devices.OR)
-        elif self.names.get_name_string(device_kind_id) == 'NOR':
-            self.parse_nor(device_id, self.devices.NOR)
-        elif self.names.get_name_string(device_kind_id) == 'NAND':
-            self.parse_nand(device_id, self.devices.NAND)
-        elif self.names.get_name_string(device_kind_id) == 'XOR':
-            self.parse_xor(device_id, self.devices.XOR)
-        elif self.names.get_name_string(device_kind_id) == 'DTYPE':
-            self.parse_dtype(device_id, self.devices.D_TYPE)
-        elif self.names.get_name_string(device_kind_id) == 'CLOCK':
-            self.parse_clock(device_id, self.devices.CLOCK)
-        elif self.names.get_name_string(device_kind_id) == 'SWITCH':
-            self.parse_switch(device_id, self.devices.SWITCH)
-        elif self.names.get_name_string(device_kind_id) == 'RC':
-            self.parse_rc(device_id, self.devices.RC)
+        # expected deviceproperty, if the device type has one
+        if message is None:
+            self.devices.make_device(device_id, device_kind)
+        else:
+            symbol = self.scanner.get_symbol()
+            if symbol.type == self.scanner.NUMBER and \
+                    minimum <= int(symbol.id) and \
+                    (maximum is None or int(symbol.id) <= maximum):
+                self.devices.make_device(device_id, device_kind,
+                                         int(symbol.id))
+            else:
+                self.error(
+                    err=self.devices.INVALID_QUALIFIER,
+                    msg=message,
+                    symbol=symbol)
+                return False
+
+        symbol = self.scanner.get_symbol()
+        if symbol.type == self.scanner.SEMICOLON:
+            pass
         else:
             self.error(
                 err=self.SYNTAX_ERROR,
-                msg='Unknown device type.\
-                      If you see this message, you are in trouble.',
+                msg='Expected ";"',
                 symbol=symbol)
             return False
 
@@ -374,252 +392,6 @@ class Parser:
 
         return True
 
-    def parse_rc(self, device_id, device_kind):
-        """Parse the RC device."""
-        symbol = self.scanner.get_symbol()
-
-        if symbol.type == self.scanner.NUMBER:
-            # fall time
-            fall_time = int(symbol.id)
-            if fall_time >= 0:
-                self.devices.make_device(device_id, device_kind, fall_time)
-            else:
-                self.error(
-                    err=self.devices.INVALID_QUALIFIER,
-                    msg='Expected fall time > 0',
-                    symbol=symbol)
-                return False
-        else:
-            self.error(
-                err=self.devices.INVALID_QUALIFIER,
-                msg='Expected fall time of type INT',
-                symbol=symbol)
-            return False
-
-        symbol = self.scanner.get_symbol()
-        if symbol.type == self.scanner.SEMICOLON:
-            pass
-        else:
-            self.error(
-                err=self.SYNTAX_ERROR,
-                msg='Expected ";"',
-                symbol=symbol)
-            return False
-        return True
-
-    # parse devices
-
-    def parse_and(self, device_id, device_kind):
-        """Parse the AND device."""
-        symbol = self.scanner.get_symbol()
-
-        if symbol.type == self.scanner.NUMBER:
-            # number of gates
-            no_of_inputs = int(symbol.id)
-            if no_of_inputs >= 1 and no_of_inputs <= 16:
-                self.devices.make_device(device_id, device_kind, no_of_inputs)
-            else:
-                self.error(
-                    err=self.devices.INVALID_QUALIFIER,
-                    msg='Expected number of input pins 1-16',
-                    symbol=symbol)
-                return False
-        else:
-            self.error(
-                err=self.devices.INVALID_QUALIFIER,
-                msg='Expected number of input pins 1-16',
-                symbol=symbol)
-            return False
-
-        symbol = self.scanner.get_symbol()
-        if symbol.type == self.scanner.SEMICOLON:
-            pass
-        else:
-            self.error(
-                err=self.SYNTAX_ERROR,
-                msg='Expected ";"',
-                symbol=symbol)
-            return False
-        return True
-
-    def parse_or(self, device_id, device_kind):
-        """Parse the OR device."""
-        symbol = self.scanner.get_symbol()
-        if symbol.type == self.scanner.NUMBER:
-            no_of_inputs = int(symbol.id)
-            if no_of_inputs >= 1 and no_of_inputs <= 16:
-                self.devices.make_device(device_id, device_kind, no_of_inputs)
-            else:
-                self.error(
-                    err=self.devices.INVALID_QUALIFIER,
-                    msg='Expected number of input pins 1-16',
-                    symbol=symbol)
-                return False
-        else:
-            self.error(
-                err=self.devices.INVALID_QUALIFIER,
-                msg='Expected number of input pins 1-16',
-                symbol=symbol)
-            return False
-
-        symbol = self.scanner.get_symbol()
-        if symbol.type == self.scanner.SEMICOLON:
-            pass
-        else:
-            self.error(
-                err=self.SYNTAX_ERROR,
-                msg='Expected ";"',
-                symbol=symbol)
-            return False
-        return True
-
-    def parse_nor(self, device_id, device_kind):
-        """Parse the NOR device."""
-        symbol = self.scanner.get_symbol()
-        if symbol.type == self.scanner.NUMBER:
-            no_of_inputs = int(symbol.id)
-            if no_of_inputs >= 1 and no_of_inputs <= 16:
-                self.devices.make_device(device_id, device_kind, no_of_inputs)
-            else:
-                self.error(
-                    err=self.devices.INVALID_QUALIIER,
-                    msg='Expected number of input pins 1-16',
-                    symbol=symbol)
-                return False
-        else:
-            self.error(
-                err=self.devices.INVALID_QUALIFIER,
-                msg='Expected number of input pins 1-16',
-                symbol=symbol)
-            return False
-
-        symbol = self.scanner.get_symbol()
-        if symbol.type == self.scanner.SEMICOLON:
-            pass
-        else:
-            self.error(
-                err=self.SYNTAX_ERROR,
-                msg='Expected ";"',
-                symbol=symbol)
-            return False
-        return True
-
-    def parse_nand(self, device_id, device_kind):
-        """Parse the NAND device."""
-        symbol = self.scanner.get_symbol()
-        if symbol.type == self.scanner.NUMBER:
-            no_of_inputs = int(symbol.id)
-            if no_of_inputs >= 1 and no_of_inputs <= 16:
-                self.devices.make_device(device_id, device_kind, no_of_inputs)
-            else:
-                self.error(
-                    err=self.devices.INVALID_QUALIFIER,
-                    msg='Expected number of input pins 1-16',
-                    symbol=symbol)
-                return False
-        else:
-            self.error(
-                err=self.devices.INVALID_QUALIFIER,
-                msg='Expected number of input pins 1-16',
-                symbol=symbol)
-            return False
-
-        symbol = self.scanner.get_symbol()
-        if symbol.type == self.scanner.SEMICOLON:
-            pass
-        else:
-            self.error(
-                err=self.SYNTAX_ERROR,
-                msg='Unexpected argument. Expected ";"',
-                symbol=symbol)
-            return False
-
-        return True
-
-    def parse_xor(self, device_id, device_kind):
-        """Parse the XOR device."""
-        self.devices.make_device(device_id, device_kind)
-
-        symbol = self.scanner.get_symbol()
-        if symbol.type == self.scanner.SEMICOLON:
-            pass
-        else:
-            self.error(
-                err=self.SYNTAX_ERROR,
-                msg='Expected ";"',
-                symbol=symbol)
-            return False
-
-    def parse_dtype(self, device_id, device_kind):
-        """Parse the DTYPE device."""
-        self.devices.make_device(device_id, device_kind)
-
-        symbol = self.scanner.get_symbol()
-        if symbol.type == self.scanner.SEMICOLON:
-            pass
-        else:
-            self.error(
-                err=self.SYNTAX_ERROR,
-                msg='Unexpected argument. Expected ";"',
-                symbol=symbol)
-            return False
-
-    def parse_clock(self, device_id, device_kind):
-        """Parse the CLOCK device."""
-        symbol = self.scanner.get_symbol()
-        if symbol.type == self.scanner.NUMBER:
-            half_period = int(symbol.id)
-            self.devices.make_device(device_id, device_kind, half_period)
-        else:
-            self.error(
-                err=self.devices.INVALID_QUALIFIER,
-                msg='Expected half period of type INT',
-                symbol=symbol)
-            return False
-
-        symbol = self.scanner.get_symbol()
-
-        if symbol.type == self.scanner.SEMICOLON:
-            pass
-        else:
-            self.error(
-                err=self.SYNTAX_ERROR,
-                msg='Expected ";"',
-                symbol=symbol)
-            return False
-
-    def parse_switch(self, device_id, device_kind):
-        """Parse the SWITCH device."""
-        symbol = self.scanner.get_symbol()
-        if symbol.type == self.scanner.NUMBER:
-            state = int(symbol.id)
-            if state == 0 or state == 1:
-                pass
-            else:
-                self.error(
-                    err=self.devices.INVALID_QUALIFIER,
-                    msg='Expected state 0 or 1',
-                    symbol=symbol)
-                return False
-
-            self.devices.make_device(device_id, device_kind, state)
-        else:
-            self.error(
-                err=self.devices.INVALID_QUALIFIER,
-                msg='Expected state 0 or 1',
-                symbol=symbol)
-            return False
-
-        symbol = self.scanner.get_symbol()
-        if symbol.type == self.scanner.SEMICOLON:
-            pass
-        else:
-            self.error(
-                err=self.SYNTAX_ERROR,
-                msg='Expected ";"',
-                symbol=symbol)
-            return False
-
     def error(self, err, msg, symbol):
         """Print an error message and skip the rest of the statement."""
         self.error_count += 1
@@ -8,6 +8,20 @@ Classes
 Scanner - reads definition file and translates characters into symbols.
 Symbol - encapsulates a symbol and stores its properties.
 """
+import itertools
+import re
+
+# Number of characters read from the definition file at a time
+BLOCK_SIZE = 1 << 20
+
+# Runs of characters that are scanned in one step
+NAME_CHARACTERS = re.compile(r"[^\W_]*")  # as in str.isalnum()
+NUMBER_CHARACTERS = re.compile(r"\d*")
+SPACES_AND_COMMENTS = re.compile(r"(?:\s|#[^\n]*\n?)*")
+# A symbol is a number, a name, an arrow, '-' and the following character,
+# any other single character, or nothing at the end of the file
+SYMBOL = re.compile(r"(?:\s|#[^\n]*\n?)*(\d+|[^\W_]+|->|-.?|.|)",
+                    re.DOTALL)
 
 
 class Symbol:
@@ -38,6 +52,12 @@ class Scanner:
     that the parser can use. It also skips over comments and irrelevant
     formatting characters, such as spaces and line breaks.
 
+    The file is read in blocks of BLOCK_SIZE characters, and names, numbers,
+    spaces and comments are matched with regular expressions, instead of
+    reading and concatenating one character at a time. The buffer keeps the
+    start of the previous and current lines, so that print_error does not
+    need to read the file again.
+
     Parameters
     ----------
     path: path to the circuit definition file.
@@ -79,61 +99,79 @@ class Scanner:
         self.devices_list.append('RC')
         [self.RC_ID] = self.names.lookup(['RC'])
 
+        # Symbol type of each reserved word
+        self.reserved_types = {}
+        for symbol_type, words in [(self.KEYWORD, self.keywords_list),
+                                   (self.DEVICE, self.devices_list),
+                                   (self.INPUT, self.inputs_list),
+                                   (self.OUTPUT, self.outputs_list)]:
+            for word in words:
+                self.reserved_types.setdefault(word, symbol_type)
+
         self.current_character = ' '
         self.current_line = 1
         self.character_number = -1
 
+        # current_character is self.buffer[self.index], or '' at end of file
+        self.buffer = self.current_character
+        self.index = 0
+        self.end_of_file = False
+        # Buffer indices where the previous and current lines start, or None
+        # if the line was too long to keep in the buffer
+        self.line_starts = [None, 1]
+
     def get_symbol(self):
         """Translate the next sequence of characters into a symbol."""
         symbol = Symbol()
-        self.skip_spaces()
-
-        if self.current_character.isalpha():  # NAME/ KEYWORD/ device/ i/o
-            name_string = self.get_name()
-            if name_string in self.keywords_list:
-                symbol.type = self.KEYWORD
-            elif name_string in self.devices_list:
-                symbol.type = self.DEVICE
-            elif name_string in self.inputs_list:
-                symbol.type = self.INPUT
-            elif name_string in self.outputs_list:
-                symbol.type = self.OUTPUT
-            else:
-                symbol.type = self.NAME
-            [symbol.id] = self.names.lookup([name_string])
-            # returns terminal IDs or add names to table
-
-        elif self.current_character.isdigit():  # number
-            symbol.id = self.get_number()
+        # Skip spaces and comments, and match the symbol that follows
+        match = SYMBOL.match(self.buffer, self.index)
+        if match.end() == len(self.buffer):  # may continue in the next block
+            match = self.match_pattern(SYMBOL)
+        (start, end) = match.span(1)
+        character = self.buffer[start:start + 1]
+
+        if character.isalpha():  # NAME/ KEYWORD/ device/ i/o
+            name_string = match.group(1)
+            symbol.type = self.reserved_types.get(name_string, self.NAME)
+            symbol.id = self.names.query(name_string)
+            if symbol.id is None:  # add new names to table
+                [symbol.id] = self.names.lookup([name_string])
+
+        elif character.isdigit():  # number
+            if character.isdecimal():
+                symbol.id = match.group(1)
+            else:  # other digits, such as superscripts, one at a time
+                self.move_to(start)
+                symbol.id = self.get_number()
+                end = self.index
             # symbol ID is the number (no ID for number, not in name table)
             symbol.type = self.NUMBER
 
-        elif self.current_character == '=':
+        elif character == '=':
             symbol.type = self.EQUALS
-            self.advance()
 
-        elif self.current_character == ';':
+        elif character == ';':
             symbol.type = self.SEMICOLON
-            self.advance()
 
-        elif self.current_character == '.':
+        elif character == '.':
             symbol.type = self.DOT
-            self.advance()
 
-        elif self.current_character == '-':
-            self.advance()
-            if self.current_character == '>':
+        elif character == '-':
+            if match.group(1) == '->':
                 symbol.type = self.ARROW
-                self.advance()
-            else:
-                self.advance()
+            end = start + 2  # the character after '-' is always skipped
 
-        elif self.current_character == '':  # end of file
+        elif character == '':  # end of file
             symbol.type = self.EOF
+            end = max(end, self.index)  # already past the end after a '-'
 
+        # Update the position as in move_to, but faster within a line
+        if self.buffer.rfind('\n', self.index + 1, end + 1) < 0:
+            self.character_number += end - self.index
+            self.index = end
+            self.current_character = self.buffer[end:end + 1]
         else:
-            self.advance()
-
+            self.move_to(end)
         symbol.line, symbol.position = self.current_line, self.character_number
         return symbol
 
@@ -146,18 +184,11 @@ class Scanner:
 
     def print_error(self, symbol):
         """Print error line with a marker for position."""
-        new_file = open(self.path, 'r')
-        lines = new_file.readlines()
-
-        error_line = ''
-        error_index = 0
-        error_length = 0
-
         if self.current_character == '\n':
-            error_line = lines[self.current_line - 2]
-            error_index = len(error_line) - 1
+            error_line = self.get_line(0)
+            error_index = len(error_line)
         else:
-            error_line = lines[self.current_line - 1]
+            error_line = self.get_line(1)
             error_index = self.character_number - 1
 
         if symbol.type in [None, self.SEMICOLON,
@@ -170,46 +201,105 @@ class Scanner:
         else:
             length = len(self.names.get_name_string(symbol.id))
 
-        print(error_line, end='')
-        if not error_line.endswith('\n'):
-            print('')
+        print(error_line)
         print(' ' * (error_index - length) + '^' * length)
 
-    def skip_spaces(self):
-        """Skip whitespace."""
+    def get_line(self, position):
+        """Return the previous (0) or current (1) line without its line break.
+
+        The line is read from the buffer, and the file is only read again if
+        the line was too long to keep.
+        """
+        while self.line_starts[position] is not None:
+            start = self.line_starts[position]
+            end = self.buffer.find('\n', start)
+            if end >= 0:
+                return self.buffer[start:end]
+            if not self.read_block():
+                return self.buffer[start:]
+
+        line_number = self.current_line - 1 + position
+        with open(self.path, 'r') as definition_file:
+            line = next(itertools.islice(definition_file, line_number - 1,
+                                         None), '')
+        return line.rstrip('\n')
+
+    def read_block(self):
+        """Read the next block of the file into the buffer.
+
+        Characters before the previous line are discarded, and so are the
+        previous and current lines once they are longer than BLOCK_SIZE.
+        Return False at the end of the file.
+        """
+        if self.end_of_file:
+            return False
+        block = self.file.read(BLOCK_SIZE)
+        if not block:
+            self.end_of_file = True
+            return False
+        keep = self.index
+        for position, start in enumerate(self.line_starts):
+            if start is not None and self.index - start <= BLOCK_SIZE:
+                keep = min(keep, start)
+            else:
+                self.line_starts[position] = None
+        self.buffer = self.buffer[keep:] + block
+        self.index -= keep
+        self.line_starts = [None if start is None else start - keep
+                            for start in self.line_starts]
+        return True
+
+    def match_pattern(self, pattern, offset=0):
+        """Match pattern offset characters after the current character.
+
+        More blocks are read while the match reaches the end of the buffer.
+        Return the match object.
+        """
         while True:
-            if self.current_character.isspace():
-                self.advance()
-            # skip comment line
-            elif self.current_character == '#':
-                while self.current_character != '\n':
-                    self.advance()
-                self.advance()
+            match = pattern.match(self.buffer, self.index + offset)
+            if match.end() < len(self.buffer) or not self.read_block():
+                return match
+
+    def move_to(self, index):
+        """Move to the character at the specified buffer index.
+
+        The line and character numbers are updated as if advance() had been
+        called for each character.
+        """
+        buffer = self.buffer
+        newline = buffer.rfind('\n', self.index + 1, index + 1)
+        if newline < 0:
+            self.character_number += index - self.index
+        else:
+            newlines = buffer.count('\n', self.index + 1, newline + 1)
+            self.current_line += newlines
+            self.character_number = index - newline
+            if newlines == 1:
+                self.line_starts = [self.line_starts[1], newline + 1]
             else:
-                break
+                self.line_starts = [buffer.rfind('\n', 0, newline) + 1,
+                                    newline + 1]
+        self.index = index
+        self.current_character = buffer[index:index + 1]
+
+    def skip_spaces(self):
+        """Skip whitespace and comment lines."""
+        if self.current_character.isspace() or self.current_character == '#':
+            self.move_to(self.match_pattern(SPACES_AND_COMMENTS).end())
 
     def advance(self):
         """Read one further character into the document."""
-        self.current_character = self.file.read(1)
-        self.character_number += 1
-
-        if self.current_character == '\n':
-            self.current_line += 1
-            self.character_number = 0
+        if self.index + 1 >= len(self.buffer):
+            self.read_block()
+        self.move_to(self.index + 1)
         return self.current_character
 
     def get_name(self):
         """Return next Name."""
-        name = self.current_character
-        while True:
-            self.current_character = self.advance()
-            if (
-                self.current_character.isalnum() or
-                self.character_number == '_'
-            ):
-                name = name + self.current_character
-            else:
-                return name
+        end = self.match_pattern(NAME_CHARACTERS, 1).end()
+        name = self.current_character + self.buffer[self.index + 1:end]
+        self.move_to(end)
+        return name
 
     def get_number(self):
         """
@@ -217,10 +307,7 @@ class Scanner:
 
         Return the number (or None) and the next non-numeric character.
         """
-        number = self.current_character
-        while True:
-            self.current_character = self.advance()
-            if self.current_character.isdigit():
-                number = number + self.current_character
-            else:
-                return number
+        end = self.match_pattern(NUMBER_CHARACTERS, 1).end()
+        number = self.current_character + self.buffer[self.index + 1:end]
+        self.move_to(end)
+        return number
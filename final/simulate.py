@@ -0,0 +1,222 @@
+"""Run the network and record the monitored signals.
+
+Used in the Logic Simulator project by the user interfaces to run
+simulations. Cycles in which nothing changes are skipped, and periodic
+networks can be extrapolated instead of simulated, so long runs are fast.
+The network state can be kept every few cycles, so that a run is quickly
+re-simulated after a switch is set at an earlier cycle.
+
+Classes
+-------
+Checkpoints - keeps the network state during a run to re-simulate it.
+
+Functions
+---------
+run_network - runs the network for a number of cycles.
+"""
+import bisect
+
+
+class Checkpoints:
+    """Keep the network state during a run to re-simulate it.
+
+    The state of every device is saved once every interval cycles of the
+    run, and the switch states are saved at the start of every run or
+    continued run. When a switch is set at an earlier cycle, the run is
+    re-simulated from the nearest saved state before that cycle, and only
+    the devices that the switch can affect, and those they depend on, are
+    executed. The traces of the monitors on the affected devices are
+    updated in place.
+
+    To bound the memory used by long runs, every other saved state is
+    forgotten and the interval doubled once there are more than max_states.
+
+    Parameters
+    ----------
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class.
+    interval: number of cycles between saved states.
+    max_states: maximum number of saved states.
+
+    Public methods
+    --------------
+    reset(self, cycle=0): Forgets the saved states, at the start of a run
+                          or when a run is loaded at the cycle.
+
+    get_cycle(self): Returns the number of cycles run since the reset.
+
+    get_first_cycle(self): Returns the first cycle that the run can be
+                           re-simulated from.
+
+    record(self, new_run=False): Saves the network state if interval cycles
+                                 have passed since the last saved state.
+
+    set_switch(self, switch_id, switch_state, cycle): Sets the switch from
+                        the cycle of the run and re-simulates the rest of it.
+    """
+
+    def __init__(self, network, monitors, interval=100, max_states=32):
+        """Initialise the saved states."""
+        self.network = network
+        self.monitors = monitors
+        self.devices = network.devices
+        self.first_interval = interval
+        self.max_states = max_states
+        self.reset()
+
+    def reset(self, cycle=0):
+        """Forget the saved states, at the start of a run.
+
+        cycle is the number of cycles already run, when a run is loaded
+        from a snapshot. It cannot be re-simulated before that cycle.
+        """
+        self.start_counter = self.network.global_counter - cycle
+        self.interval = self.first_interval
+        self.cycles = []  # cycles of the saved states, in order
+        self.states = {}  # stores {cycle: network state}
+        # stores {cycle: {switch_id: switch_state}} at the start of each run
+        self.switch_states = {}
+
+    def get_cycle(self):
+        """Return the number of cycles run since the reset."""
+        return self.network.global_counter - self.start_counter
+
+    def get_first_cycle(self):
+        """Return the first cycle that the run can be re-simulated from."""
+        if self.cycles:
+            return self.cycles[0]
+        return self.get_cycle()
+
+    def record(self, new_run=False):
+        """Save the network state if interval cycles have passed.
+
+        This is called before each cycle of a run is executed, with new_run
+        True for the first cycle of a run or continued run.
+        """
+        cycle = self.get_cycle()
+        if new_run:  # switches may have been set since the previous run
+            self.switch_states[cycle] = {
+                device_id: self.devices.get_device(device_id).switch_state
+                for device_id in self.devices.find_devices(
+                    self.devices.SWITCH)}
+        if self.cycles and cycle < self.cycles[-1] + self.interval:
+            return
+        self.cycles.append(cycle)
+        self.states[cycle] = self.network.save_state()
+        if len(self.cycles) > self.max_states:
+            for forgotten in self.cycles[1::2]:
+                del self.states[forgotten]
+            self.cycles = self.cycles[::2]
+            self.interval *= 2
+
+    def set_switch(self, switch_id, switch_state, cycle):
+        """Set the switch from the cycle of the run and re-simulate the rest.
+
+        The switch keeps the new state until the end of the run, as if it
+        had been set before that cycle was run. The VCD file, if any, is not
+        rewritten. Return True if successful, and False if the run cannot be
+        re-simulated from the cycle or the network oscillates.
+        """
+        network = self.network
+        devices = self.devices
+        end_cycle = self.get_cycle()
+        if not self.get_first_cycle() <= cycle <= end_cycle:
+            return False
+        if cycle == end_cycle:  # there is nothing to re-simulate
+            devices.set_switch(switch_id, switch_state)
+            return True
+        affected_ids = network.get_fan_out_cone(switch_id)
+        executed_ids = network.get_fan_in_cone(affected_ids)
+        end_state = network.save_state()
+        for run_cycle, switch_states in self.switch_states.items():
+            if run_cycle >= cycle:
+                switch_states[switch_id] = switch_state
+
+        # Start from the nearest saved state before the cycle
+        current = self.cycles[bisect.bisect_right(self.cycles, cycle) - 1]
+        network.restore_state(self.states[current])
+        network.global_counter = self.start_counter + current
+        monitored = [(key, trace) for key, trace
+                     in self.monitors.monitors_dictionary.items()
+                     if key[0] in affected_ids]
+        for key, trace in monitored:
+            trace.truncate(cycle)
+        # Cycles at which the executed devices may change other than by
+        # executing them, in order
+        stops = sorted(set(self.cycles).union(self.switch_states, [cycle]))
+
+        while current < end_cycle:
+            for device_id, state in self.switch_states.get(current,
+                                                           {}).items():
+                if device_id in executed_ids:
+                    devices.get_device(device_id).switch_state = state
+            if current == cycle:
+                devices.set_switch(switch_id, switch_state)
+            if current in self.states and current >= cycle:
+                self.states[current].update(network.save_state(executed_ids))
+            if not network.sweep_network(executed_ids):
+                return False
+
+            # Skip the following cycles in which nothing changes
+            next_stop = bisect.bisect_right(stops, current)
+            stop = end_cycle
+            if next_stop < len(stops):
+                stop = min(stop, stops[next_stop])
+            count = 1 + network.fast_forward(stop - current - 1)
+            if current >= cycle:
+                for (device_id, output_id), trace in monitored:
+                    trace.append(self.monitors.get_monitor_signal(
+                        device_id, output_id), count)
+            current += count
+
+        # The devices that were not executed are as they were at the end
+        network.restore_state({device_id: state for device_id, state
+                               in end_state.items()
+                               if device_id not in executed_ids})
+        return True
+
+
+def run_network(network, monitors, cycles, extrapolate=False,
+                checkpoints=None):
+    """Run the network for cycles and record the monitored signals.
+
+    After every executed cycle, the following cycles in which nothing
+    changes are skipped. If extrapolate is True, the network state is also
+    compared once every period of the clocks, and once it repeats the
+    remaining whole periods are copied in the traces without simulating
+    them. The network is left in the same state as if they were simulated.
+    If checkpoints is given, it saves the network state during the run.
+
+    Return True if successful, and False if the network oscillates.
+    """
+    period = network.get_period() if extrapolate else None
+    # (global counter, state) of the network to compare a period later
+    checkpoint = None
+    cycle = 0
+    while cycle < cycles:
+        if checkpoints is not None:
+            checkpoints.record(new_run=cycle == 0)
+        if not network.execute_network():
+            return False
+        monitors.record_signals()
+        cycle += 1
+
+        if extrapolate and cycles - cycle >= period:
+            counter = network.global_counter
+            if checkpoint is None or counter > checkpoint[0] + period:
+                checkpoint = (counter, network.get_cycle_state())
+            elif counter == checkpoint[0] + period:
+                state = network.get_cycle_state()
+                if state is not None and state == checkpoint[1]:
+                    repeated = (cycles - cycle) // period * period
+                    monitors.repeat_signals(period, repeated)
+                    network.global_counter += repeated
+                    cycle += repeated
+                checkpoint = (counter, state)
+
+        # Skip the following cycles in which nothing changes
+        skipped = network.fast_forward(cycles - cycle)
+        if skipped:
+            monitors.record_signals(skipped)
+            cycle += skipped
+    return True
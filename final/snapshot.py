@@ -0,0 +1,161 @@
+"""Save and load snapshots of a simulation.
+
+Used in the Logic Simulator project so that long simulations can be split
+across several runs of the program. A snapshot holds the state of every
+device, the global counter and the monitored traces in a compressed JSON
+file, which holds no code, so snapshots can be passed between jobs safely.
+It is loaded into a network parsed from the same definition file to
+continue the simulation.
+
+Functions
+---------
+get_fingerprint - returns a hash identifying the devices of a network.
+save_snapshot - writes a snapshot of the simulation to a file.
+load_snapshot - restores a snapshot of the simulation from a file.
+"""
+import array
+import base64
+import hashlib
+import json
+import zlib
+
+from monitors import SignalTrace
+
+# Changed whenever the snapshot format changes
+SNAPSHOT_VERSION = "2"
+
+
+def get_fingerprint(names, devices):
+    """Return a hash of the devices of a network and their connections.
+
+    The hash covers the name, kind, clock half period, RC fall time,
+    outputs and connected inputs of every device. A snapshot can only be
+    loaded into a network with the same fingerprint.
+    """
+    fingerprint = hashlib.sha256(SNAPSHOT_VERSION.encode())
+    for device in devices.devices_list:
+        output_names = [names.get_name_string(output_id)
+                        if output_id is not None else "" for output_id
+                        in device.outputs]
+        input_names = ["=".join([names.get_name_string(input_id),
+                                 str(devices.get_signal_name(*connection))
+                                 if connection is not None else ""])
+                       for input_id, connection in device.inputs.items()]
+        fingerprint.update(" ".join(
+            [names.get_name_string(device.device_id),
+             names.get_name_string(device.device_kind),
+             str(device.clock_half_period), str(device.fall_time)] +
+            output_names + input_names).encode() + b"\n")
+    return fingerprint.hexdigest()
+
+
+def encode(data):
+    """Return bytes as a string that can be stored in JSON."""
+    return base64.b64encode(data).decode('ascii')
+
+
+def decode(text):
+    """Return the bytes of a string made by encode."""
+    return base64.b64decode(text.encode('ascii'), validate=True)
+
+
+def save_snapshot(path, network, monitors, cycles_completed):
+    """Write a snapshot of the simulation after cycles_completed cycles.
+
+    Signals and states are stored as base64 encoded arrays, with -1 for a
+    state the device does not have. Return True if successful.
+    """
+    devices = network.devices
+    devices_list = devices.devices_list
+    outputs = array.array('b')
+    for device in devices_list:
+        outputs.extend(device.outputs.values())
+    traces = [(devices.get_signal_name(device_id, output_id),
+               encode(trace.levels.tobytes()), encode(trace.ends.tobytes()))
+              for (device_id, output_id), trace
+              in monitors.monitors_dictionary.items()]
+
+    def states(attribute, typecode):
+        return encode(array.array(typecode, [
+            -1 if getattr(device, attribute) is None
+            else getattr(device, attribute)
+            for device in devices_list]).tobytes())
+
+    snapshot = {"fingerprint": get_fingerprint(network.names, devices),
+                "cycles_completed": cycles_completed,
+                "global_counter": network.global_counter,
+                "outputs": encode(outputs.tobytes()),
+                "dtype_memory": states("dtype_memory", 'b'),
+                "clock_counter": states("clock_counter", 'q'),
+                "switch_state": states("switch_state", 'b'),
+                "traces": traces}
+    try:
+        with open(path, 'wb') as snapshot_file:
+            snapshot_file.write(zlib.compress(
+                json.dumps(snapshot).encode(), 1))
+    except OSError:
+        return False
+    return True
+
+
+def load_snapshot(path, network, monitors):
+    """Restore a snapshot of the simulation from a file.
+
+    The network must be parsed from the same definition file as the one
+    the snapshot was saved from. Return the number of cycles completed, or
+    None if the file cannot be read or is a snapshot of another network.
+    """
+    devices = network.devices
+    devices_list = devices.devices_list
+    try:
+        with open(path, 'rb') as snapshot_file:
+            snapshot = json.loads(zlib.decompress(snapshot_file.read()))
+        if snapshot["fingerprint"] != get_fingerprint(network.names,
+                                                      devices):
+            return None
+        output_signals = array.array('b', decode(snapshot["outputs"]))
+        if len(output_signals) != sum(len(device.outputs)
+                                      for device in devices_list):
+            return None
+        signals = iter(output_signals)
+        states = {}
+        for attribute, typecode in [("dtype_memory", 'b'),
+                                    ("clock_counter", 'q'),
+                                    ("switch_state", 'b')]:
+            states[attribute] = array.array(typecode,
+                                            decode(snapshot[attribute]))
+            if len(states[attribute]) != len(devices_list):
+                return None
+        traces = []
+        for signal_name, levels, ends in snapshot["traces"]:
+            trace = SignalTrace()
+            trace.levels.frombytes(decode(levels))
+            trace.ends.frombytes(decode(ends))
+            (device_id, output_id) = devices.get_signal_ids(signal_name)
+            device = devices.get_device(device_id)
+            if device is None or output_id not in device.outputs or \
+                    len(trace.levels) != len(trace.ends):
+                return None
+            traces.append(((device_id, output_id), trace))
+        cycles_completed = int(snapshot["cycles_completed"])
+        global_counter = int(snapshot["global_counter"])
+    except (OSError, zlib.error, UnicodeDecodeError, AttributeError,
+            KeyError, TypeError, ValueError):
+        return None
+
+    state = {}
+    for number, device in enumerate(devices_list):
+        outputs = {output_id: next(signals) for output_id in device.outputs}
+        state[device.device_id] = tuple(
+            [outputs] + [None if states[attribute][number] == -1
+                         else states[attribute][number] for attribute
+                         in ["dtype_memory", "clock_counter",
+                             "switch_state"]])
+    network.restore_state(state)
+    network.global_counter = global_counter
+    monitors.monitors_dictionary.clear()
+    for (device_id, output_id), trace in traces:
+        monitors.monitors_dictionary[(device_id, output_id)] = trace
+    if monitors.vcd_writer is not None:
+        monitors.vcd_writer.time = cycles_completed
+    return cycles_completed
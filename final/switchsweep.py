@@ -0,0 +1,115 @@
+"""Simulate every setting of a set of switches in parallel processes.
+
+Used in the Logic Simulator project to build truth tables, and tables of
+traces for sequential networks. Every switch setting, called an assignment,
+is simulated from the same starting state. The assignments are split into
+chunks, which are shared by a pool of worker processes with workerpool.
+Each worker simulates the assignments of each chunk together with
+bitparallel.BitParallelSimulator.
+
+Functions
+---------
+get_assignment - returns the switch states of an assignment.
+load_worker - sets up a worker process to simulate assignments.
+run_assignments - simulates a chunk of assignments in a worker process.
+sweep_switches - simulates every assignment of the switches.
+format_table - returns the lines of a table of the results.
+"""
+from bitparallel import BitParallelSimulator
+from workerpool import get_chunks, run_chunks, worker
+
+
+def get_assignment(number, switch_count):
+    """Return the switch states of assignment number as a tuple.
+
+    The assignments count up in binary, with the first switch as the most
+    significant bit.
+    """
+    return tuple(number >> (switch_count - 1 - switch) & 1
+                 for switch in range(switch_count))
+
+
+def load_worker(network, monitors, switch_ids, cycles):
+    """Set up a worker process to simulate assignments of the switches."""
+    worker["simulator"] = BitParallelSimulator(network.names, network.devices,
+                                               network, monitors)
+    worker["switch_ids"] = switch_ids
+    worker["cycles"] = cycles
+
+
+def run_assignments(start, stop):
+    """Simulate the assignments from start up to stop in a worker process.
+
+    Return a list of the monitored traces of each assignment, as bytes of
+    the signal in each cycle, or None if the network oscillates.
+    """
+    simulator = worker["simulator"]
+    switch_ids = worker["switch_ids"]
+    scenarios = [dict(zip(switch_ids, get_assignment(number,
+                                                     len(switch_ids))))
+                 for number in range(start, stop)]
+    if not simulator.run(scenarios, worker["cycles"]):
+        return None
+    return [tuple(bytes(trace) for trace in
+                  simulator.get_traces(scenario).values())
+            for scenario in range(len(scenarios))]
+
+
+def sweep_switches(network, monitors, switch_ids, cycles, processes=None,
+                   chunk_size=None):
+    """Simulate every assignment of the switches for cycles.
+
+    Every assignment starts from the current state of the devices, which is
+    left unchanged. processes is the number of worker processes, by default
+    one for each CPU. With one process, the assignments are simulated
+    without starting a pool.
+
+    Return a list of (switch states, traces) rows in the order of
+    get_assignment, where traces holds the signals of each monitor in
+    monitors, as bytes of the signal in each cycle. Return None if the
+    network oscillates for any assignment.
+    """
+    assignment_count = 1 << len(switch_ids)
+    # Large chunks make the most of the bit-parallel simulation
+    (processes, chunks) = get_chunks(assignment_count, processes, chunk_size,
+                                     max_chunk_size=4096)
+    results = run_chunks(run_assignments, chunks, network, monitors,
+                         load_worker, (list(switch_ids), cycles), processes)
+
+    rows = []
+    for (start, stop), traces in zip(chunks, results):
+        if traces is None:
+            return None
+        for number, assignment_traces in zip(range(start, stop), traces):
+            rows.append((get_assignment(number, len(switch_ids)),
+                         assignment_traces))
+    return rows
+
+
+def format_table(devices, monitors, switch_ids, rows):
+    """Return the lines of a table of the results of sweep_switches.
+
+    Each row shows the switch states, then the trace of each monitor with
+    the same symbols as Monitors.display_signals().
+    """
+    symbols = {devices.LOW: "_", devices.HIGH: "-",
+               devices.RISING: "/", devices.FALLING: "\\",
+               devices.BLANK: " "}
+    switch_names = [devices.get_signal_name(switch_id, None)
+                    for switch_id in switch_ids]
+    signal_names = [devices.get_signal_name(device_id, output_id)
+                    for device_id, output_id in monitors.monitors_dictionary]
+    widths = [len(name) for name in switch_names]
+    if rows:
+        trace_length = len(rows[0][1][0]) if rows[0][1] else 0
+        widths += [max(len(name), trace_length) for name in signal_names]
+
+    lines = [" ".join(name.ljust(width) for name, width
+                      in zip(switch_names + signal_names, widths)).rstrip()]
+    for switch_states, traces in rows:
+        cells = [str(state) for state in switch_states]
+        cells += ["".join(symbols.get(signal, "?") for signal in trace)
+                  for trace in traces]
+        lines.append(" ".join(cell.ljust(width) for cell, width
+                              in zip(cells, widths)).rstrip())
+    return lines
@@ -0,0 +1,30 @@
+"""Test the arraynet module."""
+import pytest
+
+from test_levelize import make_random_network, run_random_network
+
+pytest.importorskip("numpy")
+from arraynet import ArrayEngine  # noqa: E402
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_traces_match_sweep_network(seed):
+    """Test if the array engine gives the same results as sweeping."""
+    assert (run_random_network(seed, ArrayEngine,
+                               any_inputs=(seed % 3 == 0)) ==
+            run_random_network(seed, any_inputs=(seed % 3 == 0)))
+
+
+def test_round_trip():
+    """Test if the arrays are stored back into the Device objects."""
+    names, devices, network, monitors, switch_ids = make_random_network(4)
+    engine = ArrayEngine(names, devices, network)
+    network.set_engine(engine)
+    assert engine.levelized
+    assert network.execute_network()
+
+    for signal_index, (device, output_id) in enumerate(engine.output_keys):
+        assert device.outputs[output_id] == engine.signals[signal_index]
+    for device, memory in zip(engine.d_type_devices, engine.dtype_memory):
+        assert device.dtype_memory == memory
+        assert isinstance(device.dtype_memory, int)
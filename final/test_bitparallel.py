@@ -0,0 +1,64 @@
+"""Test the bitparallel module."""
+import random
+
+import pytest
+
+from bitparallel import BitParallelSimulator
+from test_levelize import make_random_network
+
+
+def make_scenarios(seed, switch_ids):
+    """Return a random list of switch configurations."""
+    rng = random.Random(seed)
+    return [{switch_id: rng.randrange(2) for switch_id in switch_ids}
+            for _ in range(rng.randrange(1, 70))]
+
+
+def run_scenario(seed, any_inputs, scenario, cycles):
+    """Return the traces of one scenario simulated with sweep_network."""
+    names, devices, network, monitors, switch_ids = make_random_network(
+        seed, any_inputs)
+    for switch_id, switch_state in scenario.items():
+        devices.set_switch(switch_id, switch_state)
+    for _ in range(cycles):
+        if not network.execute_network():
+            break
+        monitors.record_signals()
+    return monitors.monitors_dictionary
+
+
+@pytest.mark.parametrize("seed, any_inputs", [
+    (seed, any_inputs) for seed in range(6) for any_inputs in [False, True]
+])
+def test_traces_match_sweep_network(seed, any_inputs):
+    """Test if every scenario gives the same traces as sweep_network."""
+    names, devices, network, monitors, switch_ids = make_random_network(
+        seed, any_inputs)
+    scenarios = make_scenarios(seed, switch_ids)
+    simulator = BitParallelSimulator(names, devices, network, monitors)
+    simulator.run(scenarios, 20)
+    if not any_inputs:  # these networks are all simulated in parallel
+        assert simulator.scenario_traces is None
+
+    for scenario_number, scenario in enumerate(scenarios):
+        assert simulator.get_traces(scenario_number) == run_scenario(
+            seed, any_inputs, scenario, 20)
+
+
+def test_unpack_monitors():
+    """Test if the traces of a scenario are stored in the monitors."""
+    names, devices, network, monitors, switch_ids = make_random_network(3)
+    simulator = BitParallelSimulator(names, devices, network, monitors)
+    scenarios = [{switch_id: 0 for switch_id in switch_ids},
+                 {switch_id: 1 for switch_id in switch_ids}]
+    assert simulator.run(scenarios, 12)
+    [SW0_ID] = names.lookup(["Sw0"])
+
+    simulator.unpack_monitors(1, monitors)
+    assert monitors.monitors_dictionary[(SW0_ID, None)] == [1] * 12
+    simulator.unpack_monitors(0, monitors)
+    assert monitors.monitors_dictionary[(SW0_ID, None)] == [0] * 12
+
+    # The devices are left in their initial state
+    assert network.global_counter == 0
+    assert devices.get_device(SW0_ID).outputs[None] == devices.LOW
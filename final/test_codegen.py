@@ -0,0 +1,89 @@
+"""Test the codegen module."""
+import functools
+import os
+
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from codegen import CodeGenEngine
+from test_levelize import make_random_network, run_random_network
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_traces_match_sweep_network(seed):
+    """Test if the generated code gives the same results as sweeping."""
+    assert (run_random_network(seed, CodeGenEngine,
+                               any_inputs=(seed % 3 == 0)) ==
+            run_random_network(seed, any_inputs=(seed % 3 == 0)))
+
+
+def test_code_is_cached(tmp_path):
+    """Test if the compiled code is cached by definition file."""
+    definition_path = tmp_path / "circuit.txt"
+    definition_path.write_text("DEF SW1 = SWITCH 1 ;\n")
+    cache_dir = str(tmp_path / "cache")
+    engine_kwargs = {"path": str(definition_path), "cache_dir": cache_dir}
+
+    names, devices, network, monitors, switch_ids = make_random_network(4)
+    first_engine = CodeGenEngine(names, devices, network, **engine_kwargs)
+    network.set_engine(first_engine)
+    assert first_engine.levelized
+    assert not first_engine.loaded_from_cache
+    assert os.listdir(cache_dir) == [
+        os.path.basename(first_engine.get_cache_path())]
+
+    second_engine = CodeGenEngine(names, devices, network, **engine_kwargs)
+    network.set_engine(second_engine)
+    assert second_engine.loaded_from_cache
+    assert second_engine.source is None  # no code was generated
+
+    # The cached code gives the same results
+    assert (run_random_network(4, functools.partial(CodeGenEngine,
+                                                    **engine_kwargs)) ==
+            run_random_network(4))
+
+    # Changing the definition file changes the cache key
+    cache_path = first_engine.get_cache_path()
+    definition_path.write_text("DEF SW1 = SWITCH 0 ;\n")
+    assert first_engine.get_cache_path() != cache_path
+
+
+def test_cache_keeps_recently_used_code(tmp_path):
+    """Test if only the most recently used cached code is kept."""
+    cache_dir = str(tmp_path / "cache")
+    names, devices, network, monitors, switch_ids = make_random_network(4)
+
+    def set_engine(number):
+        definition_path = tmp_path / ("circuit%d.txt" % number)
+        definition_path.write_text("DEF SW%d = SWITCH 1 ;\n" % number)
+        engine = CodeGenEngine(names, devices, network, str(definition_path),
+                               cache_dir, cache_size=2)
+        network.set_engine(engine)
+        cache_path = engine.get_cache_path()
+        if not engine.loaded_from_cache:
+            os.utime(cache_path, (number, number))  # written in turn
+        return engine, os.path.basename(cache_path)
+
+    cache_names = [set_engine(number)[1] for number in range(3)]
+    assert sorted(os.listdir(cache_dir)) == sorted(cache_names[1:])
+
+    # Loading the code makes it the most recently used
+    (engine, _) = set_engine(1)
+    assert engine.loaded_from_cache
+    cache_names.append(set_engine(3)[1])
+    assert sorted(os.listdir(cache_dir)) == sorted([cache_names[1],
+                                                    cache_names[3]])
+
+
+def test_empty_network():
+    """Test if a network without devices is compiled and executed."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    engine = CodeGenEngine(names, devices, network)
+    network.set_engine(engine)
+    assert engine.levelized
+    assert network.execute_network()
+    assert network.global_counter == 1
@@ -1,4 +1,6 @@
 """Test the devices module."""
+import random
+
 import pytest
 
 from names import Names
@@ -52,6 +54,17 @@ def test_find_devices(devices_with_items):
     assert devices.find_devices(devices.XOR) == []
 
 
+def test_find_devices_returns_copy(devices_with_items):
+    """Test if changing a returned device list leaves the index intact."""
+    devices = devices_with_items
+    [AND1_ID] = devices.names.lookup(["And1"])
+
+    devices.find_devices(devices.AND).append(AND1_ID)
+    devices.find_devices().clear()
+    assert devices.find_devices(devices.AND) == [AND1_ID]
+    assert len(devices.find_devices()) == 3
+
+
 def test_make_device(new_devices):
     """Test if make_device correctly makes devices with their properties."""
     names = new_devices.names
@@ -148,3 +161,51 @@ def test_set_switch(new_devices):
     # Set switch Sw1 to LOW
     new_devices.set_switch(SW1_ID, new_devices.LOW)
     assert switch_object.switch_state == new_devices.LOW
+
+
+def test_make_device_keeps_existing_state(new_devices):
+    """Test if making a device does not cold start the existing devices."""
+    names = new_devices.names
+    [CL1_ID, D1_ID, CL2_ID, D2_ID] = names.lookup(["Clk1", "D1", "Clk2",
+                                                   "D2"])
+    new_devices.make_device(CL1_ID, new_devices.CLOCK, 1000)
+    new_devices.make_device(D1_ID, new_devices.D_TYPE)
+    clock = new_devices.get_device(CL1_ID)
+    d_type = new_devices.get_device(D1_ID)
+    clock.clock_counter = -1
+    clock.outputs[None] = new_devices.RISING
+    d_type.dtype_memory = new_devices.BLANK
+
+    new_devices.make_device(CL2_ID, new_devices.CLOCK, 1000)
+    new_devices.make_device(D2_ID, new_devices.D_TYPE)
+    assert clock.clock_counter == -1
+    assert clock.outputs[None] == new_devices.RISING
+    assert d_type.dtype_memory == new_devices.BLANK
+
+    # The new devices are still given a random starting state
+    assert 0 <= new_devices.get_device(CL2_ID).clock_counter < 1000
+    assert new_devices.get_device(D2_ID).dtype_memory in [new_devices.LOW,
+                                                          new_devices.HIGH]
+
+
+def test_cold_startup_is_seeded(new_devices):
+    """Test if cold start-ups with the same seed give the same state."""
+    names = new_devices.names
+    device_ids = names.lookup(["D" + str(i) for i in range(20)] +
+                              ["Clk" + str(i) for i in range(20)])
+    for device_id in device_ids[:20]:
+        new_devices.make_device(device_id, new_devices.D_TYPE)
+    for device_id in device_ids[20:]:
+        new_devices.make_device(device_id, new_devices.CLOCK, 5)
+
+    def get_state():
+        return [(device.dtype_memory, device.clock_counter,
+                 dict(device.outputs))
+                for device in new_devices.devices_list]
+
+    new_devices.cold_startup(random.Random(1))
+    state = get_state()
+    new_devices.cold_startup(random.Random(2))
+    assert get_state() != state
+    new_devices.cold_startup(random.Random(1))
+    assert get_state() == state
@@ -0,0 +1,158 @@
+"""Test the faultsim module."""
+import random
+
+import pytest
+
+import logsim
+from faultsim import FaultSimulator
+from test_levelize import make_random_network
+
+
+def make_vectors(seed, switch_ids, cycles):
+    """Return test vectors setting a random switch every few cycles."""
+    rng = random.Random(-seed)
+    return [{rng.choice(switch_ids): rng.randrange(2)} if cycle % 3 == 1
+            else {} for cycle in range(cycles)]
+
+
+def make_network(seed):
+    """Return a random network with only some of its outputs monitored."""
+    names, devices, network, monitors, switch_ids = make_random_network(seed)
+    for number, key in enumerate(list(monitors.monitors_dictionary)):
+        if number % 3:
+            monitors.remove_monitor(*key)
+    return names, devices, network, monitors, switch_ids
+
+
+def run_fault(seed, fault, vectors):
+    """Return the traces of a network with fault, simulated by sweeping.
+
+    The faulted port is connected to a new switch stuck at the fault's
+    value instead of its source.
+    """
+    names, devices, network, monitors, switch_ids = make_network(seed)
+    if fault is not None:
+        (device_id, port_id, stuck_at) = fault
+        [stuck_id] = names.lookup(["Stuck"])
+        devices.make_device(stuck_id, devices.SWITCH, stuck_at)
+        devices.get_device(stuck_id).outputs[None] = stuck_at
+        if port_id in devices.get_device(device_id).inputs:
+            devices.get_device(device_id).inputs[port_id] = (stuck_id, None)
+        else:
+            for device in devices.devices_list:
+                for input_id, source in device.inputs.items():
+                    if source == (device_id, port_id):
+                        device.inputs[input_id] = (stuck_id, None)
+    traces = {key: [] for key in monitors.monitors_dictionary}
+    for vector in vectors:
+        for switch_id, switch_state in vector.items():
+            devices.set_switch(switch_id, switch_state)
+        assert network.execute_network()
+        for key, trace in traces.items():
+            trace.append(network.get_output_signal(*key))
+    if fault is not None and (device_id, port_id) in traces:
+        traces[(device_id, port_id)] = [stuck_at] * len(vectors)
+    return traces
+
+
+@pytest.mark.parametrize("seed", range(12))
+def test_detections_match_faulty_networks(seed):
+    """Test if each fault is detected where its faulty network differs."""
+    names, devices, network, monitors, switch_ids = make_network(seed)
+    vectors = make_vectors(seed, switch_ids, 15)
+    simulator = FaultSimulator(names, devices, network, monitors)
+    state = network.save_state()
+    assert simulator.run(vectors, group_size=5)
+    assert network.save_state() == state
+
+    good_traces = run_fault(seed, None, vectors)
+    for representative, faults in simulator.fault_classes.items():
+        for fault in faults:  # equivalent faults are detected together
+            traces = run_fault(seed, fault, vectors)
+            for key, trace in traces.items():
+                assert (trace != good_traces[key]) == (
+                    representative in simulator.detected[key])
+
+
+def test_collapse_faults():
+    """Test if gate inputs and single fan-out wires are collapsed."""
+    names, devices, network, monitors, switch_ids = make_random_network(0)
+    [SW1, G1, G2, I1, I2] = names.lookup(["A", "B", "C", "I1", "I2"])
+    for device_id in list(monitors.monitors_dictionary):
+        monitors.remove_monitor(*device_id)
+    devices.make_device(SW1, devices.SWITCH, 0)
+    devices.make_device(G1, devices.AND, 2)
+    devices.make_device(G2, devices.NAND, 1)
+    network.make_connection(SW1, None, G1, I1)
+    network.make_connection(SW1, None, G1, I2)
+    network.make_connection(G1, None, G2, I1)
+    monitors.make_monitor(G2, None)
+    simulator = FaultSimulator(names, devices, network, monitors)
+    faults = [fault for fault in simulator.get_faults()
+              if fault[0] in [SW1, G1, G2]]
+    assert len(faults) == 12
+    classes = simulator.collapse_faults(faults)
+    assert [simulator.get_fault_name(fault) for fault in classes] == [
+        "A stuck-at-0", "A stuck-at-1", "B stuck-at-0", "B stuck-at-1",
+        "B.I1 stuck-at-1", "B.I2 stuck-at-1"]
+    assert classes[(G1, None, devices.LOW)] == [
+        (G1, None, 0), (G1, I1, 0), (G1, I2, 0), (G2, None, 1),
+        (G2, I1, 0)]
+
+
+def test_undetected_faults():
+    """Test if faults the vectors do not reach are undetected."""
+    names, devices, network, monitors, switch_ids = make_random_network(0)
+    simulator = FaultSimulator(names, devices, network, monitors)
+    assert simulator.run([])
+    assert simulator.get_undetected_faults() == list(
+        simulator.fault_classes)
+    assert simulator.run([{}] * 10)
+    assert len(simulator.get_undetected_faults()) < len(
+        simulator.fault_classes)
+
+
+def test_gate_loops_are_not_simulated():
+    """Test if networks that cannot be levelized are not fault simulated."""
+    names, devices, network, monitors, switch_ids = make_random_network(0)
+    [G1, G2, I1] = names.lookup(["Loop1", "Loop2", "I1"])
+    devices.make_device(G1, devices.NAND, 1)
+    devices.make_device(G2, devices.NAND, 1)
+    network.make_connection(G1, None, G2, I1)
+    network.make_connection(G2, None, G1, I1)
+    simulator = FaultSimulator(names, devices, network, monitors)
+    assert not simulator.run([{}] * 10)
+
+
+def test_gate_driven_d_type_inputs_are_not_simulated(tmpdir, capsys):
+    """Test if D-types with gate-driven control inputs are not simulated."""
+    vector_path = tmpdir.join("vectors.txt")
+    vector_path.write("SW5=1\n")
+    logsim.main(["-g", str(vector_path), "example_2.txt"])
+    out, _ = capsys.readouterr()
+    assert ("Error: only networks without loops of logic gates, whose "
+            "D-type CLK inputs are driven by clocks or switches and SET and "
+            "CLEAR inputs by clocks, switches or RC devices, can be fault "
+            "simulated") in out.split("\n")
+
+
+def test_fault_option(tmpdir, capsys):
+    """Test if logsim prints the faults detected by a file of vectors."""
+    vector_path = tmpdir.join("vectors.txt")
+    vector_path.write("SW3=1\nSW3=0 SW4=1\n\nSW4=0 SW1=0\n\n\n")
+    logsim.main(["-r", "1", "-g", str(vector_path), "example_1.txt"])
+    out, _ = capsys.readouterr()
+    lines = out.split("\n")
+    # The detected faults depend on the random start of the D-type
+    assert any(line.startswith("Q1.QBAR detects") for line in lines)
+    assert "    SW4 stuck-at-0" in lines
+    assert "Undetected faults:" in lines
+    assert lines[-2].startswith("Detected ")
+    assert lines[-2].endswith(" of 28 faults (14 after collapsing)")
+    logsim.main(["-r", "1", "-g", str(vector_path), "example_1.txt"])
+    assert capsys.readouterr()[0] == out
+
+    vector_path.write("SW3=1\nG1=0\n")
+    logsim.main(["-g", str(vector_path), "example_1.txt"])
+    out, _ = capsys.readouterr()
+    assert "Error: invalid switch setting G1=0" in out
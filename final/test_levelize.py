@@ -0,0 +1,243 @@
+"""Test the levelize module."""
+import random
+
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from levelize import LevelizedEngine
+
+
+def make_random_network(seed, any_inputs=False):
+    """Return names, devices, network, monitors and switch IDs of a network.
+
+    The network has random switches, clocks, RC devices, D-types and an
+    acyclic network of logic gates, with every output monitored. If
+    any_inputs is True, D-type inputs may be driven by any output, and the
+    gates may form loops.
+    """
+    rng = random.Random(seed)
+    random.seed(seed)  # cold start-up uses the random module
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+
+    switch_ids = names.lookup_many("Sw" + str(i)
+                                   for i in range(rng.randrange(1, 5)))
+    clock_ids = names.lookup_many("Clk" + str(i)
+                                  for i in range(rng.randrange(1, 3)))
+    rc_ids = names.lookup_many("Rc" + str(i) for i in range(rng.randrange(2)))
+    d_type_ids = names.lookup_many("D" + str(i)
+                                   for i in range(rng.randrange(4)))
+    gate_ids = names.lookup_many("G" + str(i)
+                                 for i in range(rng.randrange(20)))
+
+    for device_id in switch_ids:
+        devices.make_device(device_id, devices.SWITCH, rng.randrange(2))
+    for device_id in clock_ids:
+        devices.make_device(device_id, devices.CLOCK, rng.randrange(1, 4))
+    for device_id in rc_ids:
+        devices.make_device(device_id, devices.RC, rng.randrange(6))
+    for device_id in d_type_ids:
+        devices.make_device(device_id, devices.D_TYPE)
+
+    outputs = [(device_id, None) for device_id in
+               switch_ids + clock_ids + rc_ids]
+    for device_id in d_type_ids:
+        outputs.extend([(device_id, devices.Q_ID),
+                        (device_id, devices.QBAR_ID)])
+    for device_id in gate_ids:
+        gate_kind = rng.choice(devices.gate_types)
+        if gate_kind == devices.XOR:
+            devices.make_device(device_id, gate_kind)
+        else:
+            devices.make_device(device_id, gate_kind, rng.randrange(1, 4))
+        outputs.append((device_id, None))
+    for device_id in gate_ids:
+        gate_inputs = outputs[:outputs.index((device_id, None))]
+        if any_inputs:
+            gate_inputs = outputs
+        for input_id in devices.get_device(device_id).inputs:
+            network.make_connection(*rng.choice(gate_inputs), device_id,
+                                    input_id)
+
+    clocks_and_switches = [(device_id, None) for device_id in
+                           switch_ids + clock_ids]
+    if any_inputs:
+        clocks_and_switches = outputs
+    for device_id in d_type_ids:
+        network.make_connection(*rng.choice(clocks_and_switches),
+                                device_id, devices.CLK_ID)
+        for input_id in [devices.SET_ID, devices.CLEAR_ID]:
+            network.make_connection(
+                *rng.choice(clocks_and_switches + [(device_id, None) for
+                                                   device_id in rc_ids]),
+                device_id, input_id)
+        network.make_connection(*rng.choice(outputs), device_id,
+                                devices.DATA_ID)
+
+    for device_id, output_id in outputs:
+        monitors.make_monitor(device_id, output_id)
+    return names, devices, network, monitors, switch_ids
+
+
+def run_random_network(seed, make_engine=None, cycles=30, any_inputs=False):
+    """Return the traces and results of a random network run for cycles.
+
+    The network is executed with the engine make_engine(names, devices,
+    network), or with sweep_network if make_engine is None. The switches
+    are toggled and the network is cold started again during the run, to
+    check that engines follow changes made outside them. The results of
+    each cycle are whether it succeeded, the devices found to oscillate,
+    the state of the network and the global counter.
+    """
+    names, devices, network, monitors, switch_ids = make_random_network(
+        seed, any_inputs)
+    if make_engine is not None:
+        network.set_engine(make_engine(names, devices, network))
+    rng = random.Random(-seed)
+    results = []
+    for cycle in range(cycles):
+        if cycle % 7 == 3:  # toggle a switch during the run
+            devices.set_switch(rng.choice(switch_ids), rng.randrange(2))
+        if cycle == 15:
+            devices.cold_startup(random.Random(seed))
+        results.append((network.execute_network(),
+                        network.oscillating_devices, network.save_state(),
+                        network.global_counter))
+        monitors.record_signals()
+    return monitors.monitors_dictionary, results
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_traces_match_sweep_network(seed):
+    """Test if the levelized engine gives the same traces as sweeping."""
+    names, devices, network, monitors, switch_ids = make_random_network(seed)
+    assert LevelizedEngine(names, devices, network).compile_network()
+    (traces, results) = run_random_network(seed, LevelizedEngine)
+    assert all(result[0] for result in results)
+    assert (traces, results) == run_random_network(seed)
+
+
+@pytest.fixture
+def gate_network():
+    """Return a network with a switch driving two NAND gates in series."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    [SW1_ID, G1_ID, G2_ID, I1, I2] = names.lookup(["Sw1", "G1", "G2", "I1",
+                                                   "I2"])
+    devices.make_device(SW1_ID, devices.SWITCH, 1)
+    devices.make_device(G1_ID, devices.NAND, 2)
+    devices.make_device(G2_ID, devices.NAND, 2)
+    network.make_connection(G1_ID, None, G2_ID, I1)
+    network.make_connection(SW1_ID, None, G2_ID, I2)
+    network.make_connection(SW1_ID, None, G1_ID, I1)
+    return network
+
+
+def test_sort_gates(gate_network):
+    """Test if the gates are sorted into levels by their inputs."""
+    network = gate_network
+    [G1_ID, G2_ID] = network.names.lookup(["G1", "G2"])
+    engine = LevelizedEngine(network.names, network.devices, network)
+
+    # G1.I2 is unconnected, so the network cannot be levelized
+    assert not engine.compile_network()
+    assert engine.levels == []
+
+    network.make_connection(G2_ID, None, G1_ID, network.names.query("I2"))
+    # G1 and G2 now form a loop
+    assert not engine.compile_network()
+    assert engine.sort_gates() is None
+
+
+def test_levels(gate_network):
+    """Test if the levels and outputs of an acyclic network are correct."""
+    network = gate_network
+    devices = network.devices
+    [SW1_ID, G1_ID, G2_ID, I2] = network.names.lookup(["Sw1", "G1", "G2",
+                                                       "I2"])
+    network.make_connection(SW1_ID, None, G1_ID, I2)
+    network.set_engine(LevelizedEngine(network.names, devices, network))
+
+    assert network.engine.levels == [[G1_ID], [G2_ID]]
+    assert network.execute_network()
+    assert network.get_output_signal(G1_ID, None) == devices.LOW
+    assert network.get_output_signal(G2_ID, None) == devices.HIGH
+    assert network.global_counter == 1
+
+
+def test_relaxes_gated_clock():
+    """Test if a D-type clocked by a logic gate is swept."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    [SW1_ID, CL1_ID, G1_ID, D1_ID, I1, I2] = names.lookup(
+        ["Sw1", "Clk1", "G1", "D1", "I1", "I2"])
+    devices.make_device(SW1_ID, devices.SWITCH, 1)
+    devices.make_device(CL1_ID, devices.CLOCK, 2)
+    devices.make_device(G1_ID, devices.AND, 2)
+    devices.make_device(D1_ID, devices.D_TYPE)
+    network.make_connection(SW1_ID, None, G1_ID, I1)
+    network.make_connection(CL1_ID, None, G1_ID, I2)
+    network.make_connection(G1_ID, None, D1_ID, devices.CLK_ID)
+    for input_id in [devices.SET_ID, devices.CLEAR_ID, devices.DATA_ID]:
+        network.make_connection(SW1_ID, None, D1_ID, input_id)
+
+    engine = LevelizedEngine(names, devices, network)
+    network.set_engine(engine)
+    assert not engine.levelized
+    assert engine.relaxed_devices == {SW1_ID, CL1_ID, G1_ID, D1_ID}
+    assert engine.gates == [] and engine.d_type_devices == []
+    assert network.execute_network()
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_relaxed_networks_match_sweep_network(seed):
+    """Test if partly relaxed networks give the same results as sweeping."""
+    assert (run_random_network(seed, LevelizedEngine, 40, any_inputs=True) ==
+            run_random_network(seed, cycles=40, any_inputs=True))
+
+
+def test_levelizes_cone_beside_loop():
+    """Test if an acyclic cone is levelized beside a loop of gates."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    [SW1_ID, SW2_ID, G1_ID, G2_ID, L1_ID, L2_ID, I1, I2] = names.lookup(
+        ["Sw1", "Sw2", "G1", "G2", "L1", "L2", "I1", "I2"])
+    devices.make_device(SW1_ID, devices.SWITCH, 0)
+    devices.make_device(SW2_ID, devices.SWITCH, 1)
+    devices.make_device(G1_ID, devices.NAND, 1)
+    devices.make_device(G2_ID, devices.AND, 2)
+    devices.make_device(L1_ID, devices.NAND, 2)
+    devices.make_device(L2_ID, devices.NAND, 2)
+    # G1 and G2 form a cone, and L1 and L2 a latch, which drives G2
+    network.make_connection(SW1_ID, None, G1_ID, I1)
+    network.make_connection(G1_ID, None, G2_ID, I1)
+    network.make_connection(L1_ID, None, G2_ID, I2)
+    network.make_connection(SW2_ID, None, L1_ID, I1)
+    network.make_connection(L2_ID, None, L1_ID, I2)
+    network.make_connection(L1_ID, None, L2_ID, I1)
+    network.make_connection(SW2_ID, None, L2_ID, I2)
+    for device_id in [G2_ID, L1_ID]:
+        monitors.make_monitor(device_id, None)
+    engine = LevelizedEngine(names, devices, network)
+    network.set_engine(engine)
+
+    assert not engine.levelized
+    assert engine.relaxed_devices == {SW2_ID, L1_ID, L2_ID}
+    assert engine.levels == [[G1_ID], [G2_ID]]
+    assert [device.device_id for device in engine.switch_devices] == [
+        SW1_ID]
+    for cycle in range(6):
+        devices.set_switch(SW1_ID, cycle % 2)
+        assert network.execute_network()
+        monitors.record_signals()
+    assert [list(trace) for trace in
+            monitors.monitors_dictionary.values()] == [[1, 0] * 3, [1] * 6]
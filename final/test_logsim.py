@@ -0,0 +1,43 @@
+"""Test the logsim module."""
+import subprocess
+import sys
+
+import logsim
+
+
+def test_batch_simulation(capsys):
+    """Test if a batch simulation prints the monitored traces."""
+    logsim.main(["-n", "8", "-s", "SW1=1", "example_1.txt"])
+    out, _ = capsys.readouterr()
+    [trace] = [line for line in out.split("\n")
+               if line.startswith("Q1.QBAR")]
+    assert len(trace) == len("Q1.QBAR: ") + 8
+
+
+def test_batch_simulation_gives_errors(capsys):
+    """Test if invalid switch settings are reported before running."""
+    logsim.main(["-n", "8", "-s", "G1=1", "example_1.txt"])
+    out, _ = capsys.readouterr()
+    assert "Error: G1 is not a switch" in out
+    assert "Q1.QBAR" not in out
+
+    logsim.main(["-n", "8", "-s", "SW1=2", "example_1.txt"])
+    out, _ = capsys.readouterr()
+    assert "Error: invalid switch setting SW1=2" in out
+
+
+def test_batch_simulation_imports_no_gui():
+    """Test if a batch simulation runs without importing wx or NumPy."""
+    script = ("import sys, logsim\n"
+              "logsim.main(['-n', '8', 'example_1.txt'])\n"
+              "assert not {'wx', 'gui', 'OpenGL', 'numpy'} & set(sys.modules)")
+    subprocess.run([sys.executable, "-c", script], check=True,
+                   stdout=subprocess.DEVNULL)
+
+
+def test_missing_command_file(tmpdir, capsys):
+    """Test if a command file that cannot be read is reported."""
+    command_path = str(tmpdir.join("missing.txt"))
+    logsim.main(["-f", command_path, "example_1.txt"])
+    out, _ = capsys.readouterr()
+    assert "Error: could not read " + command_path in out.split("\n")
@@ -4,7 +4,7 @@ import pytest
 from names import Names
 from network import Network
 from devices import Devices
-from monitors import Monitors
+from monitors import Monitors, SignalTrace
 
 
 @pytest.fixture
@@ -197,3 +197,52 @@ def test_display_signals(capsys, new_monitors):
             "Clock1: -__--__--__--__--__-" in traces)
 
     assert "" in traces  # additional empty line at the end
+
+
+def test_signal_trace_runs():
+    """Test if SignalTrace stores runs and behaves like a list."""
+    trace = SignalTrace([0, 0, 1])
+    trace.append(1, 1000)
+    trace.append(4, 0)
+    trace.append(0)
+
+    assert trace.get_runs() == [(0, 2), (1, 1001), (0, 1)]
+    assert len(trace) == 1004
+    assert len(trace.levels) == 3
+    assert trace[0] == 0
+    assert trace[2] == 1
+    assert trace[1002] == 1
+    assert trace[-1] == 0
+    assert trace[1:3] == [0, 1]
+    with pytest.raises(IndexError):
+        trace[1004]
+    assert trace == [0, 0] + [1] * 1001 + [0]
+    assert trace != [0, 0, 1]
+    assert list(trace) == [0, 0] + [1] * 1001 + [0]
+
+
+def test_make_monitor_after_cycles(new_monitors):
+    """Test if a monitor made during a simulation starts with BLANKs."""
+    names = new_monitors.names
+    devices = new_monitors.devices
+    [SW3_ID] = names.lookup(["Sw3"])
+    devices.make_device(SW3_ID, devices.SWITCH, 1)
+
+    new_monitors.make_monitor(SW3_ID, None, cycles_completed=3)
+    new_monitors.network.execute_network()
+    new_monitors.record_signals()
+    trace = new_monitors.monitors_dictionary[(SW3_ID, None)]
+    assert trace == [devices.BLANK] * 3 + [devices.HIGH]
+    assert trace.get_runs() == [(devices.BLANK, 3), (devices.HIGH, 1)]
+
+
+@pytest.mark.parametrize("signals", [[1], [0, 1], [0, 0, 1, 0], [2, 1, 1, 3],
+                                     [1, 1, 0, 1, 1]])
+@pytest.mark.parametrize("count", [0, 1, 3, 5, 12])
+def test_signal_trace_repeat(signals, count):
+    """Test if SignalTrace repeats the last period of the trace."""
+    trace = SignalTrace([4] + signals)
+    trace.repeat(len(signals), count)
+    expected = [4] + signals + (signals * (count // len(signals) + 1))[:count]
+    assert trace == expected
+    assert trace.get_runs() == SignalTrace(expected).get_runs()
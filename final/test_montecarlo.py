@@ -0,0 +1,85 @@
+"""Test the montecarlo module."""
+import pytest
+
+import logsim
+from montecarlo import format_statistics, get_sample_rng, run_monte_carlo
+from simulate import run_network
+from test_levelize import make_random_network
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_statistics_match_samples(seed):
+    """Test if the statistics are those of each sample simulated in turn."""
+    names, devices, network, monitors, switch_ids = make_random_network(
+        seed, any_inputs=True)
+    state = network.save_state()
+    global_counter = network.global_counter
+    completed, statistics = run_monte_carlo(network, monitors, 10, 12,
+                                            seed, processes=1, chunk_size=5)
+    assert network.save_state() == state
+
+    counts = {key: [0] * 10 for key in monitors.monitors_dictionary}
+    expected_completed = 0
+    for sample in range(12):
+        network.restore_state(state)
+        network.global_counter = global_counter
+        monitors.reset_monitors()
+        devices.cold_startup(get_sample_rng(seed, sample))
+        if not run_network(network, monitors, 10):
+            continue
+        expected_completed += 1
+        for key, trace in monitors.monitors_dictionary.items():
+            for cycle, signal in enumerate(trace):
+                counts[key][cycle] += signal == devices.HIGH
+    assert completed == expected_completed
+    if completed:
+        assert statistics == {key: [count / completed for count in count_list]
+                              for key, count_list in counts.items()}
+
+
+@pytest.mark.parametrize("processes, chunk_size", [(1, 3), (2, 4), (3, 1)])
+def test_statistics_only_depend_on_seed(processes, chunk_size):
+    """Test if the statistics are the same for any number of processes."""
+    names, devices, network, monitors, switch_ids = make_random_network(4)
+    expected = run_monte_carlo(network, monitors, 8, 20, 7, 1)
+    assert run_monte_carlo(network, monitors, 8, 20, 7, processes,
+                           chunk_size) == expected
+    assert run_monte_carlo(network, monitors, 8, 20, 8, processes,
+                           chunk_size) != expected
+
+
+def test_format_statistics():
+    """Test if the table shows the probability of HIGH in each cycle."""
+    names, devices, network, monitors, switch_ids = make_random_network(3)
+    statistics = {key: [0.0, 0.5] for key in
+                  list(monitors.monitors_dictionary)[:1]}
+    [(device_id, output_id)] = statistics
+    name = devices.get_signal_name(device_id, output_id)
+    assert format_statistics(devices, statistics) == [
+        "Cycle " + name, "0     0.00", "1     0.50"]
+
+
+def test_monte_carlo_option(capsys):
+    """Test if logsim prints the same statistics for the same seed."""
+    logsim.main(["-n", "3", "-m", "40", "-r", "5", "-j", "2",
+                 "example_1.txt"])
+    out, _ = capsys.readouterr()
+    lines = out.split("\n")
+    table = lines[lines.index("Cycle Q1.QBAR") + 1:]
+    assert [line[:6] for line in table] == ["0     ", "1     ", "2     ", ""]
+    # The D-type starts at random, so its output is HIGH in some samples
+    assert 0 < float(table[0][6:]) < 1
+    assert all(0 <= float(line[6:]) <= 1 for line in table[:3])
+
+    logsim.main(["-n", "3", "-m", "40", "-r", "5", "example_1.txt"])
+    assert capsys.readouterr()[0] == out
+
+
+def test_monte_carlo_option_needs_samples(capsys):
+    """Test if logsim rejects a zero sample count before running."""
+    with pytest.raises(SystemExit):
+        logsim.main(["-m", "0", "example_1.txt"])
+    out, _ = capsys.readouterr()
+    assert out.startswith("Error: the number of samples must be a number of "
+                          "at least 1")
+    assert "oscillates" not in out
@@ -94,3 +94,28 @@ def test_get_name_string_raises_exception(used_names):
         used_names.get_name_string(0.4)
     with pytest.raises(ValueError):
         used_names.get_name_string(-6)
+
+
+def test_lookup_many(used_names):
+    """Test if lookup_many accepts any iterable and interns new names."""
+    assert used_names.lookup_many(("Eve", "Alice")) == [2, 0]
+    assert used_names.lookup_many(name for name in ["Bob", "Mallory"]) == [
+        1, 3]
+    assert used_names.query("Mallory") == 3
+    assert used_names.names == ["Alice", "Bob", "Eve", "Mallory"]
+
+
+def test_lookup_many_raises_exception(used_names):
+    with pytest.raises(TypeError):
+        used_names.lookup_many(["Alice", "1gf"])
+    with pytest.raises(TypeError):
+        used_names.lookup_many(["Alice", ""])
+    # Names added before the invalid name are kept
+    assert used_names.query("Alice") == 0
+
+
+def test_index_matches_names_list(used_names):
+    """Test if the name index stays consistent with the names list."""
+    used_names.lookup(["Trent", "Alice", "Peggy"])
+    for name_id, name_string in enumerate(used_names.names):
+        assert used_names.query(name_string) == name_id
@@ -0,0 +1,121 @@
+"""Test the netcache module."""
+import os
+import pickle
+import random
+import zlib
+
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+from netcache import NetlistCache
+
+
+@pytest.fixture
+def cache(tmpdir):
+    """Return a NetlistCache in a temporary directory."""
+    return NetlistCache(str(tmpdir.join("cache")), max_entries=2)
+
+
+def parse_file(path, cache):
+    """Return the parser, names, devices, network and monitors of a file."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    scanner = Scanner(path, names)
+    parser = Parser(names, devices, network, monitors, scanner, cache)
+    parser.parse_network()
+    return parser, names, devices, network, monitors
+
+
+def simulate(names, devices, network, monitors):
+    """Return the monitored traces of a simulation from a fixed state."""
+    random.seed(0)
+    devices.cold_startup()
+    for _ in range(20):
+        assert network.execute_network()
+        monitors.record_signals()
+    return monitors.get_signal_names(), [
+        list(trace) for trace in monitors.monitors_dictionary.values()]
+
+
+def test_load_cached_network(cache):
+    """Test if a cached network is identical to the parsed one."""
+    parsed = parse_file("example_1.txt", cache)
+    assert not parsed[0].loaded_from_cache
+    cached = parse_file("example_1.txt", cache)
+    assert cached[0].loaded_from_cache
+    assert cached[0].error_count == 0
+
+    # The loaded objects refer to each other, not to the cached copies
+    [_, names, devices, network, monitors] = cached
+    assert devices.names is names
+    assert network.devices is devices
+    assert monitors.network is network
+    assert simulate(*parsed[1:]) == simulate(*cached[1:])
+
+
+def test_changed_file_is_parsed(tmpdir, cache):
+    """Test if the cache is keyed by the contents of the file."""
+    path = str(tmpdir.join("circuit.txt"))
+    with open("example_1.txt") as example_file:
+        text = example_file.read()
+    with open(path, 'w') as definition_file:
+        definition_file.write(text)
+    parse_file(path, cache)
+    with open(path, 'w') as definition_file:
+        definition_file.write(text + "\n# changed\n")
+    assert not parse_file(path, cache)[0].loaded_from_cache
+    assert parse_file(path, cache)[0].loaded_from_cache
+
+
+def test_errors_are_not_cached(tmpdir, cache):
+    """Test if definition files with errors are not cached."""
+    path = str(tmpdir.join("circuit.txt"))
+    with open(path, 'w') as definition_file:
+        definition_file.write("DEF A = AND 2 ;\nDEF A = OR 2 ;\n")
+    assert parse_file(path, cache)[0].error_count == 1
+    assert not parse_file(path, cache)[0].loaded_from_cache
+
+
+@pytest.mark.parametrize("entry", [
+    b"not a network",
+    zlib.compress(b"\x80\x09"),  # unsupported protocol, a ValueError
+    zlib.compress(b"cbuiltins\nint\n(S'x'\nI1\nI2\ntR."),  # TypeError
+    zlib.compress(pickle.dumps(1)),  # not the saved states
+])
+def test_corrupt_entry_is_parsed(cache, entry):
+    """Test if an unreadable cache entry is ignored."""
+    parse_file("example_1.txt", cache)
+    with open(cache.get_cache_path("example_1.txt"), 'wb') as cache_file:
+        cache_file.write(entry)
+    parser = parse_file("example_1.txt", cache)[0]
+    assert not parser.loaded_from_cache
+    assert parser.error_count == 0
+
+
+def test_evict(tmpdir, cache):
+    """Test if the least recently used entries are evicted."""
+    paths = []
+    for number in range(3):
+        path = str(tmpdir.join("circuit%d.txt" % number))
+        with open(path, 'w') as definition_file:
+            definition_file.write("DEF SW = SWITCH %d ;\n" % (number % 2) +
+                                  "#" * number + "\n")
+        paths.append(path)
+        parse_file(path, cache)
+        cache_path = cache.get_cache_path(path)
+        os.utime(cache_path, (number, number))  # distinct use times
+    assert not os.path.exists(cache.get_cache_path(paths[0]))
+    assert os.path.exists(cache.get_cache_path(paths[1]))
+    assert os.path.exists(cache.get_cache_path(paths[2]))
+
+    cache.max_bytes = 1
+    cache.evict()  # the most recent entry is always kept
+    assert os.listdir(cache.cache_dir) == [
+        os.path.basename(cache.get_cache_path(paths[2]))]
@@ -0,0 +1,92 @@
+"""Test the netgen and benchmark modules."""
+import json
+
+import pytest
+
+import benchmark
+import netgen
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+
+
+def parse_file(path):
+    """Return the parser and network of a definition file."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    scanner = Scanner(path, names)
+    parser = Parser(names, devices, network, monitors, scanner)
+    parser.parse_network()
+    return parser, network
+
+
+@pytest.mark.parametrize("shape", list(netgen.SHAPES))
+@pytest.mark.parametrize("size", [1, 7, 64])
+def test_generated_files_are_valid(tmpdir, shape, size):
+    """Test if every generated circuit parses and simulates."""
+    path = str(tmpdir.join("circuit.txt"))
+    netgen.write_definition_file(path, shape, size)
+    parser, network = parse_file(path)
+    assert parser.error_count == 0
+    assert network.check_network()
+    for _ in range(4):
+        assert network.execute_network()
+
+
+def test_adder_adds(tmpdir):
+    """Test if the generated ripple carry adder gives the correct sum."""
+    path = str(tmpdir.join("adder.txt"))
+    netgen.write_definition_file(path, "adder", 8, seed=3)
+    parser, network = parse_file(path)
+    network.execute_network()
+    names = network.names
+    devices = network.devices
+
+    def number(prefix, bits, first=0):
+        return sum(devices.get_device(names.query(prefix + str(first + bit)))
+                   .outputs[None] << bit for bit in range(bits))
+
+    total = number("A", 8) + number("B", 8) + number("C", 1)
+    assert number("S", 8) + (number("C", 1, first=8) << 8) == total
+
+
+def test_generate_dag_is_seeded():
+    """Test if random networks depend only on the seed."""
+    assert netgen.generate_dag(50, seed=1) == netgen.generate_dag(50, seed=1)
+    assert netgen.generate_dag(50, seed=1) != netgen.generate_dag(50, seed=2)
+
+
+def test_time_stages(tmpdir, capsys):
+    """Test if the benchmark times each stage and saves the results."""
+    json_path = str(tmpdir.join("results.json"))
+    for _ in range(2):
+        benchmark.main(["-s", "tree", "-z", "16", "-n", "2",
+                        "-e", "levelized", "-o", json_path])
+    out, _ = capsys.readouterr()
+    assert "Parse time:" in out
+
+    with open(json_path) as json_file:
+        entries = json.load(json_file)
+    assert len(entries) == 2
+    assert entries[0]["shape"] == "tree"
+    assert entries[0]["engine"] == "levelized"
+    assert entries[0]["errors"] == 0
+    assert entries[0]["devices"] == 31
+    for key in ["scan_seconds", "parse_seconds", "execute_seconds",
+                "record_seconds"]:
+        assert entries[0][key] >= 0
+
+
+@pytest.mark.parametrize("cycles", ["0", "x"])
+def test_benchmark_needs_cycles(capsys, cycles):
+    """Test if the benchmark rejects a cycle count below 1 before timing."""
+    with pytest.raises(SystemExit):
+        benchmark.main(["-n", cycles])
+    out, _ = capsys.readouterr()
+    assert out.startswith("Error: the number of cycles must be a number of "
+                          "at least 1")
@@ -348,3 +348,77 @@ def test_oscillating_network(new_network):
     network.make_connection(NOR1, None, NOR1, I1)
 
     assert not network.execute_network()
+
+
+def make_inverter_chain(network, length, loop=False):
+    """Make a chain of one-input NAND gates, made in reverse order.
+
+    A switch drives the first gate, or the last gate if loop is True, so
+    each sweep only moves the signals one gate along the chain. Return the
+    gate IDs in order along the chain.
+    """
+    devices = network.devices
+    names = devices.names
+    [SW_ID, I1] = names.lookup(["Sw", "I1"])
+    gate_ids = names.lookup_many("G" + str(number) for number in range(length))
+    devices.make_device(SW_ID, devices.SWITCH, 1)
+    for gate_id in reversed(gate_ids):
+        devices.make_device(gate_id, devices.NAND, 1)
+    source_id = gate_ids[-1] if loop else SW_ID
+    for gate_id in gate_ids:
+        network.make_connection(source_id, None, gate_id, I1)
+        source_id = gate_id
+    return gate_ids
+
+
+def test_get_depth(new_network):
+    """Test if the depth counts the devices on the longest path."""
+    network = new_network
+    make_inverter_chain(network, 30)
+    assert network.get_depth() == 31
+    assert network.get_iteration_limit() == 64
+
+
+def test_deep_chain_settles(new_network):
+    """Test if a chain deeper than 20 sweeps is not taken as oscillating."""
+    network = new_network
+    devices = network.devices
+    gate_ids = make_inverter_chain(network, 40)
+    assert network.execute_network()
+    assert network.oscillating_devices == []
+    assert [devices.get_device(gate_id).outputs[None]
+            for gate_id in gate_ids] == [0, 1] * 20
+
+
+def test_oscillating_devices(new_network):
+    """Test if the devices in an oscillating loop are reported."""
+    network = new_network
+    devices = network.devices
+    names = devices.names
+    gate_ids = make_inverter_chain(network, 5, loop=True)
+    [OR_ID, I1, I2] = names.lookup(["Or", "I1", "I2"])
+    devices.make_device(OR_ID, devices.OR, 2)
+    network.make_connection(gate_ids[0], None, OR_ID, I1)
+    network.make_connection(names.query("Sw"), None, OR_ID, I2)
+
+    # A deep chain that is already settled raises the iteration limit
+    [source_id] = names.lookup(["Zero"])
+    devices.make_device(source_id, devices.SWITCH, 0)
+    for buffer_id in names.lookup_many("B" + str(number)
+                                       for number in range(50)):
+        devices.make_device(buffer_id, devices.AND, 1)
+        network.make_connection(source_id, None, buffer_id, I1)
+        source_id = buffer_id
+
+    sweeps = []
+    sweep_devices = network.sweep_devices
+
+    def count_sweep(sweep_order):
+        sweeps.append(sweep_order)
+        return sweep_devices(sweep_order)
+
+    network.sweep_devices = count_sweep
+    assert not network.execute_network()
+    assert network.oscillating_devices == list(reversed(gate_ids))
+    # The repeated state is found long before the iteration limit
+    assert len(sweeps) < network.get_iteration_limit() // 2
@@ -112,3 +112,34 @@ def test_error(new_parser, capsys):
     # Assert that the output is as expected
     message = "Error on line 1 at position -1 : Alice\nDEF G1 = AND 2 ;\n^\n"
     assert captured.out == message
+
+
+@pytest.mark.parametrize("definition, kind, errors", [
+    ("DEF A = AND 16 ;", "AND", []),
+    ("DEF A = OR 1 ;", "OR", []),
+    ("DEF A = NAND 2 ;", "NAND", []),
+    ("DEF A = NOR 17 ;", None, ["INVALID_QUALIFIER"]),
+    ("DEF A = XOR ;", "XOR", []),
+    ("DEF A = DTYPE 2 ;", "D_TYPE", ["SYNTAX_ERROR"]),
+    ("DEF A = CLOCK 3 ;", "CLOCK", []),
+    ("DEF A = CLOCK 0 ;", None, ["INVALID_QUALIFIER"]),
+    ("DEF A = SWITCH 2 ;", None, ["INVALID_QUALIFIER"]),
+    ("DEF A = RC ;", None, ["INVALID_QUALIFIER"]),
+    ("DEF A = CLK 1 ;", None, ["SYNTAX_ERROR"]),
+])
+def test_parse_def(tmpdir, new_names, devices, network, monitor,
+                   definition, kind, errors):
+    path = str(tmpdir.join("circuit.txt"))
+    with open(path, "w") as definition_file:
+        definition_file.write(definition + "\n")
+    scanner = Scanner(path, new_names)
+    parser = Parser(new_names, devices, network, monitor, scanner)
+    parser.parse_network()
+    error_codes = {"SYNTAX_ERROR": parser.SYNTAX_ERROR,
+                   "INVALID_QUALIFIER": devices.INVALID_QUALIFIER}
+    assert parser.error_list == [error_codes[error] for error in errors]
+    device = devices.get_device(new_names.query("A"))
+    if kind is None:
+        assert device is None
+    else:
+        assert device.device_kind == getattr(devices, kind)
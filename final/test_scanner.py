@@ -1,5 +1,6 @@
 import pytest
 from names import Names
+import scanner as scanner_module
 from scanner import Scanner, Symbol
 from unittest.mock import mock_open, patch
 
@@ -188,3 +189,54 @@ def test_get_number(scanner):
     scanner.current_character = "1"
     number = scanner.get_number()
     assert number == "1"
+
+
+def scan_symbols(scanner):
+    """Return (type, id, line, position) of every symbol up to EOF."""
+    symbols = []
+    while True:
+        symbol = scanner.get_symbol()
+        symbols.append((symbol.type, symbol.id, symbol.line, symbol.position))
+        if symbol.type == scanner.EOF:
+            return symbols
+
+
+def test_symbols_across_blocks(monkeypatch):
+    # names, numbers, comments and arrows split between small blocks
+    expected = scan_symbols(Scanner("example_1.txt", Names()))
+    monkeypatch.setattr(scanner_module, "BLOCK_SIZE", 3)
+    assert scan_symbols(Scanner("example_1.txt", Names())) == expected
+
+
+def test_comment_at_end_of_file(new_names):
+    mock_file_content = 'DEF G1 = AND 2; # no line break'
+    with patch("builtins.open", mock_open(read_data=mock_file_content)):
+        scanner = Scanner("path/to/definition/file", new_names)
+    symbols = scan_symbols(scanner)
+    assert [symbol_type for symbol_type, _, _, _ in symbols] == [
+        scanner.KEYWORD, scanner.NAME, scanner.EQUALS, scanner.DEVICE,
+        scanner.NUMBER, scanner.SEMICOLON, scanner.EOF]
+    assert symbols[-1][2:] == (1, 31)
+
+
+def test_print_error(scanner, capsys):
+    scanner.get_symbol()  # DEF
+    symbol = scanner.get_symbol()  # G1
+    scanner.print_error(symbol)
+    assert capsys.readouterr().out == 'DEF G1 = AND 2;\n   ^^\n'
+
+    for _ in range(4):  # =, AND, 2, ;
+        symbol = scanner.get_symbol()
+    # the error line is the one before the current line break
+    scanner.print_error(symbol)
+    assert capsys.readouterr().out == 'DEF G1 = AND 2;\n              ^\n'
+
+
+def test_print_error_across_blocks(monkeypatch, capsys):
+    monkeypatch.setattr(scanner_module, "BLOCK_SIZE", 4)
+    scanner = Scanner("example_1.txt", Names())
+    symbol = scanner.get_symbol()
+    while symbol.line < 4:  # the ; ending line 3 is followed by a newline
+        symbol = scanner.get_symbol()
+    scanner.print_error(symbol)
+    assert capsys.readouterr().out.startswith('DEF R1 = RC 5 ;\n')
@@ -0,0 +1,159 @@
+"""Test the simulate module."""
+import importlib
+import random
+
+import pytest
+
+from simulate import Checkpoints, run_network
+from vcd import VcdWriter
+from test_levelize import make_random_network
+
+
+def run_extrapolated_network(seed, extrapolate, path, cycles=300):
+    """Return the results of a random network run for cycles.
+
+    The results are the traces, clock counters, global counter, VCD file
+    and number of executed cycles.
+    """
+    names, devices, network, monitors, switch_ids = make_random_network(
+        seed, any_inputs=True)
+    rng = random.Random(-seed)
+    for device_id in devices.find_devices(devices.RC):
+        devices.get_device(device_id).fall_time = rng.randrange(40)
+    monitors.set_vcd_writer(VcdWriter(names, devices, monitors, path))
+
+    executed = []
+    execute_network = network.execute_network
+    network.execute_network = lambda: executed.append(1) or execute_network()
+    run_network(network, monitors, cycles, extrapolate)
+    monitors.vcd_writer.close()
+    clock_counters = [devices.get_device(device_id).clock_counter for
+                      device_id in devices.find_devices(devices.CLOCK)]
+    with open(path) as vcd_file:
+        vcd_file.readline()  # the date the file was written
+        vcd_text = vcd_file.read()
+    return (monitors.monitors_dictionary, clock_counters,
+            network.global_counter, vcd_text), len(executed)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_run_network_extrapolates(tmpdir, seed):
+    """Test if extrapolating gives the same results as simulating."""
+    (result, executed_count) = run_extrapolated_network(
+        seed, True, str(tmpdir.join("extrapolated.vcd")))
+    (expected, all_cycles) = run_extrapolated_network(
+        seed, False, str(tmpdir.join("simulated.vcd")))
+    assert result == expected
+    assert executed_count <= all_cycles
+
+
+def test_run_network_skips_periods(tmpdir):
+    """Test if only the first periods of a periodic network are executed."""
+    (_, executed_count) = run_extrapolated_network(
+        1, True, str(tmpdir.join("extrapolated.vcd")), cycles=100000)
+    assert executed_count < 1000
+
+
+def run_switched_network(seed, cycles, switch_cycle, resimulate,
+                         engine_class=None):
+    """Return the results of a random network with a switch set mid-run.
+
+    The results are the traces, device states and global counter, or None
+    if the network oscillates. If resimulate is True, the run is completed
+    first and then re-simulated from the cycle the switch is set. If
+    engine_class is given, the network is executed with that engine.
+    """
+    names, devices, network, monitors, switch_ids = make_random_network(
+        seed, any_inputs=True)
+    if engine_class is not None:
+        network.set_engine(engine_class(names, devices, network))
+    rng = random.Random(-seed)
+    for device_id in devices.find_devices(devices.RC):
+        devices.get_device(device_id).fall_time = rng.randrange(40)
+    switch_id = rng.choice(switch_ids)
+    switch_state = 1 - devices.get_device(switch_id).switch_state
+    checkpoints = Checkpoints(network, monitors, interval=7)
+
+    if resimulate:
+        if not run_network(network, monitors, cycles,
+                           checkpoints=checkpoints):
+            return None
+        if not checkpoints.set_switch(switch_id, switch_state, switch_cycle):
+            return None
+    else:
+        if not run_network(network, monitors, switch_cycle):
+            return None
+        devices.set_switch(switch_id, switch_state)
+        if not run_network(network, monitors, cycles - switch_cycle):
+            return None
+    return (monitors.monitors_dictionary, network.save_state(),
+            network.global_counter)
+
+
+@pytest.mark.parametrize("seed", range(40))
+@pytest.mark.parametrize("switch_cycle", [0, 5, 7, 30, 60])
+def test_set_switch_resimulates(seed, switch_cycle):
+    """Test if re-simulating gives the same results as simulating."""
+    # Setting the switch at the end runs the network without setting it
+    if run_switched_network(seed, 60, 60, False) is not None:
+        assert run_switched_network(seed, 60, switch_cycle, True) == \
+            run_switched_network(seed, 60, switch_cycle, False)
+
+
+@pytest.mark.parametrize("module_name, class_name", [
+    ("levelize", "LevelizedEngine"), ("events", "EventDrivenEngine"),
+    ("arraynet", "ArrayEngine"), ("codegen", "CodeGenEngine")])
+@pytest.mark.parametrize("seed", range(10))
+def test_set_switch_reloads_engine(monkeypatch, module_name, class_name,
+                                   seed):
+    """Test if engines continue a re-simulated run without recompiling."""
+    if module_name == "arraynet":
+        pytest.importorskip("numpy")
+    engine_class = getattr(importlib.import_module(module_name), class_name)
+    expected = run_switched_network(seed, 40, 15, False, engine_class)
+    compile_network = engine_class.compile_network
+    compiled = []
+    monkeypatch.setattr(engine_class, "compile_network", lambda engine: (
+        compiled.append(engine) or compile_network(engine)))
+    results = run_switched_network(seed, 40, 15, True, engine_class)
+    assert len(compiled) == 1  # only when the engine is set
+    if expected is not None:
+        assert results == expected
+
+
+def test_set_switch_executes_affected_devices():
+    """Test if only the devices that the switch affects are executed."""
+    names, devices, network, monitors, switch_ids = make_random_network(3)
+    checkpoints = Checkpoints(network, monitors, interval=10)
+    assert run_network(network, monitors, 100, checkpoints=checkpoints)
+    executed = []
+    sweep_network = network.sweep_network
+    network.sweep_network = lambda device_ids: (
+        executed.append(device_ids) or sweep_network(device_ids))
+
+    [switch_id] = switch_ids[:1]
+    assert checkpoints.set_switch(switch_id, 1, 95)
+    assert len(executed) <= 10  # from the saved state at cycle 90
+    for device_ids in executed:
+        assert device_ids == network.get_fan_in_cone(
+            network.get_fan_out_cone(switch_id))
+    assert not checkpoints.set_switch(switch_id, 1, 101)
+
+
+def test_set_switch_keeps_switches_set_between_runs():
+    """Test if switches set before a continued run are re-simulated."""
+    results = []
+    for resimulate in [False, True]:
+        names, devices, network, monitors, switch_ids = make_random_network(
+            8, any_inputs=True)
+        [first_id, second_id] = switch_ids[:2]
+        checkpoints = Checkpoints(network, monitors, interval=50)
+        if not resimulate:
+            devices.set_switch(first_id, 1)
+        assert run_network(network, monitors, 20, checkpoints=checkpoints)
+        devices.set_switch(second_id, 1)
+        assert run_network(network, monitors, 20, checkpoints=checkpoints)
+        if resimulate:
+            assert checkpoints.set_switch(first_id, 1, 0)
+        results.append((monitors.monitors_dictionary, network.save_state()))
+    assert results[0] == results[1]
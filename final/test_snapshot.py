@@ -0,0 +1,115 @@
+"""Test the snapshot module."""
+import pickle
+import zlib
+
+import pytest
+
+import logsim
+from snapshot import get_fingerprint, load_snapshot, save_snapshot
+from simulate import run_network
+from vcd import VcdWriter
+from test_levelize import make_random_network
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_continue_from_snapshot(tmpdir, seed):
+    """Test if a run continued from a snapshot is the same as one run."""
+    path = str(tmpdir.join("run.snapshot"))
+    names, devices, network, monitors, switch_ids = make_random_network(
+        seed, any_inputs=True)
+    if not run_network(network, monitors, 30):
+        return
+    assert save_snapshot(path, network, monitors, 30)
+    if not run_network(network, monitors, 30):
+        return
+
+    [names, devices, loaded_network, loaded_monitors,
+     switch_ids] = make_random_network(seed + 1000, any_inputs=True)
+    assert load_snapshot(path, loaded_network, loaded_monitors) is None
+    [names, devices, loaded_network, loaded_monitors,
+     switch_ids] = make_random_network(seed, any_inputs=True)
+    devices.cold_startup()  # the snapshot replaces the random state
+    assert load_snapshot(path, loaded_network, loaded_monitors) == 30
+    assert run_network(loaded_network, loaded_monitors, 30)
+    assert loaded_monitors.monitors_dictionary == monitors.monitors_dictionary
+    assert loaded_network.save_state() == network.save_state()
+    assert loaded_network.global_counter == network.global_counter
+
+
+def test_load_snapshot_gives_errors(tmpdir):
+    """Test if missing and unreadable snapshots are not loaded."""
+    names, devices, network, monitors, switch_ids = make_random_network(0)
+    path = tmpdir.join("run.snapshot")
+    assert load_snapshot(str(path), network, monitors) is None
+    path.write_binary(b"not a snapshot")
+    assert load_snapshot(str(path), network, monitors) is None
+    assert not save_snapshot(str(tmpdir.join("missing", "run.snapshot")),
+                             network, monitors, 0)
+
+
+def test_vcd_continues_from_snapshot(tmpdir):
+    """Test if a continued run writes its VCD file from the loaded cycle."""
+    path = str(tmpdir.join("run.snapshot"))
+    vcd_path = tmpdir.join("run.vcd")
+    names, devices, network, monitors, switch_ids = make_random_network(1)
+    assert run_network(network, monitors, 5)
+    assert save_snapshot(path, network, monitors, 5)
+
+    names, devices, network, monitors, switch_ids = make_random_network(1)
+    monitors.set_vcd_writer(VcdWriter(names, devices, monitors,
+                                      str(vcd_path)))
+    assert load_snapshot(path, network, monitors) == 5
+    assert run_network(network, monitors, 3)
+    monitors.vcd_writer.close()
+    lines = vcd_path.read().splitlines()
+    definitions = lines.index("$enddefinitions $end")
+    assert lines[definitions + 1] == "#5"
+    assert lines[-1] == "#8"
+
+
+def test_batch_simulation_continues(tmpdir, capsys):
+    """Test if batch runs split by snapshots print the whole traces."""
+    first_path = str(tmpdir.join("first.snapshot"))
+    second_path = str(tmpdir.join("second.snapshot"))
+    logsim.main(["-n", "8", "-w", first_path, "example_1.txt"])
+    logsim.main(["-l", first_path, "-n", "4", "-s", "SW1=1",
+                 "-w", second_path, "example_1.txt"])
+    out, _ = capsys.readouterr()
+    assert "Loaded snapshot at cycle 8" in out
+    assert "Saved snapshot at cycle 12" in out
+    [first_trace, second_trace] = [line for line in out.split("\n")
+                                   if line.startswith("Q1.QBAR")]
+    assert second_trace.startswith(first_trace)
+    assert len(second_trace) == len("Q1.QBAR: ") + 12
+
+    with pytest.raises(SystemExit):
+        logsim.main(["-l", str(tmpdir.join("missing")), "-n", "4",
+                     "example_1.txt"])
+    out, _ = capsys.readouterr()
+    assert "Error! Could not load a snapshot of this network." in out
+
+
+@pytest.mark.parametrize("old, new", [
+    ("CLOCK 1", "CLOCK 7"), ("RC 5", "RC 6"),
+    ("CON SW3 -> Q1 . SET", "CON SW4 -> Q1 . SET")])
+def test_snapshot_of_changed_file_is_not_loaded(tmpdir, capsys, old, new):
+    """Test if snapshots are not loaded after the definition file changes."""
+    path = str(tmpdir.join("run.snapshot"))
+    definition = tmpdir.join("circuit.txt")
+    with open("example_1.txt") as example_file:
+        definition.write(example_file.read())
+    logsim.main(["-n", "10", "-w", path, str(definition)])
+    definition.write(definition.read().replace(old, new))
+    with pytest.raises(SystemExit):
+        logsim.main(["-l", path, "-n", "4", str(definition)])
+    out, _ = capsys.readouterr()
+    assert "Error! Could not load a snapshot of this network." in out
+
+
+def test_pickled_snapshot_is_not_loaded(tmpdir):
+    """Test if snapshots are read as data rather than unpickled."""
+    path = tmpdir.join("run.snapshot")
+    names, devices, network, monitors, switch_ids = make_random_network(0)
+    path.write_binary(zlib.compress(pickle.dumps(
+        {"fingerprint": get_fingerprint(names, devices)})))
+    assert load_snapshot(str(path), network, monitors) is None
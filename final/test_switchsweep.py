@@ -0,0 +1,61 @@
+"""Test the switchsweep module."""
+import pytest
+
+import logsim
+from switchsweep import format_table, get_assignment, sweep_switches
+from test_bitparallel import run_scenario
+from test_levelize import make_random_network
+
+
+def test_get_assignment():
+    """Test if assignments count up with the first switch most significant."""
+    assert [get_assignment(number, 2) for number in range(4)] == [
+        (0, 0), (0, 1), (1, 0), (1, 1)]
+    assert get_assignment(0, 0) == ()
+
+
+@pytest.mark.parametrize("seed, any_inputs, processes", [
+    (0, False, 1), (1, True, 1), (2, False, 2), (3, True, 2), (5, True, 3)])
+def test_rows_match_sweep_network(seed, any_inputs, processes):
+    """Test if every row holds the traces of its switch settings."""
+    names, devices, network, monitors, switch_ids = make_random_network(
+        seed, any_inputs)
+    state = network.save_state()
+    rows = sweep_switches(network, monitors, switch_ids, 12, processes,
+                          chunk_size=3)
+    assert network.save_state() == state
+    assert len(rows) == 1 << len(switch_ids)
+    for number, (switch_states, traces) in enumerate(rows):
+        assert switch_states == get_assignment(number, len(switch_ids))
+        expected = run_scenario(seed, any_inputs,
+                                dict(zip(switch_ids, switch_states)), 12)
+        assert [list(trace) for trace in traces] == [
+            list(trace) for trace in expected.values()]
+
+
+def test_format_table():
+    """Test if the table shows the switch states and traces."""
+    names, devices, network, monitors, switch_ids = make_random_network(3)
+    for device_id, output_id in list(monitors.monitors_dictionary):
+        if device_id not in switch_ids[:1]:
+            monitors.remove_monitor(device_id, output_id)
+    rows = sweep_switches(network, monitors, switch_ids[:1], 2, 1)
+    assert format_table(devices, monitors, switch_ids[:1], rows) == [
+        "Sw0 Sw0", "0   __", "1   --"]
+
+
+def test_switch_table_option(capsys):
+    """Test if logsim prints the table of every switch setting."""
+    logsim.main(["-n", "2", "-j", "2", "-s", "SW1=0", "-t", "SW3,SW4",
+                 "example_1.txt"])
+    out, _ = capsys.readouterr()
+    lines = out.split("\n")
+    assert "SW3 SW4 Q1.QBAR" in lines
+    table = lines[lines.index("SW3 SW4 Q1.QBAR") + 1:]
+    # The D-type is cleared or set, except in the first row
+    assert table[0].startswith("0   0   ")
+    assert table[1:4] == ["0   1   --", "1   0   __", "1   1   --"]
+
+    logsim.main(["-t", "SW3,G1", "example_1.txt"])
+    out, _ = capsys.readouterr()
+    assert "Error: G1 is not a switch" in out
@@ -0,0 +1,165 @@
+"""Test the userint module."""
+import random
+
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from userint import UserInterface
+from test_levelize import make_random_network
+
+
+@pytest.fixture
+def new_userint():
+    """Return a UserInterface with a switch, an inverter and monitors."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    [SW1_ID, G1_ID, I1] = names.lookup(["Sw1", "G1", "I1"])
+    devices.make_device(SW1_ID, devices.SWITCH, 0)
+    devices.make_device(G1_ID, devices.NAND, 1)
+    network.make_connection(SW1_ID, None, G1_ID, I1)
+    monitors.make_monitor(SW1_ID, None)
+    return UserInterface(names, devices, network, monitors)
+
+
+def test_read_script(new_userint):
+    """Test if repeated blocks are nested and comments are skipped."""
+    lines = ["# comment", "r 1", "{ 2", "s Sw1 1", "{ 3", "c 1", "}", "}",
+             "", "c 2"]
+    assert new_userint.read_script(lines) == [
+        "r 1", (2, ["s Sw1 1", (3, ["c 1"])]), "c 2"]
+
+
+@pytest.mark.parametrize("lines", [["{ 2", "r 1"], ["}"], ["{ x", "}"]])
+def test_read_script_gives_errors(new_userint, lines, capsys):
+    """Test if badly formed blocks are reported."""
+    assert new_userint.read_script(lines) is None
+    assert "Error!" in capsys.readouterr().out
+
+
+def test_run_script(new_userint, capsys):
+    """Test if a script runs quietly and displays the signals at the end."""
+    lines = ["r 2", "m G1", "{ 2", "s Sw1 1", "c 1", "s Sw1 0", "c 2", "}",
+             "s Sw9 1"]
+    assert new_userint.run_script(lines)
+    assert new_userint.cycles_completed == 8
+    out, _ = capsys.readouterr()
+    assert out.split("\n") == ["Error! Unknown name.",
+                               "Sw1: __-__-__",
+                               "G1 :   _--_--",
+                               ""]
+
+    # The q command stops the script
+    assert not new_userint.run_script(["r 1", "q", "c 5"])
+    assert new_userint.cycles_completed == 1
+
+
+def test_switch_command_resimulates(new_userint, capsys):
+    """Test if setting a switch from a cycle of the run rewrites it."""
+    lines = ["r 3", "m G1", "s Sw1 1", "c 3", "s Sw1 0 4", "s Sw1 1 2",
+             "s Sw1 0 7", "s Sw1 0 6"]
+    assert new_userint.run_script(lines)
+    out, _ = capsys.readouterr()
+    assert out.split("\n") == ["Number out of range.",
+                               "Sw1: __----",
+                               "G1 :   ____",
+                               ""]
+
+    # The switch set at the end of the run is used when it continues
+    new_userint.quiet = False
+    new_userint.line = "c 1"
+    new_userint.cursor = 1
+    assert new_userint.continue_command()
+    assert "Sw1: __----_" in capsys.readouterr().out
+
+
+def test_save_and_load_commands(new_userint, tmpdir, capsys):
+    """Test if a run can be saved, loaded and continued."""
+    path = str(tmpdir.join("run.snapshot"))
+    assert new_userint.run_script(["r 3", "w " + path, "s Sw1 1", "c 2"])
+    expected = capsys.readouterr().out
+    assert new_userint.run_script(["l " + path, "s Sw1 1 1", "s Sw1 1",
+                                   "c 2", "l", "l " + path + "x"])
+    out, _ = capsys.readouterr()
+    assert out == ("Error! The run can only be re-simulated from cycle 3.\n"
+                   "Error! Expected a file path.\n"
+                   "Error! Could not load a snapshot of this network.\n" +
+                   expected)
+    assert new_userint.cycles_completed == 5
+
+
+def test_oscillation_names_devices(new_userint, capsys):
+    """Test if the devices of an oscillating network are reported."""
+    names = new_userint.names
+    devices = new_userint.devices
+    [NOR1, I1] = names.lookup(["Nor1", "I1"])
+    devices.make_device(NOR1, devices.NOR, 1)
+    new_userint.network.make_connection(NOR1, None, NOR1, I1)
+    assert not new_userint.run_network(5)
+    out = capsys.readouterr().out
+    assert "Error! Network oscillating." in out
+    assert "Oscillating devices: Nor1\n" in out
+
+
+def run_fast_forwarded_network(seed, fast_forward, cycles=60):
+    """Return the traces and counters of a random network run for cycles.
+
+    The clocks are slowed down, so that most cycles change nothing. If
+    fast_forward is False, every cycle is executed.
+    """
+    names, devices, network, monitors, switch_ids = make_random_network(
+        seed, any_inputs=True)
+    rng = random.Random(-seed)
+    for device_id in devices.find_devices(devices.CLOCK):
+        device = devices.get_device(device_id)
+        device.clock_half_period = rng.randrange(1, 25)
+        device.clock_counter = rng.randrange(device.clock_half_period)
+    for device_id in devices.find_devices(devices.RC):
+        devices.get_device(device_id).fall_time = rng.randrange(40)
+
+    executed = []
+    execute_network = network.execute_network
+
+    def count_cycle():
+        executed.append(network.global_counter)
+        return execute_network()
+
+    network.execute_network = count_cycle
+    if fast_forward:
+        UserInterface(names, devices, network, monitors).run_network(cycles)
+    else:
+        for _ in range(cycles):
+            if not network.execute_network():
+                break
+            monitors.record_signals()
+    clock_counters = [devices.get_device(device_id).clock_counter for
+                      device_id in devices.find_devices(devices.CLOCK)]
+    return (monitors.monitors_dictionary, clock_counters,
+            network.global_counter), len(executed)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_run_network_skips_quiet_cycles(seed, capsys):
+    """Test if skipping quiet cycles gives the same traces and counters."""
+    (result, executed_count) = run_fast_forwarded_network(seed, True)
+    (expected, all_cycles) = run_fast_forwarded_network(seed, False)
+    assert result == expected
+    assert executed_count <= all_cycles
+
+
+def test_run_network_fast_forwards(new_userint):
+    """Test if no cycles are executed while the switches are unchanged."""
+    network = new_userint.network
+    executed = []
+    execute_network = network.execute_network
+    network.execute_network = lambda: executed.append(1) or execute_network()
+    new_userint.quiet = True
+    assert new_userint.run_network(1000)
+    assert len(executed) == 1
+    assert network.global_counter == 1000
+    assert len(new_userint.monitors.monitors_dictionary[
+        (new_userint.names.query("Sw1"), None)]) == 1000
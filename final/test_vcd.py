@@ -0,0 +1,57 @@
+"""Test the vcd module."""
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from vcd import VcdWriter
+
+
+def test_write_signals(tmp_path):
+    """Test if only changed signals are written at each time step."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    [SW1_ID, SW2_ID, D1_ID] = names.lookup(["Sw1", "Sw2", "D1"])
+    devices.make_device(SW1_ID, devices.SWITCH, 0)
+    devices.make_device(SW2_ID, devices.SWITCH, 1)
+    devices.make_device(D1_ID, devices.D_TYPE)
+    for input_id in devices.dtype_input_ids:
+        network.make_connection(SW1_ID, None, D1_ID, input_id)
+    monitors.make_monitor(SW1_ID, None)
+    monitors.make_monitor(SW2_ID, None)
+
+    path = tmp_path / "trace.vcd"
+    monitors.set_vcd_writer(VcdWriter(names, devices, monitors, str(path)))
+    for cycle in range(4):
+        if cycle == 2:
+            devices.set_switch(SW1_ID, devices.HIGH)
+        network.execute_network()
+        monitors.record_signals()
+    # Monitors made after the header is written are not in the file
+    monitors.make_monitor(D1_ID, devices.Q_ID)
+    monitors.record_signals()
+    monitors.vcd_writer.close()
+
+    lines = path.read_text().splitlines()
+    definitions = lines.index("$enddefinitions $end")
+    assert "$var wire 1 ! Sw1 $end" in lines[:definitions]
+    assert '$var wire 1 " Sw2 $end' in lines[:definitions]
+    assert "D1.Q" not in path.read_text()
+    assert lines[definitions + 1:] == ["#0", "0!", '1"', "#2", "1!", "#5"]
+    # The stored traces are unchanged
+    assert monitors.monitors_dictionary[(SW1_ID, None)] == [0, 0, 1, 1, 1]
+
+
+def test_get_identifier(tmp_path):
+    """Test if every variable has a different printable identifier."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    writer = VcdWriter(names, devices, monitors, str(tmp_path / "t.vcd"))
+    identifiers = [writer.get_identifier(number) for number in range(20000)]
+    assert len(set(identifiers)) == 20000
+    assert all(33 <= ord(character) <= 126 for identifier in identifiers
+               for character in identifier)
+    writer.close()
@@ -0,0 +1,42 @@
+"""Test the workerpool module."""
+import pytest
+
+from workerpool import get_chunks, run_chunks, worker
+from test_levelize import make_random_network
+
+
+def test_get_chunks():
+    """Test if the items are split into a few chunks for each process."""
+    assert get_chunks(10, 1) == (1, [(0, 3), (3, 6), (6, 9), (9, 10)])
+    assert get_chunks(10, 2, chunk_size=4) == (2, [(0, 4), (4, 8), (8, 10)])
+    assert get_chunks(100, 1, max_chunk_size=10)[1][:2] == [(0, 10),
+                                                            (10, 20)]
+    assert get_chunks(0, 3) == (3, [])
+    assert get_chunks(5)[0] >= 1
+
+
+def load_worker(network, monitors, offset):
+    """Set up a worker process to count the devices of the network."""
+    worker["offset"] = offset
+
+
+def count_devices(start, stop):
+    """Return the device count and monitors of a worker, with the chunk."""
+    return (len(worker["network"].devices.devices_list) + worker["offset"],
+            list(worker["monitors"].monitors_dictionary), start, stop)
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_run_chunks(processes):
+    """Test if every chunk is run by a worker sent a copy of the network."""
+    names, devices, network, monitors, switch_ids = make_random_network(2)
+    engine = object()  # engines are not sent to the workers
+    network.engine = engine
+    chunks = [(0, 2), (2, 3), (3, 7)]
+    results = run_chunks(count_devices, chunks, network, monitors,
+                         load_worker, (100,), processes)
+    assert results == [(len(devices.devices_list) + 100,
+                        list(monitors.monitors_dictionary), start, stop)
+                       for start, stop in chunks]
+    assert network.engine is engine
+    assert not worker
@@ -7,6 +7,9 @@ Classes:
 --------
 UserInterface - reads and parses user commands.
 """
+import random
+
+import simulate
 
 
 class UserInterface:
@@ -29,6 +32,18 @@ class UserInterface:
     command_interface(self): Reads in the commands and calls the corresponding
                              functions.
 
+    run_script(self, lines): Runs the commands in lines without prompts, and
+                             displays the signals at the end.
+
+    read_script(self, lines): Returns the commands in lines, with repeated
+                              blocks nested in lists.
+
+    execute_block(self, block): Executes the commands in a block.
+
+    execute_command(self, command): Calls the function for a command.
+
+    report(self, message): Prints a message unless running a script.
+
     get_line(self): Prints a prompt for the user and updates the user entry.
 
     read_command(self): Returns the first non-whitespace character.
@@ -48,10 +63,12 @@ class UserInterface:
 
     read_number(self, lower_bound, upper_bound): Returns the current number.
 
+    read_path(self): Returns the rest of the user entry as a file path.
+
     help_command(self): Prints a list of valid commands.
 
     switch_command(self): Sets the specified switch to the specified signal
-                          level.
+                          level, from a cycle of the run if given.
 
     monitor_command(self): Sets the specified monitor.
 
@@ -60,9 +77,21 @@ class UserInterface:
     run_network(self, cycles): Runs the network for the specified number of
                                simulation cycles.
 
+    report_oscillation(self): Prints the devices that keep changing in an
+                              oscillating network.
+
     run_command(self): Runs the simulation from scratch.
 
     continue_command(self): Continues a previously run simulation.
+
+    save_run(self, path): Writes a snapshot of the simulation to path.
+
+    load_run(self, path): Loads a snapshot of a simulation from path.
+
+    save_command(self): Writes a snapshot of the simulation to a file.
+
+    load_command(self): Loads a snapshot of a simulation from a file, so
+                        that it can be continued.
     """
 
     def __init__(self, names, devices, network, monitors):
@@ -73,6 +102,13 @@ class UserInterface:
         self.network = network
 
         self.cycles_completed = 0  # number of simulation cycles completed
+        self.quiet = False  # True to only print errors, when running scripts
+        # True to extrapolate periodic networks instead of simulating them
+        self.extrapolate = False
+        # Random number generator for cold start-ups, seeded to repeat runs
+        self.rng = random
+        # Network states kept to re-simulate runs after a switch is set
+        self.checkpoints = simulate.Checkpoints(network, monitors)
 
         self.character = ""  # current character
         self.line = ""  # current string entered by the user
@@ -85,23 +121,112 @@ class UserInterface:
         self.get_line()  # get the user entry
         command = self.read_command()  # read the first character
         while command != "q":
-            if command == "h":
-                self.help_command()
-            elif command == "s":
-                self.switch_command()
-            elif command == "m":
-                self.monitor_command()
-            elif command == "z":
-                self.zap_command()
-            elif command == "r":
-                self.run_command()
-            elif command == "c":
-                self.continue_command()
-            else:
-                print("Invalid command. Enter 'h' for help.")
+            self.execute_command(command)
             self.get_line()  # get the user entry
             command = self.read_command()  # read the first character
 
+    def execute_command(self, command):
+        """Call the function for the specified command character.
+
+        Return False if the network oscillated, and True otherwise.
+        """
+        if command == "h":
+            self.help_command()
+        elif command == "s":
+            return self.switch_command()
+        elif command == "m":
+            self.monitor_command()
+        elif command == "z":
+            self.zap_command()
+        elif command == "r":
+            return self.run_command()
+        elif command == "c":
+            return self.continue_command()
+        elif command == "w":
+            self.save_command()
+        elif command == "l":
+            self.load_command()
+        else:
+            print("Invalid command. Enter 'h' for help.")
+        return True
+
+    def run_script(self, lines):
+        """Run the commands in lines, then display the signals.
+
+        Commands are the same as in the interactive interface, one per line.
+        Blank lines and lines starting with # are ignored. The lines between
+        "{ N" and "}" are repeated N times, and blocks can be nested. Only
+        errors are printed while the script runs. Return False if the script
+        could not be read or a command stopped it.
+        """
+        script = self.read_script(lines)
+        if script is None:
+            return False
+        self.quiet = True
+        try:
+            success = self.execute_block(script)
+        finally:
+            self.quiet = False
+        self.monitors.display_signals()
+        return success
+
+    def read_script(self, lines):
+        """Return the commands in lines, with repeated blocks nested.
+
+        Each repeated block is a (count, commands) tuple. Return None if a
+        block is not opened or closed correctly.
+        """
+        blocks = [[]]  # the blocks being read, innermost last
+        counts = []
+        for line_number, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("{"):
+                count = line[1:].strip()
+                if not count.isdigit():
+                    print("Error! Expected a number of repeats on line",
+                          line_number)
+                    return None
+                counts.append(int(count))
+                blocks.append([])
+            elif line == "}":
+                if not counts:
+                    print("Error! Unexpected } on line", line_number)
+                    return None
+                block = blocks.pop()
+                blocks[-1].append((counts.pop(), block))
+            else:
+                blocks[-1].append(line)
+        if counts:
+            print("Error! Missing }.")
+            return None
+        return blocks[0]
+
+    def execute_block(self, block):
+        """Execute the commands in block, as returned by read_script.
+
+        Return False if the q command or an oscillating network stopped it.
+        """
+        for command_line in block:
+            if isinstance(command_line, tuple):
+                (count, inner_block) = command_line
+                for _ in range(count):
+                    if not self.execute_block(inner_block):
+                        return False
+                continue
+            self.line = command_line
+            self.cursor = 0
+            command = self.read_command()
+            if command == "q" or not self.execute_command(command):
+                return False
+        return True
+
+    def report(self, message):
+        """Print message, unless running a script."""
+        if not self.quiet:
+            print(message)
+
     def get_line(self):
         """Print prompt for the user and update the user entry."""
         self.cursor = 0
@@ -198,27 +323,69 @@ class UserInterface:
 
         return number
 
+    def read_path(self):
+        """Return the rest of the user entry as a file path.
+
+        Return None if there is no path.
+        """
+        path = self.line[self.cursor:].strip()
+        self.cursor = len(self.line)
+        if not path:
+            print("Error! Expected a file path.")
+            return None
+        return path
+
     def help_command(self):
         """Print a list of valid commands."""
         print("User commands:")
         print("r N       - run the simulation for N cycles")
         print("c N       - continue the simulation for N cycles")
         print("s X N     - set switch X to N (0 or 1)")
+        print("s X N T   - set switch X to N from cycle T of the run, and "
+              "re-simulate")
         print("m X       - set a monitor on signal X")
         print("z X       - zap the monitor on signal X")
+        print("w F       - write a snapshot of the simulation to file F")
+        print("l F       - load a snapshot from file F, to continue it")
         print("h         - help (this command)")
         print("q         - quit the program")
 
     def switch_command(self):
-        """Set the specified switch to the specified signal level."""
+        """Set the specified switch to the specified signal level.
+
+        If a cycle is given, the switch is set from that cycle of the run,
+        and the rest of the run is re-simulated. Return False if the network
+        oscillated, and True otherwise.
+        """
         switch_id = self.read_name()
-        if switch_id is not None:
-            switch_state = self.read_number(0, 1)
-            if switch_state is not None:
-                if self.devices.set_switch(switch_id, switch_state):
-                    print("Successfully set switch.")
-                else:
-                    print("Error! Invalid switch.")
+        if switch_id is None:
+            return True
+        switch_state = self.read_number(0, 1)
+        if switch_state is None:
+            return True
+        device = self.devices.get_device(switch_id)
+        if device is None or device.device_kind != self.devices.SWITCH:
+            print("Error! Invalid switch.")
+        elif not self.line[self.cursor:].strip():  # no cycle given
+            self.devices.set_switch(switch_id, switch_state)
+            self.report("Successfully set switch.")
+        else:
+            cycle = self.read_number(0, self.cycles_completed)
+            if cycle is None:
+                return True
+            first_cycle = self.checkpoints.get_first_cycle()
+            if self.cycles_completed == 0:
+                print("Error! Nothing to re-simulate. Run first.")
+            elif cycle < first_cycle:
+                print("Error! The run can only be re-simulated from cycle",
+                      str(first_cycle) + ".")
+            elif self.checkpoints.set_switch(switch_id, switch_state, cycle):
+                self.report(" ".join(["Re-simulated from cycle", str(cycle),
+                                      "with the switch set."]))
+            else:
+                self.report_oscillation()
+                return False
+        return True
 
     def monitor_command(self):
         """Set the specified monitor."""
@@ -228,7 +395,7 @@ class UserInterface:
             monitor_error = self.monitors.make_monitor(device, port,
                                                        self.cycles_completed)
             if monitor_error == self.monitors.NO_ERROR:
-                print("Successfully made monitor.")
+                self.report("Successfully made monitor.")
             else:
                 print("Error! Could not make monitor.")
 
@@ -238,7 +405,7 @@ class UserInterface:
         if monitor is not None:
             [device, port] = monitor
             if self.monitors.remove_monitor(device, port):
-                print("Successfully zapped monitor")
+                self.report("Successfully zapped monitor")
             else:
                 print("Error! Could not zap monitor.")
 
@@ -247,34 +414,98 @@ class UserInterface:
 
         Return True if successful.
         """
-        for _ in range(cycles):
-            if self.network.execute_network():
-                self.monitors.record_signals()
-            else:
-                print("Error! Network oscillating.")
-                return False
-        self.monitors.display_signals()
+        if not simulate.run_network(self.network, self.monitors, cycles,
+                                    self.extrapolate, self.checkpoints):
+            self.report_oscillation()
+            return False
+        if not self.quiet:  # scripts display the signals once at the end
+            self.monitors.display_signals()
         return True
 
+    def report_oscillation(self):
+        """Print the devices that keep changing in an oscillating network."""
+        print("Error! Network oscillating.")
+        print("Oscillating devices:", ", ".join(
+            self.names.get_name_string(device_id)
+            for device_id in self.network.oscillating_devices))
+
     def run_command(self):
-        """Run the simulation from scratch."""
+        """Run the simulation from scratch.
+
+        Return False if the network oscillated, and True otherwise.
+        """
         self.cycles_completed = 0
         cycles = self.read_number(0, None)
 
         if cycles is not None:  # if the number of cycles provided is valid
             self.monitors.reset_monitors()
-            print("".join(["Running for ", str(cycles), " cycles"]))
-            self.devices.cold_startup()
+            self.report("".join(["Running for ", str(cycles), " cycles"]))
+            self.devices.cold_startup(self.rng)
+            self.checkpoints.reset()
             if self.run_network(cycles):
                 self.cycles_completed += cycles
+            else:
+                return False
+        return True
 
     def continue_command(self):
-        """Continue a previously run simulation."""
+        """Continue a previously run simulation.
+
+        Return False if the network oscillated, and True otherwise.
+        """
         cycles = self.read_number(0, None)
         if cycles is not None:  # if the number of cycles provided is valid
             if self.cycles_completed == 0:
                 print("Error! Nothing to continue. Run first.")
             elif self.run_network(cycles):
                 self.cycles_completed += cycles
-                print(" ".join(["Continuing for", str(cycles), "cycles.",
-                                "Total:", str(self.cycles_completed)]))
+                self.report(" ".join(["Continuing for", str(cycles),
+                                      "cycles.", "Total:",
+                                      str(self.cycles_completed)]))
+            else:
+                return False
+        return True
+
+    def save_run(self, path):
+        """Write a snapshot of the simulation to path.
+
+        Return True if successful.
+        """
+        from snapshot import save_snapshot  # hashlib is slow to import
+        if not save_snapshot(path, self.network, self.monitors,
+                             self.cycles_completed):
+            print("Error! Could not write the snapshot.")
+            return False
+        self.report(" ".join(["Saved snapshot at cycle",
+                              str(self.cycles_completed)]))
+        return True
+
+    def load_run(self, path):
+        """Load a snapshot of a simulation from path, to continue it.
+
+        Return True if successful.
+        """
+        from snapshot import load_snapshot  # hashlib is slow to import
+        cycles = load_snapshot(path, self.network, self.monitors)
+        if cycles is None:
+            print("Error! Could not load a snapshot of this network.")
+            return False
+        self.cycles_completed = cycles
+        self.checkpoints.reset(cycles)
+        self.report(" ".join(["Loaded snapshot at cycle", str(cycles)]))
+        return True
+
+    def save_command(self):
+        """Write a snapshot of the simulation to the specified file."""
+        path = self.read_path()
+        if path is not None:
+            self.save_run(path)
+
+    def load_command(self):
+        """Load a snapshot of a simulation from the specified file.
+
+        The simulation can then be continued with the c command.
+        """
+        path = self.read_path()
+        if path is not None:
+            self.load_run(path)
@@ -0,0 +1,118 @@
+"""Write monitored signals to a Value Change Dump (VCD) file.
+
+Used in the Logic Simulator project to view long simulations in standard
+waveform viewers, such as GTKWave. The signals are written as they are
+recorded, so the file does not need to be built from the stored traces.
+
+Classes
+-------
+VcdWriter - streams monitored signals to a VCD file.
+"""
+import time
+
+
+class VcdWriter:
+    """Stream monitored signals to a VCD file.
+
+    Each call to write_signals() is one time step in the file, and only the
+    signals that changed since the previous step are written. The variables
+    are declared when the first step is written, so monitors made after that
+    are not included in the file, and removed monitors keep their last
+    value.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    monitors: instance of the monitors.Monitors() class.
+    path: path of the VCD file to write.
+    buffer_size: size of the file buffer in bytes.
+
+    Public methods
+    --------------
+    write_header(self): Declares the monitored signals as VCD variables.
+
+    write_signals(self, count=1, signals=None): Writes the monitored signals
+                                  that changed since the previous time step.
+
+    close(self): Writes the final time step and closes the file.
+    """
+
+    def __init__(self, names, devices, monitors, path, buffer_size=1 << 16):
+        """Open the VCD file."""
+        self.names = names
+        self.devices = devices
+        self.monitors = monitors
+        self.path = path
+        self.file = open(path, 'w', buffering=buffer_size)
+
+        # VCD value of each signal level
+        self.values = {devices.LOW: '0', devices.HIGH: '1',
+                       devices.RISING: '1', devices.FALLING: '0',
+                       devices.BLANK: 'x'}
+        self.identifiers = {}  # stores {(device_id, output_id): identifier}
+        self.last_values = {}  # stores {(device_id, output_id): value}
+        self.time = 0  # time step of the next write, set when continuing
+        self.header_written = False
+
+    def get_identifier(self, number):
+        """Return the VCD identifier of the specified variable number.
+
+        Identifiers are written in base 94 with the printable ASCII
+        characters.
+        """
+        identifier = chr(33 + number % 94)
+        number //= 94
+        while number:
+            number -= 1
+            identifier += chr(33 + number % 94)
+            number //= 94
+        return identifier
+
+    def write_header(self):
+        """Declare the monitored signals as VCD variables."""
+        lines = ["$date %s $end" % time.asctime(),
+                 "$version Logic Simulator $end",
+                 "$timescale 1 ns $end",
+                 "$scope module logsim $end"]
+        for device_id, output_id in self.monitors.monitors_dictionary:
+            identifier = self.get_identifier(len(self.identifiers))
+            self.identifiers[(device_id, output_id)] = identifier
+            signal_name = self.devices.get_signal_name(device_id, output_id)
+            lines.append("$var wire 1 %s %s $end" % (identifier,
+                                                     signal_name))
+        lines.extend(["$upscope $end", "$enddefinitions $end"])
+        self.file.write("\n".join(lines) + "\n")
+        self.header_written = True
+
+    def write_signals(self, count=1, signals=None):
+        """Write the monitored signals that changed since the last time step.
+
+        This function is called by Monitors.record_signals() every cycle.
+        The signals are held for count time steps. signals is a dictionary
+        of the signal of each monitor to write instead of the current ones.
+        """
+        if not self.header_written:
+            self.write_header()
+
+        changes = []
+        for key, identifier in self.identifiers.items():
+            if key not in self.monitors.monitors_dictionary:
+                continue  # the monitor has been removed
+            if signals is None:
+                signal = self.monitors.get_monitor_signal(*key)
+            else:
+                signal = signals[key]
+            value = self.values.get(signal, 'x')
+            if self.last_values.get(key) != value:
+                self.last_values[key] = value
+                changes.append(value + identifier)
+        if changes:
+            self.file.write("#%d\n%s\n" % (self.time, "\n".join(changes)))
+        self.time += count
+
+    def close(self):
+        """Write the final time step, so viewers show the last cycle."""
+        if self.header_written:
+            self.file.write("#%d\n" % self.time)
+        self.file.close()
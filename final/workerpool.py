@@ -0,0 +1,94 @@
+"""Share the simulation of a network between a pool of worker processes.
+
+Used in the Logic Simulator project by switchsweep and montecarlo. The work
+is split into chunks of numbered items, which are shared by a pool of worker
+processes. Each worker is sent the network and monitored signals once when
+it starts, rather than with every chunk, and keeps them in the worker
+dictionary for the chunks it simulates.
+
+Functions
+---------
+get_chunks - returns the (start, stop) ranges of the chunks of the items.
+pickle_network - returns the pickled network and monitored signals.
+init_worker - loads the network sent to a worker process.
+run_chunks - runs a function on every chunk in a pool of worker processes.
+"""
+import multiprocessing
+import os
+import pickle
+
+from monitors import Monitors
+
+# The network and settings of a worker process, set by init_worker
+worker = {}
+
+
+def get_chunks(item_count, processes=None, chunk_size=None,
+               max_chunk_size=None):
+    """Return the number of processes and the chunks of the items.
+
+    processes is the number of worker processes, by default one for each
+    CPU. By default, there are a few chunks for each process, which
+    balances the load, up to max_chunk_size items in each. The chunks are
+    (start, stop) ranges of the item numbers.
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = max(-(-item_count // (4 * processes)), 1)
+        if max_chunk_size is not None:
+            chunk_size = min(chunk_size, max_chunk_size)
+    chunks = [(start, min(start + chunk_size, item_count))
+              for start in range(0, item_count, chunk_size)]
+    return processes, chunks
+
+
+def pickle_network(network, monitors):
+    """Return the pickled network and monitored signals.
+
+    The engine of the network is left out, as compiled engines may not be
+    picklable, so the workers execute the network with sweep_network.
+    """
+    engine = network.engine
+    network.engine = None
+    try:
+        return pickle.dumps((network, list(monitors.monitors_dictionary)),
+                            pickle.HIGHEST_PROTOCOL)
+    finally:
+        network.engine = engine
+
+
+def init_worker(netlist, load_worker, settings):
+    """Load the network sent to a worker process.
+
+    netlist is the network and monitored signals from pickle_network. They
+    are kept as worker["network"] and worker["monitors"], then
+    load_worker(network, monitors, *settings) sets up the rest of the
+    worker dictionary.
+    """
+    (network, monitored) = pickle.loads(netlist)
+    monitors = Monitors(network.names, network.devices, network)
+    for device_id, output_id in monitored:
+        monitors.make_monitor(device_id, output_id)
+    worker["network"] = network
+    worker["monitors"] = monitors
+    load_worker(network, monitors, *settings)
+
+
+def run_chunks(run_chunk, chunks, network, monitors, load_worker, settings,
+               processes):
+    """Return the results of run_chunk(start, stop) for every chunk.
+
+    The chunks are simulated by processes worker processes, each set up by
+    init_worker with a copy of the network, which is left unchanged. With
+    one process or chunk, they are simulated without starting a pool.
+    """
+    initargs = (pickle_network(network, monitors), load_worker, settings)
+    if processes == 1 or len(chunks) <= 1:
+        init_worker(*initargs)
+        try:
+            return [run_chunk(*chunk) for chunk in chunks]
+        finally:
+            worker.clear()
+    with multiprocessing.Pool(processes, init_worker, initargs) as pool:
+        return pool.starmap(run_chunk, chunks)